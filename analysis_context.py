@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析上下文
+一支股票在一個分析日期（一份 IndicatorFrame）共用的衍生序列快取。
+指標註冊表、趨勢評分、進場評估、強化確認系統與多時間框架分析都透過 context_for(df)
+取得同一個上下文：報酬率、滾動均值/標準差/極值與區域低點在第一次使用時計算並保存，
+之後的階段直接沿用，不再各自重算。
+"""
+
+from collections import Counter
+
+import numpy as np
+
+from rolling_primitives import local_minima, rolling
+
+
+class AnalysisContext:
+    """
+    data 為 IndicatorFrame（或 DataFrame、{欄位: 矩陣}），其欄位在上下文存續期間不可再修改
+    hits / misses 依快取種類統計沿用與實際計算的次數
+    """
+
+    __slots__ = ('data', 'symbol', '_cache', 'hits', 'misses')
+
+    def __init__(self, data, symbol=None):
+        self.data = data
+        self.symbol = symbol
+        self._cache = {}
+        self.hits = Counter()
+        self.misses = Counter()
+
+    @property
+    def as_of(self):
+        index = getattr(self.data, 'index', None)
+        return index[-1] if index is not None and len(index) else None
+
+    def memo(self, key, func):
+        """以 key（第一個元素為種類）保存 func() 的結果"""
+        if key in self._cache:
+            self.hits[key[0]] += 1
+            return self._cache[key]
+        self.misses[key[0]] += 1
+        value = func()
+        self._cache[key] = value
+        return value
+
+    def pct_change(self, periods=1, column='Close'):
+        """同 data[column].pct_change(periods)"""
+        return self.memo(('pct_change', column, periods), lambda: self.data[column].pct_change(periods=periods))
+
+    def rolling(self, column, window, how='mean', min_periods=None):
+        """同 data[column].rolling(window, min_periods).<how>()，how 為 mean / std / min / max"""
+        return self.memo(
+            ('rolling', column, window, how, min_periods),
+            lambda: rolling(self.data[column], window, how, min_periods))
+
+    def local_lows(self, strict=False, column='Low', width=1):
+        """
+        區域低點遮罩：第 i 根K線的最低價低於（strict）或不高於前後各 width 根K線
+        前後不足 width 根K線的位置恆為 False
+        """
+        return self.memo(
+            ('local_lows', column, strict, width),
+            lambda: local_minima(self.data[column].to_numpy(dtype=np.float64), width, strict))
+
+    def profile(self):
+        """各種快取的實際計算與沿用次數"""
+        return {
+            kind: {'computed': self.misses[kind], 'reused': self.hits[kind]}
+            for kind in sorted(set(self.misses) | set(self.hits))
+        }
+
+
+def context_for(data):
+    """data 為 IndicatorFrame 時返回其共用的上下文，否則建立只供本次呼叫使用的上下文"""
+    context = getattr(data, 'context', None) if not isinstance(data, dict) else None
+    return context if isinstance(context, AnalysisContext) else AnalysisContext(data)
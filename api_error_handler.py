@@ -5,83 +5,88 @@ API錯誤處理器
 處理Yahoo Finance API錯誤和數據問題
 """
 
-import yfinance as yf
 import pandas as pd
-import time
 import warnings
 from datetime import datetime, timedelta
 import requests
 
+from market_data_provider import get_market_data_provider
+from negative_cache import get_negative_cache
+from async_fetcher import (get_async_fetcher, ERROR_NOT_FOUND, ERROR_RATE_LIMITED,
+                           ERROR_TIMEOUT, ERROR_EMPTY)
+
 warnings.filterwarnings('ignore')
 
+
+def validate_history(data):
+    """檢查下載的K線是否可用，不可用時返回原因"""
+    if data is None or data.empty:
+        return "無數據返回"
+    # 至少需要30天數據
+    if len(data) < 30:
+        return f"數據不足 ({len(data)}天)"
+    # 檢查是否有有效的價格數據
+    if data['Close'].isna().all():
+        return "價格數據全部為空"
+    return None
+
+
 class APIErrorHandler:
     def __init__(self):
-        self.failed_symbols = set()
+        self.negative_cache = get_negative_cache()  # 跨執行保存的失敗股票記錄
         self.retry_count = {}
         self.max_retries = 3
-        self.delay_between_requests = 0.1  # 100ms延遲
+        self.fetcher = get_async_fetcher()  # 並行請求、令牌桶限流與分類重試
+        self.provider = get_market_data_provider()  # 市場數據來源（Yahoo 或本地檔案）
         
+    @property
+    def failed_symbols(self):
+        """失敗快取中尚未到期的股票"""
+        return set(self.negative_cache.blocked_symbols())
+
+    def _history_request(self, symbol, period, interval):
+        return self.provider.history(symbol, period=period, interval=interval)
+
+    def _report_failure(self, symbol, result):
+        """依錯誤類別輸出失敗原因並記錄失敗的股票"""
+        error_class = result.error_class
+        if error_class == ERROR_NOT_FOUND:
+            print(f"  ❌ {symbol}: 股票可能已下市或代號錯誤")
+        elif error_class == ERROR_EMPTY:
+            print(f"  ⚠️  {symbol}: {result.error}")
+        elif error_class == ERROR_RATE_LIMITED:
+            print(f"  ❌ {symbol}: API限制，達到最大重試次數，跳過")
+        elif error_class == ERROR_TIMEOUT:
+            print(f"  ❌ {symbol}: 請求超時，達到最大重試次數，跳過")
+        else:
+            print(f"  ❌ {symbol}: 未知錯誤 - {result.error}")
+        self.negative_cache.record_error(symbol, error_class, result.error)
+
+    def _download_many(self, symbols, period, interval, max_retries):
+        """並行下載多支股票，返回 {symbol: FetchResult}"""
+        allowed, _ = self.negative_cache.partition(symbols)
+        calls = {
+            symbol: (self._history_request, (symbol, period, interval), {})
+            for symbol in allowed
+        }
+        results = self.fetcher.run_many(calls, validate=validate_history, max_retries=max_retries)
+        for symbol, result in results.items():
+            if result.ok:
+                self.negative_cache.clear(symbol)
+        return results
+
     def safe_download_data(self, symbol, period='2y', interval='1d', max_retries=3):
         """
         安全下載股票數據，包含錯誤處理和重試機制
         """
-        if symbol in self.failed_symbols:
+        if self.negative_cache.is_blocked(symbol):
             return None
-            
-        for attempt in range(max_retries):
-            try:
-                # 添加延遲避免API限制
-                time.sleep(self.delay_between_requests)
-                
-                ticker = yf.Ticker(symbol)
-                data = ticker.history(period=period, interval=interval)
-                
-                if data.empty:
-                    print(f"  ⚠️  {symbol}: 無數據返回")
-                    if attempt == max_retries - 1:
-                        self.failed_symbols.add(symbol)
-                    continue
-                
-                # 檢查數據質量
-                if len(data) < 30:  # 至少需要30天數據
-                    print(f"  ⚠️  {symbol}: 數據不足 ({len(data)}天)")
-                    if attempt == max_retries - 1:
-                        self.failed_symbols.add(symbol)
-                    continue
-                
-                # 檢查是否有有效的價格數據
-                if data['Close'].isna().all():
-                    print(f"  ⚠️  {symbol}: 價格數據全部為空")
-                    if attempt == max_retries - 1:
-                        self.failed_symbols.add(symbol)
-                    continue
-                
-                return data
-                
-            except Exception as e:
-                error_msg = str(e)
-                
-                # 處理不同類型的錯誤
-                if "404" in error_msg or "delisted" in error_msg.lower():
-                    print(f"  ❌ {symbol}: 股票可能已下市或代號錯誤")
-                    self.failed_symbols.add(symbol)
-                    break
-                elif "429" in error_msg or "rate limit" in error_msg.lower():
-                    print(f"  ⏳ {symbol}: API限制，等待重試...")
-                    time.sleep(5)  # 等待5秒後重試
-                elif "timeout" in error_msg.lower():
-                    print(f"  ⏳ {symbol}: 請求超時，重試中...")
-                    time.sleep(2)
-                else:
-                    print(f"  ❌ {symbol}: 未知錯誤 - {error_msg}")
-                
-                if attempt == max_retries - 1:
-                    print(f"  ❌ {symbol}: 達到最大重試次數，跳過")
-                    self.failed_symbols.add(symbol)
-                else:
-                    print(f"  🔄 {symbol}: 重試 {attempt + 1}/{max_retries}")
-                    time.sleep(1)
-        
+
+        result = self._download_many([symbol], period, interval, max_retries)[symbol]
+        if result.ok:
+            return result.data
+
+        self._report_failure(symbol, result)
         return None
     
     def validate_symbol(self, symbol):
@@ -141,15 +146,20 @@ class APIErrorHandler:
         successful_data = {}
         failed_count = 0
         
+        # 所有股票並行下載，速率由共用的令牌桶控制
+        results = self._download_many(cleaned_symbols, period, interval, self.max_retries)
+        
         for i, symbol in enumerate(cleaned_symbols):
-            print(f"[{i+1}/{len(cleaned_symbols)}] 下載 {symbol}...")
-            
-            data = self.safe_download_data(symbol, period, interval)
+            result = results.get(symbol)
+            print(f"[{i+1}/{len(cleaned_symbols)}] {symbol}")
             
-            if data is not None:
+            if result is not None and result.ok:
+                data = result.data
                 successful_data[symbol] = data
                 print(f"  ✅ {symbol}: 成功 ({len(data)}天數據)")
             else:
+                if result is not None:
+                    self._report_failure(symbol, result)
                 failed_count += 1
         
         print(f"\n下載完成:")
@@ -169,8 +179,7 @@ class APIErrorHandler:
         """
         try:
             # 使用SPY作為市場指標
-            spy = yf.Ticker("SPY")
-            data = spy.history(period="1d")
+            data = self.provider.history("SPY", period="5d")
             
             if not data.empty:
                 return {
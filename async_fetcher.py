@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+非同步數據擷取器
+以 asyncio 同時執行多個 Yahoo Finance 請求，並由令牌桶控制整體請求速率；
+錯誤依 404 / 429 / 超時分類，各類別使用帶抖動的指數退避重試
+"""
+
+import asyncio
+import os
+import random
+import threading
+
+from backend.path_manager import SharedInstance
+from rate_limiter import get_yahoo_rate_limiter, UnlimitedRateLimiter
+from market_data_provider import get_market_data_provider
+
+# 同時進行的請求數與每個請求的最大嘗試次數
+DEFAULT_CONCURRENCY = int(os.environ.get('BULLPS_FETCH_CONCURRENCY', 8))
+DEFAULT_MAX_RETRIES = int(os.environ.get('BULLPS_FETCH_MAX_RETRIES', 3))
+
+# 錯誤類別
+ERROR_NOT_FOUND = 'not_found'        # 404、已下市、查無數據：不重試
+ERROR_RATE_LIMITED = 'rate_limited'  # 429、API限制
+ERROR_TIMEOUT = 'timeout'            # 請求超時
+ERROR_EMPTY = 'empty'                # 回應成功但數據不可用
+ERROR_OTHER = 'other'                # 其他錯誤
+
+# 各錯誤類別的退避參數：(首次等待秒數, 最長等待秒數)
+RETRY_POLICIES = {
+    ERROR_RATE_LIMITED: (5.0, 60.0),
+    ERROR_TIMEOUT: (2.0, 20.0),
+    ERROR_EMPTY: (0.5, 5.0),
+    ERROR_OTHER: (1.0, 10.0),
+}
+
+
+def classify_error(error):
+    """依錯誤訊息判斷錯誤類別，規則與原本的字串比對相同"""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return ERROR_TIMEOUT
+
+    message = str(error)
+    lowered = message.lower()
+    if "404" in message or "delisted" in lowered or "no data found" in lowered:
+        return ERROR_NOT_FOUND
+    if "429" in message or "rate limit" in lowered or "too many requests" in lowered:
+        return ERROR_RATE_LIMITED
+    if "timeout" in lowered or "timed out" in lowered:
+        return ERROR_TIMEOUT
+    return ERROR_OTHER
+
+
+def backoff_delay(error_class, attempt, rng=random):
+    """第 attempt 次失敗後的等待秒數（指數退避，抖動範圍為 50%~100%）"""
+    base, cap = RETRY_POLICIES.get(error_class, RETRY_POLICIES[ERROR_OTHER])
+    delay = min(cap, base * (2 ** attempt))
+    return delay * (0.5 + rng.random() * 0.5)
+
+
+class EmptyDataError(Exception):
+    """回應成功但數據未通過檢查"""
+
+
+class FetchResult:
+    """單一請求的結果"""
+
+    __slots__ = ('key', 'data', 'error', 'error_class', 'attempts')
+
+    def __init__(self, key, data=None, error=None, error_class=None, attempts=0):
+        self.key = key
+        self.data = data
+        self.error = error
+        self.error_class = error_class
+        self.attempts = attempts
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def run_sync(coro):
+    """
+    在同步程式中執行協程
+    若目前執行緒已有事件迴圈（例如 FastAPI 的 async 端點），改在獨立執行緒中執行
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+
+    def runner():
+        try:
+            result['value'] = asyncio.run(coro)
+        except BaseException as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+
+class AsyncFetcher:
+    """
+    有上限的並行請求執行器
+    - 最多 concurrency 個請求同時進行
+    - 每次嘗試前向共用的令牌桶取得令牌
+    - 阻塞式的 yfinance 呼叫在執行緒中執行，不阻塞事件迴圈
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, max_retries=DEFAULT_MAX_RETRIES,
+                 rate_limiter=None, verbose=True):
+        self.concurrency = max(1, int(concurrency))
+        self.max_retries = max(1, int(max_retries))
+        self.rate_limiter = rate_limiter or get_yahoo_rate_limiter()
+        self.verbose = verbose
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    async def _acquire_token(self):
+        while not self.rate_limiter.try_acquire():
+            await asyncio.sleep(self.rate_limiter.wait_time())
+
+    def _log_retry(self, key, error_class, error, attempt, delay, max_retries):
+        if not self.verbose:
+            return
+        if error_class == ERROR_RATE_LIMITED:
+            print(f"  ⏳ {key}: API限制，{delay:.1f}秒後重試 ({attempt + 1}/{max_retries})")
+        elif error_class == ERROR_TIMEOUT:
+            print(f"  ⏳ {key}: 請求超時，{delay:.1f}秒後重試 ({attempt + 1}/{max_retries})")
+        else:
+            print(f"  🔄 {key}: {error}，{delay:.1f}秒後重試 ({attempt + 1}/{max_retries})")
+
+    async def _fetch(self, semaphore, key, func, args, kwargs, validate, max_retries):
+        result = FetchResult(key)
+        for attempt in range(max_retries):
+            result.attempts = attempt + 1
+            await self._acquire_token()
+            self._count('requests')
+            try:
+                async with semaphore:
+                    data = await asyncio.to_thread(func, *args, **kwargs)
+                problem = validate(data) if validate else None
+                if problem:
+                    raise EmptyDataError(problem)
+                result.data = data
+                result.error = None
+                result.error_class = None
+                return result
+            except Exception as e:
+                error_class = ERROR_EMPTY if isinstance(e, EmptyDataError) else classify_error(e)
+                result.error = e
+                result.error_class = error_class
+
+            if error_class == ERROR_NOT_FOUND or attempt == max_retries - 1:
+                break
+
+            delay = backoff_delay(error_class, attempt)
+            self._count('retries')
+            self._log_retry(key, error_class, result.error, attempt, delay, max_retries)
+            await asyncio.sleep(delay)
+
+        self._count('failures')
+        self._count(f"failures_{result.error_class}")
+        return result
+
+    async def fetch_many(self, calls, validate=None, max_retries=None):
+        """
+        並行執行多個請求
+        calls: {key: (func, args, kwargs)}，返回 {key: FetchResult}
+        validate(data) 返回非空字串時視為數據不可用並重試
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        max_retries = max(1, int(max_retries or self.max_retries))
+        keys = list(calls)
+        tasks = [
+            self._fetch(semaphore, key, calls[key][0], calls[key][1], calls[key][2], validate, max_retries)
+            for key in keys
+        ]
+        results = await asyncio.gather(*tasks)
+        return dict(zip(keys, results))
+
+    def run_many(self, calls, validate=None, max_retries=None):
+        """fetch_many 的同步版本"""
+        if not calls:
+            return {}
+        return run_sync(self.fetch_many(calls, validate=validate, max_retries=max_retries))
+
+    def call(self, func, *args, key=None, validate=None, **kwargs):
+        """
+        同步執行單一請求（含分類重試），成功返回數據，失敗時拋出最後一次的錯誤
+        """
+        key = key or getattr(func, '__name__', 'request')
+        result = self.run_many({key: (func, args, kwargs)}, validate=validate)[key]
+        if not result.ok:
+            raise result.error
+        return result.data
+
+
+def _create_fetcher():
+    if get_market_data_provider().rate_limited:
+        return AsyncFetcher()
+    return AsyncFetcher(rate_limiter=UnlimitedRateLimiter())
+
+
+_shared_fetcher = SharedInstance(_create_fetcher)
+
+
+def get_async_fetcher():
+    """全局共享的數據擷取器（共用 Yahoo Finance 令牌桶，本地數據來源不限流）"""
+    return _shared_fetcher.get()
@@ -1,7 +1,19 @@
 import requests
 import pandas as pd
 from datetime import datetime
+from pathlib import Path
 import json
+import os
+import threading
+import time
+
+from backend.path_manager import SharedInstance, get_cache_dir, write_json_atomic
+
+# 快取有效秒數，過期後先返回舊數據並在背景更新
+DEFAULT_CACHE_TTL = float(os.environ.get('BULLPS_FEAR_GREED_TTL', 900))
+CACHE_FILENAME = 'fear_greed.json'
+# 請求失敗後，至少間隔多少秒才再次嘗試
+RETRY_INTERVAL = 60
 
 class FearGreedIndex:
     """CNN恐懼貪婪指數分析工具"""
@@ -99,3 +111,133 @@ class FearGreedIndex:
         except Exception as e:
             # print(f"✗ 加載JSON失敗: {e}")
             return None
+
+
+def get_default_cache_path():
+    """獲取恐懼貪婪指數快取檔案路徑"""
+    return get_cache_dir('fear_greed') / CACHE_FILENAME
+
+
+class FearGreedCache:
+    """
+    恐懼貪婪指數的程序級快取
+    - 未過期：直接返回記憶體中的數據
+    - 已過期：立即返回上一次成功的數據，並在背景執行緒更新
+    - 歷史數據保存到檔案，每次更新時依日期增量合併
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_CACHE_TTL):
+        self.path = Path(path) if path else get_default_cache_path()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._current = None
+        self._history = {}  # {日期字串: {'score', 'rating', 'rating_cn'}}
+        self._fetched_at = 0
+        self._last_error = None
+        self._worker = None
+        self._load()
+
+    # --- 檔案讀寫 ---
+
+    def _load(self):
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._current = data.get('current')
+                # 舊版以完整時間為鍵，同一天保留最後一筆
+                self._history = {date[:10]: point for date, point in sorted(data.get('history', {}).items())}
+                self._fetched_at = data.get('fetched_at', 0)
+        except (json.JSONDecodeError, OSError):
+            self._current, self._history, self._fetched_at = None, {}, 0
+
+    def _save(self):
+        write_json_atomic(self.path, {
+            'current': self._current,
+            'history': self._history,
+            'fetched_at': self._fetched_at
+        }, '恐懼貪婪指數快取')
+
+    # --- 更新 ---
+
+    def refresh(self):
+        """向 CNN 請求最新數據並合併到歷史，成功返回 True；失敗時保留舊數據"""
+        with self._refresh_lock:
+            # 等待期間其他執行緒可能已完成更新
+            if self.is_fresh():
+                return True
+
+            fgi = FearGreedIndex()
+            if not fgi.fetch_data():
+                self._last_error = time.time()
+                return False
+
+            try:
+                current = fgi.get_current_index()
+                df = fgi.get_historical_data()
+            except (KeyError, TypeError, ValueError):
+                self._last_error = time.time()
+                return False
+
+            # 以日期為鍵：同一天的最新數值取代先前的數值
+            df = df.sort_values('date')
+            df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+            new_points = {
+                row['date']: {'score': row['score'], 'rating': row['rating'], 'rating_cn': row['rating_cn']}
+                for row in df.to_dict(orient='records')
+            }
+
+            with self._lock:
+                self._history.update(new_points)
+                self._current = current
+                self._fetched_at = time.time()
+                self._last_error = None
+                self._save()
+            return True
+
+    def _schedule_refresh(self):
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self.refresh, daemon=True)
+            self._worker.start()
+
+    # --- 公開介面 ---
+
+    def is_fresh(self):
+        return self._current is not None and time.time() - self._fetched_at < self.ttl
+
+    def get_payload(self):
+        """
+        返回 {'current', 'historical', 'cached_at', 'stale'}，沒有任何可用數據時返回 None
+        只有在從未成功取得數據時才會同步等待 CNN
+        """
+        recently_failed = self._last_error is not None and time.time() - self._last_error < RETRY_INTERVAL
+        if self._current is None:
+            if not recently_failed:
+                self.refresh()
+        elif not self.is_fresh() and not recently_failed:
+            self._schedule_refresh()
+
+        with self._lock:
+            if self._current is None:
+                return None
+            historical = [
+                {'date': date, **point}
+                for date, point in sorted(self._history.items())
+            ]
+            return {
+                'current': self._current,
+                'historical': historical,
+                'cached_at': datetime.fromtimestamp(self._fetched_at).strftime('%Y-%m-%dT%H:%M:%S'),
+                'stale': time.time() - self._fetched_at >= self.ttl
+            }
+
+
+_shared_cache = SharedInstance(FearGreedCache)
+
+
+def get_fear_greed_cache():
+    """全局共享的恐懼貪婪指數快取"""
+    return _shared_cache.get()
@@ -19,6 +19,7 @@ from pathlib import Path
 from datetime import datetime
 import os
 import logging
+import threading
 import time
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -36,6 +37,13 @@ async def lifespan(app: FastAPI):
     scheduler.start()
     logger.info("Scheduler started")
 
+    # 在背景預熱恐懼貪婪指數快取，第一次開啟儀表板時不需等待 CNN
+    try:
+        from backend.fear_greed_index import get_fear_greed_cache
+        threading.Thread(target=get_fear_greed_cache().refresh, daemon=True).start()
+    except Exception as e:
+        logger.warning(f"預熱恐懼貪婪指數快取失敗: {e}")
+
     yield
 
     # 關閉時執行
@@ -827,6 +835,78 @@ def export_trade_history():
             content={"error": f"匯出失敗: {str(e)}"}
         )
 
+@app.get("/api/symbol-metadata")
+def get_symbol_metadata(symbols: str = ""):
+    """
+    批量查詢股票基本資料（名稱、市場）
+    symbols 以逗號分隔；未指定時返回觀察名單中的所有股票
+    """
+    try:
+        from symbol_metadata import get_symbol_metadata_store
+
+        symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+        if not symbol_list:
+            watchlist_path = BASE_DIR / "stock_watchlist.json"
+            watchlist = json.loads(watchlist_path.read_text(encoding='utf-8'))
+            symbol_list = watchlist.get("stocks", [])
+
+        # 不阻塞請求：缺少的股票先返回預設值，由背景執行緒補齊
+        metadata = get_symbol_metadata_store().get_many(symbol_list, block=False)
+        return {"count": len(metadata), "metadata": metadata}
+
+    except Exception as e:
+        logger.error(f"查詢股票基本資料失敗: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"查詢股票基本資料失敗: {str(e)}"}
+        )
+
+@app.get("/api/negative-cache")
+def get_negative_cache_entries(include_expired: bool = False):
+    """
+    查詢失敗股票快取（已下市、無數據、超時等），
+    watchlist_blocked 列出觀察名單中目前被跳過的股票，方便整理觀察名單
+    """
+    try:
+        from negative_cache import get_negative_cache
+
+        negative_cache = get_negative_cache()
+        entries = negative_cache.entries(include_expired=include_expired)
+
+        watchlist_path = BASE_DIR / "stock_watchlist.json"
+        watchlist = json.loads(watchlist_path.read_text(encoding='utf-8')).get("stocks", [])
+        watchlist_blocked = [s for s in watchlist if negative_cache.is_blocked(s)]
+
+        return {"count": len(entries), "entries": entries, "watchlist_blocked": watchlist_blocked}
+
+    except Exception as e:
+        logger.error(f"查詢失敗股票快取失敗: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"查詢失敗股票快取失敗: {str(e)}"}
+        )
+
+@app.post("/api/negative-cache/prune")
+def prune_negative_cache(symbols: str = ""):
+    """
+    清理失敗股票快取
+    symbols 以逗號分隔時移除這些股票的記錄（下次分析會重新嘗試），未指定時只移除已到期的記錄
+    """
+    try:
+        from negative_cache import get_negative_cache
+
+        symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+        removed = get_negative_cache().prune(symbol_list or None)
+        logger.info(f"已清理失敗股票快取: {removed}")
+        return {"removed": removed, "count": len(removed)}
+
+    except Exception as e:
+        logger.error(f"清理失敗股票快取失敗: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"清理失敗股票快取失敗: {str(e)}"}
+        )
+
 # 回測狀態管理
 backtest_status = {
     "is_running": False,
@@ -838,33 +918,22 @@ backtest_status = {
 }
 
 @app.get("/api/fear-greed-index")
-async def get_fear_greed_index_data():
+def get_fear_greed_index_data():
     """
     獲取CNN恐懼貪婪指數的歷史數據
+    由程序級快取提供，過期時先返回上一次成功的數據並在背景更新，CNN 緩慢或中斷時不阻塞請求
     """
     try:
-        from backend.fear_greed_index import FearGreedIndex
-        fgi = FearGreedIndex()
-        # The fetch_data is called inside get_historical_data if data is not present
-        df = fgi.get_historical_data()
+        from backend.fear_greed_index import get_fear_greed_cache
+        payload = get_fear_greed_cache().get_payload()
 
-        if df.empty:
+        if payload is None:
             return JSONResponse(
                 status_code=404,
                 content={"error": "無法獲取恐懼貪婪指數數據，請稍後再試。"}
             )
-        
-        # Convert dataframe to a list of dicts for JSON response
-        # The 'date' column is a datetime object, so convert it to ISO 8601 string format
-        df['date'] = df['date'].dt.strftime('%Y-%m-%dT%H:%M:%S')
-        historical_data = df.to_dict(orient='records')
-        
-        current_index = fgi.get_current_index()
 
-        return {
-            "current": current_index,
-            "historical": historical_data
-        }
+        return payload
         
     except Exception as e:
         logger.error(f"獲取恐懼貪婪指數時發生錯誤: {e}")
@@ -957,8 +1026,8 @@ def run_backtest_task(symbol: str, start_date: str, end_date: str):
         update_backtest_status("正在初始化回測環境...", 5, "初始化", "開始回測程序")
 
         # 導入必要的模組
-        import yfinance as yf
         import backtester
+        from market_data_cache import get_market_data_cache
         import pandas as pd
         import time
 
@@ -966,7 +1035,7 @@ def run_backtest_task(symbol: str, start_date: str, end_date: str):
 
         # 驗證股票代號並下載數據
         try:
-            stock_data = yf.download(symbol, start=start_date, end=end_date, progress=False, auto_adjust=True)
+            stock_data = get_market_data_cache().get_history(symbol, start=start_date, end=end_date)
             if stock_data.empty:
                 raise ValueError(f"無法獲取股票 {symbol} 的數據")
 
@@ -7,6 +7,8 @@
 
 import os
 import json
+import tempfile
+import threading
 from pathlib import Path
 
 class PathManager:
@@ -199,6 +201,15 @@ class PathManager:
     def get_trade_history_path(self):
         """獲取交易歷史文件路徑"""
         return self._paths["trade_history.json"]
+
+    def get_cache_dir(self, name):
+        """獲取指定快取子目錄路徑，不存在時自動創建"""
+        cache_dir = self.data_dir / "cache" / name
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+        except (PermissionError, OSError) as e:
+            print(f"⚠️ 創建快取目錄失敗 {cache_dir}: {e}")
+        return cache_dir
     
     def sync_files(self):
         """同步文件到所有可能的位置（用於兼容性）"""
@@ -236,6 +247,66 @@ def get_monitored_stocks_path():
 def get_trade_history_path():
     return path_manager.get_trade_history_path()
 
+def get_cache_dir(name):
+    return path_manager.get_cache_dir(name)
+
+def get_data_subdir(name):
+    """數據目錄下的子目錄路徑（不自動創建）"""
+    return path_manager.data_dir / name
+
+# --- 快取檔案與共享實例的共用工具 ---
+
+def write_atomic(path, write, description, binary=False):
+    """
+    先寫暫存檔再替換，避免寫入中斷造成損壞
+    每次寫入使用各自的暫存檔，同時寫入同一個檔案時不會互相覆蓋暫存檔
+    write(f) 寫入內容；無法寫入時印出警告並返回 False
+    """
+    path = Path(path)
+    tmp_path = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        options = {'mode': 'wb'} if binary else {'mode': 'w', 'encoding': 'utf-8'}
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp',
+                                         delete=False, **options) as f:
+            tmp_path = f.name
+            write(f)
+        os.replace(tmp_path, path)
+        return True
+    except (PermissionError, OSError) as e:
+        print(f"⚠️ 無法寫入{description}: {e}")
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        return False
+
+def write_json_atomic(path, data, description, **dump_options):
+    """以 write_atomic 寫入 JSON（保留中文字元）"""
+    return write_atomic(path, lambda f: json.dump(data, f, ensure_ascii=False, **dump_options), description)
+
+class SharedInstance:
+    """
+    全局共享實例：第一次 get() 時以 factory() 建立（執行緒安全）
+    set() 替換實例（離線重播、測試時使用）
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._instance is None:
+                self._instance = self._factory()
+            return self._instance
+
+    def set(self, instance):
+        with self._lock:
+            self._instance = instance
+
 def sync_all_files():
     """同步所有文件到兼容位置"""
     path_manager.sync_files()
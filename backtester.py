@@ -6,7 +6,6 @@
 
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from datetime import datetime, timedelta
 import json
 import warnings
@@ -16,6 +15,16 @@ import pytz
 
 # 複用現有的分析器
 from integrated_stock_analyzer import IntegratedStockAnalyzer
+# 本地K線快取
+from market_data_cache import get_market_data_cache, SymbolDataContext
+# 每日市場情緒序列
+from market_sentiment import get_market_sentiment_engine
+# 完整歷史只計算一次的SAR
+from sar_engine import PrefixSAR
+# 每支股票、每個模擬日只分析一次
+from symbol_analysis import SymbolAnalysis
+# 持倉的最新一列指標，每個模擬日只加入一根新K線
+from indicator_state import IndicatorState
 # 複用出場評估邏輯
 from backend.portfolio_manager import evaluate_exit_confidence, load_json_file, ANALYSIS_RESULT_FILE
 
@@ -47,9 +56,11 @@ def preload_data(symbols, start, end):
     preload_start_date = (pd.to_datetime(start) - timedelta(days=90)).strftime('%Y-%m-%d')
     
     all_data = {}
-    df_all = yf.download(symbols, start=preload_start_date, end=end, progress=True, auto_adjust=True)
+    # 只下載快取中缺少的K線，已快取的歷史直接從本地讀取
+    valid_symbols = [s for s in symbols if s and s not in ['UNKNOWN', '$UNKNOWN'] and not s.startswith('$')]
+    histories = get_market_data_cache().get_histories(valid_symbols, start=preload_start_date, end=end, progress=True)
     
-    if df_all.empty:
+    if not histories:
         print("[ERROR] 下載數據失敗，請檢查網路連線或股票代號。")
         return None
 
@@ -58,16 +69,11 @@ def preload_data(symbols, start, end):
     for symbol in symbols:
         try:
             # 跳過無效的股票代號
-            if not symbol or symbol in ['UNKNOWN', '$UNKNOWN'] or symbol.startswith('$'):
+            if symbol not in valid_symbols:
                 failed_symbols.append(symbol)
                 continue
 
-            df_symbol = None
-
-            if isinstance(df_all.columns, pd.MultiIndex) and symbol in df_all.columns.get_level_values(1):
-                df_symbol = df_all.xs(symbol, level=1, axis=1).copy()
-            elif symbol in df_all.columns:
-                df_symbol = df_all.copy()
+            df_symbol = histories.get(symbol)
 
             if df_symbol is not None:
                 df_symbol.dropna(subset=['Open', 'High', 'Low', 'Close'], inplace=True)
@@ -110,10 +116,55 @@ class Backtester:
         self.all_data = all_historical_data
         self.portfolio = {}
         self.trade_log = []
+        self.sar_history = {}  # {symbol: PrefixSAR}
+        self.analyses = {}  # {symbol: SymbolAnalysis}，只保留最近一個模擬日
+        self.indicator_states = {}  # {symbol: IndicatorState}，持倉出場檢查用的增量指標
         
-        spy_data = yf.download('SPY', start=START_DATE, end=END_DATE, progress=False, auto_adjust=True)
+        spy_data = get_market_data_cache().get_history('SPY', start=START_DATE, end=END_DATE)
         self.trading_days = spy_data.index
 
+        # 預先計算回測期間每日的市場情緒，模擬過程中不再下載
+        self.sentiment_engine = get_market_sentiment_engine()
+        self.sentiment_engine.load(start=START_DATE)
+
+    def prefix_sar(self, symbol, data_slice):
+        """取得模擬日K線切片的SAR，每支股票只對完整歷史計算一次SAR遞迴"""
+        prefix_sar = self.sar_history.get(symbol)
+        if prefix_sar is None:
+            prefix_sar = PrefixSAR(self.all_data[symbol])
+            self.sar_history[symbol] = prefix_sar
+        return prefix_sar.prefix(len(data_slice))
+
+    def latest_indicators(self, symbol, data_slice):
+        """
+        模擬日K線切片的最新一列指標（同 calculate_technical_indicators(data_slice).iloc[-1]）
+        每支股票保存增量指標狀態，只加入上次之後的新K線，不必為了出場檢查重新計算整段歷史
+        """
+        state = self.indicator_states.get(symbol)
+        if state is None or state.count > len(data_slice):
+            state = IndicatorState(symbol)
+            self.indicator_states[symbol] = state
+        if state.count < len(data_slice):
+            state.update_many(data_slice.iloc[state.count:])
+        return state.latest
+
+    def analysis_for(self, symbol, data_slice):
+        """
+        模擬日K線切片的單次分析；同一支股票、同一模擬日的出場與進場檢查共用同一個 SymbolAnalysis
+        多時間框架分析使用截至模擬日的日線上下文，不讀取快取中模擬日之後的K線
+        """
+        as_of = data_slice.index[-1]
+        analysis = self.analyses.get(symbol)
+        if analysis is None or analysis.as_of != as_of or len(analysis.frame) != len(data_slice):
+            self.analyzer.symbol_contexts[symbol] = SymbolDataContext(symbol, data_slice, now=as_of)
+            analysis = SymbolAnalysis(self.analyzer, symbol, data_slice, sar=self.prefix_sar(symbol, data_slice))
+            self.analyses[symbol] = analysis
+        return analysis
+
+    def update_market_sentiment(self, current_day):
+        """將分析器的市場情緒設為模擬日當天收盤時的值"""
+        self.analyzer.market_sentiment = self.sentiment_engine.as_of(current_day)
+
     def run(self):
         print(f"[INFO] 開始回測，期間: {START_DATE} to {END_DATE}")
         
@@ -133,6 +184,8 @@ class Backtester:
         if not self.portfolio:
             return
 
+        self.update_market_sentiment(current_day)
+
         symbols_to_sell = []
         for symbol, trade_info in self.portfolio.items():
             # 確保至少持有一個交易日
@@ -145,13 +198,10 @@ class Backtester:
                 continue
 
             # --- 使用增強的 Parabolic SAR 作為移動停損 ---
-            # 必須先計算包含當前日在內的所有指標
-            df_with_indicators = self.analyzer.calculate_technical_indicators(data_slice)
-            if df_with_indicators is None or df_with_indicators.empty:
-                continue
-
-            current_price = df_with_indicators['Close'].iloc[-1]
-            current_sar = df_with_indicators['SAR'].iloc[-1]
+            # 包含當前日在內的最新一列指標（增量更新，與完整指標表的最後一列相同）
+            latest_indicators = self.latest_indicators(symbol, data_slice)
+            current_price = latest_indicators['Close']
+            current_sar = latest_indicators['SAR']
 
             # 1. 檢查數據有效性
             if pd.isna(current_price) or pd.isna(current_sar) or current_sar is None:
@@ -216,6 +266,8 @@ class Backtester:
             self.execute_sell(symbol, next_day, exit_price)
 
     def check_and_execute_entries(self, current_day, next_day):
+        self.update_market_sentiment(current_day)
+
         for symbol in self.symbols:
             if symbol in self.portfolio:
                 continue
@@ -234,11 +286,8 @@ class Backtester:
             composite_score = analysis_result.get('composite_score', 0)
             confidence_score = analysis_result.get('confidence_score', 0)
 
-            # 動態進場閾值調整
-            market_sentiment = getattr(self.analyzer, 'market_sentiment', None)
-            if market_sentiment is None:
-                market_sentiment = self.analyzer.analyze_market_sentiment()
-                self.analyzer.market_sentiment = market_sentiment
+            # 動態進場閾值調整（使用模擬日當天的市場情緒）
+            market_sentiment = self.analyzer.market_sentiment
 
             # 根據市場情緒調整閾值
             market_score = market_sentiment['score']
@@ -272,16 +321,15 @@ class Backtester:
                 self.execute_buy(symbol, next_day, entry_price, analysis_result)
 
     def run_analysis_on_slice(self, symbol, data_slice):
-        df = self.analyzer.calculate_technical_indicators(data_slice)
+        analysis = self.analysis_for(symbol, data_slice)
+        df = analysis.frame
         if df is None: return None
 
-        signals = self.analyzer.detect_bullish_signals(df)
-        if not signals: return None
-        
-        latest_signal = signals[-1]
+        latest_signal = analysis.latest_signal
+        if latest_signal is None: return None
 
-        long_signal_price, long_signal_confidence = self.analyzer.calculate_long_signal_price(df)
-        entry_advice, confidence_score, confidence_level, confidence_factors = self.analyzer.assess_entry_opportunity(df)
+        long_signal_price, long_signal_confidence = analysis.long_signal
+        entry_advice, confidence_score, confidence_level, confidence_factors = analysis.entry
         
         current_price = df['Close'].iloc[-1]
         distance_to_signal = ((current_price - long_signal_price) / long_signal_price) * 100
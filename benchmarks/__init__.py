@@ -0,0 +1,12 @@
+"""
+指標與訊號引擎的黃金輸出回歸與效能基準
+
+    python -m benchmarks                    # 比對黃金輸出並執行計時，輸出 benchmark_report.json
+    python -m benchmarks --update-golden    # 輸出確定改變時重新產生黃金檔
+    python -m benchmarks --quick            # 較短的序列與較小的股票池
+
+synthetic 產生固定亂數種子的趨勢、盤整、崩跌行情；golden 以這些K線固定
+calculate_technical_indicators、calculate_sar、detect_bullish_signals、
+calculate_long_signal_price 與 assess_entry_opportunity 的輸出（baseline 由最佳化之前的基準版本產生黃金檔）；timing 量測不同序列長度與股票池大小的時間
+另以 engine.verify_single_pass 確認單次分析的每個項目只計算一次
+"""
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+python -m benchmarks：比對黃金輸出、檢查單次分析的計算次數、執行效能基準並輸出 JSON 報告
+黃金輸出不一致（或尚未產生）或有項目重複計算時以結束碼 1 結束
+"""
+
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# 以 python -m benchmarks 執行時，讓頂層分析模組可以匯入
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.engine import verify_single_pass
+from benchmarks.golden import check_golden, write_golden
+from benchmarks.timing import (QUICK_SERIES_LENGTHS, QUICK_UNIVERSE_SIZES, SERIES_LENGTHS, UNIVERSE_SIZES,
+                               time_series_functions, time_universe)
+
+
+def environment():
+    from rolling_primitives import NUMBA_AVAILABLE
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'jit': NUMBA_AVAILABLE,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='指標與訊號引擎的黃金輸出回歸與效能基準')
+    parser.add_argument('--update-golden', action='store_true', help='重新產生黃金檔（輸出確定改變時使用）')
+    parser.add_argument('--quick', action='store_true', help='使用較短的序列與較小的股票池')
+    parser.add_argument('--skip-timing', action='store_true', help='只比對黃金輸出')
+    parser.add_argument('--repeat', type=int, default=5, help='每個計時項目的執行次數')
+    parser.add_argument('--report', default='benchmark_report.json', help='JSON 報告的輸出路徑')
+    args = parser.parse_args(argv)
+
+    if args.update_golden:
+        write_golden()
+
+    print("🔄 比對黃金輸出...")
+    golden = check_golden()
+    for result in golden:
+        if result['status'] == 'match':
+            print(f"  ✅ {result['case']}")
+        elif result['status'] == 'missing':
+            print(f"  ⚠️ {result['case']}: 尚未產生黃金檔（python -m benchmarks --update-golden）")
+        else:
+            print(f"  ❌ {result['case']}: {len(result['differences'])} 處不同")
+            for difference in result['differences'][:10]:
+                print(f"      {difference}")
+
+    print("🔄 檢查單次分析的計算次數...")
+    single_pass = verify_single_pass()
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'golden': golden,
+        'golden_ok': all(result['status'] == 'match' for result in golden),
+        'single_pass': single_pass,
+        'single_pass_ok': all(count == 1 for count in single_pass.values()),
+    }
+
+    if not args.skip_timing:
+        print("⏳ 單一股票計時...")
+        series = time_series_functions(QUICK_SERIES_LENGTHS if args.quick else SERIES_LENGTHS, repeat=args.repeat)
+        for row in series:
+            print(f"  {row['function']:>32} × {row['length']:>4} 根: {row['best_ms']:8.2f} ms")
+        print("⏳ 股票池計時...")
+        universe = time_universe(QUICK_UNIVERSE_SIZES if args.quick else UNIVERSE_SIZES)
+        for row in universe:
+            print(f"  {row['symbols']:>4} 支 × {row['days']} 日: 逐支 {row['per_symbol_ms']:.1f} ms，"
+                  f"橫截面 {row['panel_ms']:.1f} ms ({row['speedup']:.1f}x)")
+        report['series'] = series
+        report['universe'] = universe
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📄 報告已寫入 {args.report}")
+    return 0 if report['golden_ok'] and report['single_pass_ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+由基準版本產生黃金檔
+黃金檔必須來自最佳化之前的分析引擎，而不是目前的程式碼（否則比對只能證明程式碼與自己相同）。
+先取出基準版本的工作目錄，再以其分析引擎執行各黃金案例：
+
+    git worktree add /tmp/bullps-baseline 8b2ec4c
+    python -m benchmarks.baseline /tmp/bullps-baseline
+
+基準版本的多時間框架分析直接以 yfinance 下載日線、週線與月線；這裡以假的 Ticker 提供
+與目前引擎相同的輸入（案例的日線，以及由同一份日線合成的週線、月線），不連網。
+基準版本在獨立的子程序中執行，避免與目前的同名模組混用。
+
+    python -m benchmarks.baseline /tmp/bullps-baseline --cross-check
+
+以目前的指標表執行基準版本的訊號、抄底價位、進場評估與 SAR 信號，確認與黃金檔不同之處
+只來自指標表本身（刻意改變的欄位），其餘函數的輸出與基準版本相同
+"""
+
+import contextlib
+import io
+import json
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 產生黃金檔的基準版本
+BASELINE_COMMIT = '8b2ec4c'
+
+
+def capture_timeframes(name):
+    """目前引擎在案例 name 的多時間框架分析中使用的 {'1d', '1wk', '1mo': K線}"""
+    from benchmarks.engine import offline_analyzer
+    from benchmarks.golden import case_data
+
+    daily = case_data(name)
+    analyzer = offline_analyzer(daily, f'SYN_{name.upper()}')
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames = analyzer.mtf_analyzer.get_multi_timeframe_data(f'SYN_{name.upper()}', daily_data=daily)
+    if frames is None:
+        return {'1d': daily}
+    return {'1d': frames['daily'], '1wk': frames['weekly'], '1mo': frames['monthly']}
+
+
+def _run_baseline_case(baseline_dir, name, timeframes, indicators=None):
+    """
+    （子程序內）以基準版本的分析引擎執行案例 name，返回 {函數名稱: 指紋化輸出}
+    indicators 為目前引擎的指標表時，其餘函數改以該指標表執行
+    """
+    sys.path.insert(0, str(baseline_dir))
+
+    import pandas as pd
+    import yfinance
+
+    class OfflineTicker:
+        """只提供案例K線的 yfinance.Ticker"""
+
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def history(self, period=None, interval='1d', **kwargs):
+            bars = timeframes.get(interval)
+            return bars.copy() if bars is not None else pd.DataFrame()
+
+    yfinance.Ticker = OfflineTicker
+
+    from enhanced_confirmation_system import EnhancedConfirmationSystem
+    from integrated_stock_analyzer import IntegratedStockAnalyzer
+    from multi_timeframe_analyzer import MultiTimeframeAnalyzer
+
+    from benchmarks.engine import NEUTRAL_SENTIMENT, ENGINE_FUNCTIONS
+    from benchmarks.golden import case_data, fingerprint
+
+    daily = case_data(name)
+    analyzer = IntegratedStockAnalyzer.__new__(IntegratedStockAnalyzer)
+    analyzer.market_sentiment = dict(NEUTRAL_SENTIMENT)
+    analyzer.confirmation_system = EnhancedConfirmationSystem()
+    analyzer.mtf_analyzer = MultiTimeframeAnalyzer()
+    analyzer.current_symbol = f'SYN_{name.upper()}'
+
+    outputs = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        if indicators is None:
+            indicators = analyzer.calculate_technical_indicators(daily)
+        outputs['calculate_technical_indicators'] = indicators
+        outputs['calculate_sar'] = analyzer.calculate_sar(daily)
+        outputs['calculate_enhanced_sar_signals'] = analyzer.calculate_enhanced_sar_signals(indicators)
+        outputs['assess_entry_opportunity'] = analyzer.assess_entry_opportunity(indicators)
+        outputs['detect_bullish_signals'] = analyzer.detect_bullish_signals(indicators)
+        outputs['calculate_long_signal_price'] = analyzer.calculate_long_signal_price(indicators)
+    return {function: fingerprint(outputs[function]) for function in ENGINE_FUNCTIONS}
+
+
+def baseline_outputs(baseline_dir, name, indicators=None):
+    """在子程序中以基準版本執行案例 name"""
+    payload = pickle.dumps((str(baseline_dir), name, capture_timeframes(name), indicators))
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.baseline', '--child'], input=payload,
+                            capture_output=True, cwd=ROOT, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"基準版本執行 {name} 失敗:\n{result.stderr.decode('utf-8', 'replace')}")
+    return pickle.loads(result.stdout)
+
+
+def write_baseline_golden(baseline_dir):
+    """以基準版本重新產生所有黃金檔"""
+    from benchmarks.engine import to_jsonable
+    from benchmarks.golden import GOLDEN_CASES, GOLDEN_DIR, golden_path
+
+    GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+    for name, params in GOLDEN_CASES:
+        payload = {'case': name, 'params': to_jsonable(params),
+                   'outputs': json.loads(json.dumps(baseline_outputs(baseline_dir, name)))}
+        with open(golden_path(name), 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"✅ 已由基準版本 {BASELINE_COMMIT} 產生黃金檔: {golden_path(name).name}")
+
+
+def cross_check(baseline_dir):
+    """以目前的指標表執行基準版本，返回指標表以外的函數是否都與目前的輸出相同"""
+    from benchmarks.engine import ENGINE_FUNCTIONS, run_engine
+    from benchmarks.golden import GOLDEN_CASES, case_data, diff, fingerprint
+
+    downstream = [function for function in ENGINE_FUNCTIONS
+                  if function not in ('calculate_technical_indicators', 'calculate_sar')]
+    identical = True
+    for name, _ in GOLDEN_CASES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            current = run_engine(case_data(name), symbol=f'SYN_{name.upper()}')
+        expected = json.loads(json.dumps(
+            baseline_outputs(baseline_dir, name, indicators=current['calculate_technical_indicators'])))
+        actual = json.loads(json.dumps({function: fingerprint(current[function]) for function in downstream}))
+        differences = [d for function in downstream for d in diff(expected[function], actual[function], function)]
+        identical = identical and not differences
+        print(f"  {'✅' if not differences else '❌'} {name}: 以相同指標表執行時"
+              f"{'與基準版本相同' if not differences else f'{len(differences)} 處不同'}")
+        for difference in differences[:10]:
+            print(f"      {difference}")
+    return identical
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv == ['--child']:
+        arguments = pickle.loads(sys.stdin.buffer.read())
+        output = sys.stdout.buffer
+        with contextlib.redirect_stdout(sys.stderr):  # 基準版本匯入時的訊息不得混入結果
+            outputs = _run_baseline_case(*arguments)
+        output.write(pickle.dumps(outputs))
+        return 0
+    cross = '--cross-check' in argv
+    paths = [arg for arg in argv if arg != '--cross-check']
+    if len(paths) != 1 or not (Path(paths[0]) / 'integrated_stock_analyzer.py').exists():
+        print(f"用法: python -m benchmarks.baseline <基準版本 {BASELINE_COMMIT} 的工作目錄> [--cross-check]")
+        return 2
+    if cross:
+        return 0 if cross_check(Path(paths[0]).resolve()) else 1
+    write_baseline_golden(Path(paths[0]).resolve())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+個別元件的驗證與基準
+以 benchmarks.synthetic 的合成K線比較各元件與原本實作的結果與速度：
+
+    python -m benchmarks.components            # 執行全部
+    python -m benchmarks.components sar        # 只執行指定項目
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# 以 python -m benchmarks.components 執行時，讓頂層分析模組可以匯入
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from benchmarks.synthetic import generate_ohlcv, generate_universe
+from benchmarks.timing import _best_of
+
+# 長序列只使用上漲與盤整行情，避免連續崩跌使價格趨近 0
+LONG_REGIMES = ('trend', 'range')
+
+
+# --- Parabolic SAR ---
+
+def legacy_calculate_sar(df, af, max_af):
+    """原本逐列 .iloc 的 SAR 實作，作為 sar_engine 的比對基準"""
+    from sar_engine import _finalize
+
+    initial_trend = 1 if df['Close'].iloc[4] > df['Close'].iloc[0] else -1
+    sar = []
+    if initial_trend == 1:
+        sar.append(df['Low'].iloc[:5].min())
+        ep = df['High'].iloc[:5].max()
+    else:
+        sar.append(df['High'].iloc[:5].max())
+        ep = df['Low'].iloc[:5].min()
+    trend = initial_trend
+    af_val = af
+    for i in range(1, len(df)):
+        prev_sar = sar[-1]
+        if trend == 1:
+            sar_val = prev_sar + af_val * (ep - prev_sar)
+            if i >= 2:
+                sar_val = min(sar_val, df['Low'].iloc[i-1], df['Low'].iloc[i-2])
+            if df['Low'].iloc[i] < sar_val:
+                trend = -1
+                sar_val = ep
+                ep = df['Low'].iloc[i]
+                af_val = af
+            elif df['High'].iloc[i] > ep:
+                ep = df['High'].iloc[i]
+                af_val = min(af_val + af, max_af)
+        else:
+            sar_val = prev_sar + af_val * (ep - prev_sar)
+            if i >= 2:
+                sar_val = max(sar_val, df['High'].iloc[i-1], df['High'].iloc[i-2])
+            if df['High'].iloc[i] > sar_val:
+                trend = 1
+                sar_val = ep
+                ep = df['High'].iloc[i]
+                af_val = af
+            elif df['Low'].iloc[i] < ep:
+                ep = df['Low'].iloc[i]
+                af_val = min(af_val + af, max_af)
+        sar.append(sar_val)
+    return _finalize(np.array(sar), df)
+
+
+def benchmark_sar():
+    """比較原本的 .iloc 實作、NumPy 版本與 JIT 版本的速度，並確認結果逐位元相同；返回不一致數量"""
+    from sar_engine import NUMBA_AVAILABLE, PrefixSAR, calculate_sar, sar_volatility, select_sar_params
+
+    print("=== Parabolic SAR ===")
+    print(f"numba JIT: {'可用' if NUMBA_AVAILABLE else '不可用'}")
+    mismatched = 0
+
+    for n in (250, 5000):
+        df = generate_ohlcv(n, seed=0, regimes=LONG_REGIMES)
+        af, max_af = select_sar_params(sar_volatility(df['Close']))
+        expected = legacy_calculate_sar(df, af, max_af)
+
+        implementations = [('NumPy', False)]
+        if NUMBA_AVAILABLE:
+            calculate_sar(df, use_jit=True)  # 預先編譯
+            implementations.append(('JIT', True))
+
+        repeat = 20 if n <= 250 else 3
+        legacy_time, _ = _best_of(lambda i: legacy_calculate_sar(df, af, max_af), repeat)
+        print(f"\n{n} 根K線:")
+        print(f"  .iloc 迴圈: {legacy_time * 1000:8.2f} ms")
+
+        for name, use_jit in implementations:
+            result = calculate_sar(df, use_jit=use_jit)
+            identical = np.array_equal(result.values, expected.values, equal_nan=True)
+            mismatched += not identical
+            elapsed, _ = _best_of(lambda i: calculate_sar(df, use_jit=use_jit), repeat * 5)
+            print(f"  {name:<10}: {elapsed * 1000:8.2f} ms  (x{legacy_time / elapsed:6.1f})  "
+                  f"{'✅ 結果相同' if identical else '❌ 結果不同'}")
+
+    # 回測情境：每個模擬日重新計算前 n 根K線的 SAR
+    df = generate_ohlcv(750, seed=1, regimes=LONG_REGIMES)
+    days = range(500, 750)
+    start = time.perf_counter()
+    expected = [calculate_sar(df.iloc[:n]) for n in days]
+    per_day_time = time.perf_counter() - start
+    start = time.perf_counter()
+    prefix_sar = PrefixSAR(df)
+    results = [prefix_sar.prefix(n) for n in days]
+    prefix_time = time.perf_counter() - start
+    identical = all(np.array_equal(a.values, b.values, equal_nan=True) for a, b in zip(results, expected))
+    mismatched += not identical
+    print(f"\n回測 {len(days)} 個模擬日（750 根K線）:")
+    print(f"  每日重新計算: {per_day_time * 1000:8.2f} ms")
+    print(f"  PrefixSAR   : {prefix_time * 1000:8.2f} ms  {'✅ 結果相同' if identical else '❌ 結果不同'}")
+    return mismatched
+
+
+# --- IndicatorFrame ---
+
+def benchmark_indicator_frame(days=500, repeat=20):
+    """比較逐欄新增 DataFrame 與預先配置緩衝區的計算時間與記憶體峰值；返回不一致數量"""
+    import tracemalloc
+
+    from indicator_registry import compute, compute_frame
+
+    print("=== IndicatorFrame ===")
+    data = generate_ohlcv(days, seed=7)
+    expected = compute(data)
+    frame = compute_frame(data)
+    actual = frame.to_pandas()
+    same_columns = list(actual.columns) == list(expected.columns)
+    identical = same_columns and np.array_equal(actual.to_numpy(), expected.to_numpy(dtype=np.float64),
+                                                equal_nan=True)
+    print(f"{'✅' if identical else '❌'} 欄位一致: {same_columns}，數值{'相同' if identical else '不同'}")
+
+    for label, func in (('DataFrame', compute), ('IndicatorFrame', compute_frame)):
+        _, elapsed = _best_of(lambda i: func(data), repeat)
+
+        tracemalloc.start()
+        result = func(data)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+        print(f"{label:>15}: {elapsed * 1000:.2f} ms，結果佔用 {retained / 1024:.0f} KiB，"
+              f"記憶體峰值 {peak / 1024:.0f} KiB")
+
+    print(f"IndicatorFrame 緩衝區: {frame.nbytes / 1024:.0f} KiB ({frame!r})")
+    return 0 if identical else 1
+
+
+# --- 增量指標狀態 ---
+
+def benchmark_indicator_state(days=500, seed=0):
+    """與 compute 逐根比較最新一列，並比較每根新K線的更新時間；返回不一致欄位數"""
+    import json
+
+    from indicator_registry import INDICATOR_COLUMNS, compute
+    from indicator_state import IndicatorState
+
+    print("=== 增量指標狀態 ===")
+    bars = generate_ohlcv(days, seed=seed, regimes=LONG_REGIMES)
+    state = IndicatorState('DEMO')
+    max_error = 0.0
+    mismatched = set()
+    batch_time = 0.0
+    update_time = 0.0
+    for i in range(days):
+        start = time.perf_counter()
+        row = state.update(bars.iloc[i])
+        update_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = compute(bars.iloc[:i + 1]).iloc[-1]
+        batch_time += time.perf_counter() - start
+
+        for column in INDICATOR_COLUMNS:
+            a, b = float(row[column]), float(expected[column])
+            if a == b or (a != a and b != b):
+                continue
+            error = abs(a - b) / max(abs(b), 1.0)
+            max_error = max(max_error, error)
+            if error > 1e-9:
+                mismatched.add(column)
+
+    restored = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    identical = json.dumps(restored.to_dict()) == json.dumps(state.to_dict())
+    print(f"{days} 根K線逐根更新:")
+    print(f"  批次重新計算: {batch_time / days * 1000:8.3f} ms/根")
+    print(f"  增量更新    : {update_time / days * 1000:8.3f} ms/根  (x{batch_time / update_time:6.1f})")
+    print(f"  最大相對誤差: {max_error:.2e}  "
+          f"{'✅ 結果相同' if not mismatched else '❌ 不同欄位: ' + ', '.join(sorted(mismatched))}")
+    print(f"  序列化還原  : {'✅ 狀態相同' if identical else '❌ 狀態不同'}")
+    return len(mismatched) + (not identical)
+
+
+# --- 橫截面指標 ---
+
+def benchmark_panel(symbols=500, days=60, seed=11):
+    """比較逐支計算與橫截面計算矩陣指標的時間，並確認結果逐位元相同；返回不一致欄位數"""
+    from indicator_registry import compute
+    from panel_indicators import PANEL_INDICATORS, IndicatorPanel
+
+    print("=== 橫截面指標 ===")
+    histories = generate_universe(symbols, days, seed=seed)
+
+    start = time.perf_counter()
+    expected = {symbol: compute(data, want=PANEL_INDICATORS) for symbol, data in histories.items()}
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    panel = IndicatorPanel.from_histories(histories)
+    cross = time.perf_counter() - start
+
+    mismatched = 0
+    for symbol, df in expected.items():
+        view = panel.view(symbol)
+        for name in panel.names:
+            if not np.array_equal(view.array(name), df[name].to_numpy(dtype=np.float64), equal_nan=True):
+                mismatched += 1
+    print(f"{'✅' if not mismatched else '❌'} {symbols} 支股票 × {days} 日，{len(panel.names)} 個指標，"
+          f"不一致欄位: {mismatched}")
+    print(f"逐支計算: {single * 1000:.1f} ms，橫截面計算: {cross * 1000:.1f} ms ({single / cross:.1f}x)")
+    return mismatched
+
+
+# --- 滾動窗口基本運算 ---
+
+ROLLING_KERNELS = ('rolling_mean', 'rolling_std', 'rolling_var', 'rolling_min', 'rolling_max')
+
+
+def verify_rolling_primitives(n=2000, seed=3):
+    """
+    以隨機資料（含 NaN、重複值、負數與大小差異懸殊的數值）與 pandas 比對，返回不一致數量
+    平均與極值要求逐位元相同；變異數（標準差取平方）要求相對誤差 1e-8 以內
+    （大小差異懸殊的資料兩者的遞迴誤差都很大，不列入比較）
+    """
+    import pandas as pd
+
+    import rolling_primitives
+
+    rng = np.random.default_rng(seed)
+    cases = {
+        'random_walk': 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))),
+        'volume': rng.integers(100_000, 5_000_000, n).astype(np.float64),
+        'signed': rng.normal(0, 1, n),
+        'repeated': np.repeat(rng.normal(50, 5, n // 10), 10),
+        'scaled': rng.normal(0, 1, n) * 10.0 ** rng.integers(-3, 8, n),
+    }
+    with_nan = cases['random_walk'].copy()
+    with_nan[rng.choice(n, n // 20, replace=False)] = np.nan
+    cases['with_nan'] = with_nan
+    jit_modes = (False, True) if rolling_primitives.NUMBA_AVAILABLE else (False,)
+
+    mismatched = 0
+    for name, values in cases.items():
+        series = pd.Series(values)
+        for window in (1, 2, 3, 5, 9, 14, 20, 60):
+            for min_periods in (None, 1):
+                roller = series.rolling(window=window, min_periods=min_periods)
+                for kernel_name in ROLLING_KERNELS:
+                    how = kernel_name.split('_')[1]
+                    kernel = getattr(rolling_primitives, kernel_name)
+                    for use_jit in jit_modes:
+                        actual = kernel(values, window, min_periods, use_jit=use_jit)
+                        expected = getattr(roller, how)().to_numpy()
+                        if how in ('std', 'var'):
+                            if name == 'scaled':
+                                continue
+                            if how == 'std':
+                                actual, expected = actual ** 2, expected ** 2
+                            same = np.allclose(actual, expected, rtol=1e-8, atol=1e-12, equal_nan=True)
+                        else:
+                            same = np.array_equal(actual, expected, equal_nan=True)
+                        if not same:
+                            mismatched += 1
+                            print(f"❌ {name} window={window} min_periods={min_periods} {how} jit={use_jit}")
+        for width in (1, 2, 3):
+            low = rolling_primitives.local_minima(values, width)
+            expected = np.zeros(n, dtype=bool)
+            expected[width:n - width] = np.all(
+                [values[width:n - width] <= values[width + k:n - width + k] for k in range(-width, width + 1) if k],
+                axis=0)
+            if not np.array_equal(low, expected):
+                mismatched += 1
+                print(f"❌ {name} local_minima width={width}")
+    return mismatched
+
+
+def benchmark_rolling_primitives(days=500, repeat=200):
+    """比較 pandas 滾動運算與陣列核心的時間，並與 pandas 比對結果；返回不一致數量"""
+    import rolling_primitives
+
+    print("=== 滾動窗口基本運算 ===")
+    close = generate_ohlcv(days, seed=9)['Close']
+    values = close.to_numpy()
+
+    mismatched = verify_rolling_primitives()
+    print(f"{'✅' if not mismatched else '❌'} 與 pandas 比對，不一致 {mismatched} 項")
+
+    jit_modes = (False, True) if rolling_primitives.NUMBA_AVAILABLE else (False,)
+    for kernel_name in ROLLING_KERNELS:
+        how = kernel_name.split('_')[1]
+        kernel = getattr(rolling_primitives, kernel_name)
+        kernel(values, 20)  # JIT 編譯
+        pandas_time, _ = _best_of(lambda i: getattr(close.rolling(window=20), how)(), repeat)
+        timings = []
+        for use_jit in jit_modes:
+            elapsed, _ = _best_of(lambda i: kernel(values, 20, use_jit=use_jit), repeat)
+            timings.append(f"{'JIT' if use_jit else 'Python'} {elapsed * 1e6:.0f} µs")
+        print(f"rolling(20).{how:<4}: pandas {pandas_time * 1e6:.0f} µs，" + "，".join(timings))
+    return mismatched
+
+
+# --- 分析上下文 ---
+
+def profile_analysis_context(days=500, repeat=5):
+    """
+    以合成K線執行一次完整的單股評估（指標、進場評估、多頭訊號、抄底價位），
+    比較共用上下文（IndicatorFrame）與各階段各自計算（DataFrame）的時間，並列出共用上下文的計算與沿用次數
+    """
+    import contextlib
+    import io
+
+    from benchmarks.engine import offline_analyzer
+
+    print("=== 分析上下文 ===")
+    daily = generate_ohlcv(days, seed=5)
+    analyzer = offline_analyzer(daily, 'DEMO')
+
+    def evaluate(df):
+        analyzer.assess_entry_opportunity(df, 'DEMO')
+        analyzer.detect_bullish_signals(df)
+        analyzer.calculate_long_signal_price(df)
+
+    for label, build in (('各階段各自計算', analyzer.calculate_technical_indicators),
+                         ('共用分析上下文', analyzer.calculate_indicator_frame)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            def run(i):
+                df = build(daily)
+                evaluate(df)
+                return df
+            _, elapsed = _best_of(run, repeat)
+            df = run(0)
+        print(f"{label}: {elapsed * 1000:.1f} ms")
+
+    print("共用分析上下文的快取統計:")
+    for kind, counts in df.context.profile().items():
+        print(f"  {kind:>18}: 計算 {counts['computed']} 次，沿用 {counts['reused']} 次")
+    return 0
+
+
+COMPONENTS = {
+    'sar': benchmark_sar,
+    'rolling': benchmark_rolling_primitives,
+    'frame': benchmark_indicator_frame,
+    'state': benchmark_indicator_state,
+    'panel': benchmark_panel,
+    'context': profile_analysis_context,
+}
+
+
+def main(argv=None):
+    names = (argv if argv is not None else sys.argv[1:]) or list(COMPONENTS)
+    unknown = [name for name in names if name not in COMPONENTS]
+    if unknown:
+        print(f"❌ 未知的項目: {', '.join(unknown)}（可用: {', '.join(COMPONENTS)}）")
+        return 2
+    mismatched = 0
+    for name in names:
+        mismatched += COMPONENTS[name]() or 0
+        print()
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+離線執行分析引擎
+建立不讀取觀察清單、不連網的 IntegratedStockAnalyzer（市場情緒固定、多時間框架使用傳入的日線），
+並把各函數的輸出轉為可寫入 JSON 的結構
+"""
+
+import contextlib
+import io
+import math
+
+import numpy as np
+import pandas as pd
+
+# 固定的市場情緒，避免讀取 SPY / QQQ / VIX
+NEUTRAL_SENTIMENT = {'sentiment': 'neutral', 'score': 50, 'factors': []}
+
+# 黃金輸出涵蓋的函數（依 analyze_stock 的呼叫順序）
+ENGINE_FUNCTIONS = (
+    'calculate_technical_indicators',
+    'calculate_sar',
+    'calculate_enhanced_sar_signals',
+    'assess_entry_opportunity',
+    'detect_bullish_signals',
+    'calculate_long_signal_price',
+)
+
+
+def offline_analyzer(daily, symbol='SYN'):
+    """不讀取觀察清單與網路的分析器；多時間框架分析使用 daily 的完整歷史"""
+    from integrated_stock_analyzer import IntegratedStockAnalyzer
+    from enhanced_confirmation_system import EnhancedConfirmationSystem
+    from market_data_cache import SymbolDataContext
+    from multi_timeframe_analyzer import MultiTimeframeAnalyzer
+
+    analyzer = IntegratedStockAnalyzer.__new__(IntegratedStockAnalyzer)
+    analyzer.market_sentiment = dict(NEUTRAL_SENTIMENT)
+    analyzer.confirmation_system = EnhancedConfirmationSystem()
+    analyzer.mtf_analyzer = MultiTimeframeAnalyzer()
+    analyzer.prefetched_data = {}
+    analyzer.indicator_panel = None
+    analyzer.context_period = 'max'  # 不依執行當天的日期切片，結果與執行日期無關
+    analyzer.symbol_contexts = {symbol: SymbolDataContext(symbol, daily)}
+    analyzer.run_started_at = None
+    analyzer.run_max_age = float('inf')  # 離線資料不會過期
+    return analyzer
+
+
+def sar_signal_records(result):
+    """
+    calculate_enhanced_sar_signals 的陣列結果轉回原本的格式：
+    {'sar', 'signals': ['BUY' / 'SELL' / None], 'confirmations': [{'score', 'factors', 'max_score'}]}，
+    讓黃金檔可以直接與基準版本比對
+    """
+    from sar_engine import SAR_BUY, SAR_SELL, sar_signal_factors
+
+    labels = {SAR_BUY: 'BUY', SAR_SELL: 'SELL'}
+    return {
+        'sar': result['sar'],
+        'signals': [labels.get(int(signal)) for signal in result['signal']],
+        'confirmations': [{'score': int(score), 'factors': sar_signal_factors(signal, factors),
+                           'max_score': int(max_score)}
+                          for signal, score, factors, max_score in zip(result['signal'], result['score'],
+                                                                       result['factors'], result['max_score'])],
+    }
+
+
+def run_engine(daily, symbol='SYN'):
+    """對一支股票的日線執行 ENGINE_FUNCTIONS，返回 {函數名稱: 原始輸出}"""
+    analyzer = offline_analyzer(daily, symbol)
+    outputs = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        indicators = analyzer.calculate_technical_indicators(daily)
+        outputs['calculate_technical_indicators'] = indicators
+        outputs['calculate_sar'] = analyzer.calculate_sar(daily)
+        outputs['calculate_enhanced_sar_signals'] = sar_signal_records(
+            analyzer.calculate_enhanced_sar_signals(indicators))
+
+        # 與 analyze_stock 相同：在 IndicatorFrame 上評估
+        frame = analyzer.calculate_indicator_frame(daily, symbol=symbol)
+        outputs['assess_entry_opportunity'] = analyzer.assess_entry_opportunity(frame, symbol)
+        outputs['detect_bullish_signals'] = analyzer.detect_bullish_signals(frame)
+        outputs['calculate_long_signal_price'] = analyzer.calculate_long_signal_price(frame)
+    return outputs
+
+
+def verify_single_pass(days=300, seed=3):
+    """
+    以合成K線依 analyze_stock 與回測的讀取順序使用同一個 SymbolAnalysis，
+    確認每個項目只計算一次，並返回各項目的計算次數
+    """
+    from benchmarks.synthetic import generate_ohlcv
+    from symbol_analysis import SymbolAnalysis
+
+    daily = generate_ohlcv(days, seed=seed)
+    analyzer = offline_analyzer(daily, 'DEMO')
+    with contextlib.redirect_stdout(io.StringIO()):
+        analysis = SymbolAnalysis(analyzer, 'DEMO', daily)
+        # analyze_stock
+        analysis.signals
+        analysis.entry
+        analysis.long_signal
+        # run_analysis_on_slice（出場檢查與進場檢查各一次）
+        for _ in range(2):
+            analysis.latest_signal
+            analysis.long_signal
+            analysis.entry
+        analysis.confirmation
+        analysis.multi_timeframe
+    counts = analysis.calls()
+    for component, count in counts.items():
+        print(f"  {'✅' if count == 1 else '❌'} {component}: 計算 {count} 次")
+    return counts
+
+
+def to_jsonable(value):
+    """
+    轉為 JSON 相容的結構：NumPy 純量轉為 Python 數值、時間轉為 ISO 字串、
+    Series / DataFrame 轉為 {'index': [...], 'columns': {...}}；NaN / inf 以字串保存
+    """
+    if isinstance(value, pd.DataFrame):
+        return {'index': [to_jsonable(i) for i in value.index],
+                'columns': {str(name): to_jsonable(value[name]) for name in value.columns}}
+    if isinstance(value, pd.Series):
+        return [to_jsonable(v) for v in value.to_numpy(dtype=np.float64, na_value=np.nan)]
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return value if math.isfinite(value) else repr(value)
+    return value
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+黃金輸出回歸
+以合成K線執行分析引擎，把輸出與 benchmarks/golden/ 下的黃金檔逐值比對。
+逐列序列（指標表、SAR、SAR 信號陣列）保存每欄 float64 位元組的 SHA-256 與最後幾個值，其餘輸出完整保存；
+任何最佳化都必須讓比對結果完全相同，輸出確定改變時以 --update-golden 重新產生
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.engine import ENGINE_FUNCTIONS, run_engine, to_jsonable
+from benchmarks.synthetic import generate_ohlcv
+
+GOLDEN_DIR = Path(__file__).resolve().parent / 'golden'
+
+# (案例名稱, generate_ohlcv 參數)
+GOLDEN_CASES = (
+    ('trend', {'length': 250, 'seed': 101, 'regimes': ('trend',)}),
+    ('range', {'length': 250, 'seed': 202, 'regimes': ('range',)}),
+    ('crash', {'length': 250, 'seed': 303, 'regimes': ('crash', 'range')}),
+    ('mixed', {'length': 500, 'seed': 404, 'regimes': ('range', 'trend', 'crash'), 'segment': 40}),
+    ('short', {'length': 60, 'seed': 505, 'regimes': ('crash', 'trend'), 'segment': 30}),
+)
+
+TAIL_VALUES = 5
+
+
+def _series_fingerprint(values):
+    """float64 位元組（NaN 與 -0.0 正規化）的 SHA-256 與最後幾個值"""
+    values = np.asarray(values, dtype=np.float64) + 0.0
+    values = np.where(np.isnan(values), np.nan, values)
+    return {
+        'length': len(values),
+        'sha256': hashlib.sha256(np.ascontiguousarray(values).tobytes()).hexdigest(),
+        'nan_count': int(np.isnan(values).sum()),
+        'tail': to_jsonable(values[-TAIL_VALUES:]),
+    }
+
+
+def fingerprint(value):
+    """Series / DataFrame / 一維陣列以指紋保存，其餘轉為 JSON 相容的完整結構"""
+    if isinstance(value, pd.DataFrame):
+        return {
+            'index': {'first': to_jsonable(value.index[0]) if len(value) else None,
+                      'last': to_jsonable(value.index[-1]) if len(value) else None,
+                      'length': len(value)},
+            'columns': {str(name): _series_fingerprint(value[name].to_numpy(dtype=np.float64, na_value=np.nan))
+                        for name in value.columns},
+        }
+    if isinstance(value, pd.Series):
+        return _series_fingerprint(value.to_numpy(dtype=np.float64, na_value=np.nan))
+    if isinstance(value, np.ndarray) and value.ndim == 1:
+        return _series_fingerprint(value)
+    if isinstance(value, dict):
+        return {str(key): fingerprint(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [fingerprint(item) for item in value]
+    return to_jsonable(value)
+
+
+def case_data(name):
+    params = dict(GOLDEN_CASES)[name]
+    return generate_ohlcv(**params)
+
+
+def case_outputs(name):
+    """一個案例的 {函數名稱: 指紋化輸出}"""
+    outputs = run_engine(case_data(name), symbol=f'SYN_{name.upper()}')
+    return {function: fingerprint(outputs[function]) for function in ENGINE_FUNCTIONS}
+
+
+def golden_path(name):
+    return GOLDEN_DIR / f'{name}.json'
+
+
+def write_golden():
+    """重新產生所有黃金檔"""
+    GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+    for name, params in GOLDEN_CASES:
+        payload = {'case': name, 'params': to_jsonable(params), 'outputs': case_outputs(name)}
+        with open(golden_path(name), 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"✅ 已更新黃金檔: {golden_path(name).name}")
+
+
+def diff(expected, actual, path=''):
+    """返回兩個 JSON 結構不同之處的路徑列表"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        differences = []
+        for key in sorted(set(expected) | set(actual)):
+            if key not in expected or key not in actual:
+                differences.append(f'{path}/{key}')
+            else:
+                differences.extend(diff(expected[key], actual[key], f'{path}/{key}'))
+        return differences
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f'{path} (長度 {len(expected)} → {len(actual)})']
+        differences = []
+        for i, (left, right) in enumerate(zip(expected, actual)):
+            differences.extend(diff(left, right, f'{path}[{i}]'))
+        return differences
+    # int 與 float 的 JSON 表示可能不同（5 與 5.0），以數值比較
+    if type(expected) is not type(actual) and not all(isinstance(v, (int, float)) for v in (expected, actual)):
+        return [f'{path} ({expected!r} → {actual!r})']
+    return [] if expected == actual else [f'{path} ({expected!r} → {actual!r})']
+
+
+def check_golden():
+    """
+    比對所有案例，返回 [{'case', 'status', 'differences'}]
+    status 為 match / mismatch / missing（尚未產生黃金檔）
+    """
+    results = []
+    for name, _ in GOLDEN_CASES:
+        path = golden_path(name)
+        if not path.exists():
+            results.append({'case': name, 'status': 'missing', 'differences': []})
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            expected = json.load(f)['outputs']
+        actual = json.loads(json.dumps(case_outputs(name)))
+        differences = diff(expected, actual)
+        results.append({
+            'case': name,
+            'status': 'match' if not differences else 'mismatch',
+            'differences': differences,
+        })
+    return results
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成K線產生器
+以固定亂數種子產生趨勢、盤整與崩跌三種行情的 OHLCV，日期固定從 START_DATE 起算的交易日，
+同一組參數在任何機器、任何日期都產生完全相同的K線
+"""
+
+import numpy as np
+import pandas as pd
+
+START_DATE = '2020-01-02'
+
+# 行情：(每日漂移, 每日波動率, 均值回歸強度, 成交量倍數)
+REGIMES = {
+    'trend': (0.0015, 0.012, 0.0, 1.0),    # 穩定上漲
+    'range': (0.0, 0.010, 0.15, 0.8),      # 圍繞區間中樞來回
+    'crash': (-0.012, 0.035, 0.0, 2.5),    # 急跌、放量、跳空
+}
+
+
+def _regime_schedule(length, regimes, segment):
+    """依序循環 regimes，每段 segment 根K線"""
+    return [regimes[(i // segment) % len(regimes)] for i in range(length)]
+
+
+def generate_ohlcv(length=250, seed=0, regimes=('trend', 'range', 'crash'), segment=60,
+                   start_price=100.0, start=START_DATE):
+    """
+    產生一支股票的日線
+    regimes 依序循環，每段 segment 根K線；盤整段以前一段結束的價格為中樞做均值回歸，
+    崩跌段加入向下跳空，成交量隨報酬率絕對值放大
+    """
+    rng = np.random.default_rng(seed)
+    schedule = _regime_schedule(length, list(regimes), segment)
+
+    close = np.empty(length)
+    open_ = np.empty(length)
+    price = start_price
+    anchor = start_price
+    previous = None
+    returns = np.empty(length)
+    for i, name in enumerate(schedule):
+        drift, vol, reversion, _ = REGIMES[name]
+        if name != previous:
+            anchor = price
+            previous = name
+        shock = rng.normal(drift, vol)
+        if reversion:
+            shock -= reversion * np.log(price / anchor)
+        gap = rng.normal(-0.01, 0.01) if name == 'crash' and rng.random() < 0.15 else rng.normal(0, 0.002)
+        open_[i] = price * np.exp(gap)
+        price = price * np.exp(shock)
+        close[i] = price
+        returns[i] = shock
+
+    spread = np.abs(rng.normal(0, 0.008, length)) + np.array([REGIMES[name][1] for name in schedule]) * 0.3
+    high = np.maximum(open_, close) * (1 + spread * rng.random(length))
+    low = np.minimum(open_, close) * (1 - spread * rng.random(length))
+
+    volume_scale = np.array([REGIMES[name][3] for name in schedule])
+    volume = (rng.integers(800_000, 1_200_000, length) * volume_scale * (1 + 20 * np.abs(returns))).astype(np.int64)
+
+    index = pd.bdate_range(start=start, periods=length)
+    return pd.DataFrame({
+        'Open': np.round(open_, 4),
+        'High': np.round(high, 4),
+        'Low': np.round(low, 4),
+        'Close': np.round(close, 4),
+        'Volume': volume,
+    }, index=index)
+
+
+def generate_universe(symbols=100, length=60, seed=0, regimes=('trend', 'range', 'crash'), segment=20):
+    """產生 symbols 支股票的日線 {代號: DataFrame}，每支股票的起始行情與價格不同，交易日曆相同"""
+    rng = np.random.default_rng(seed)
+    universe = {}
+    for i in range(symbols):
+        offset = i % len(regimes)
+        rotated = tuple(regimes[offset:]) + tuple(regimes[:offset])
+        universe[f'SYN{i:04d}'] = generate_ohlcv(
+            length, seed=int(rng.integers(0, 2**31)), regimes=rotated, segment=segment,
+            start_price=float(rng.uniform(10, 300)))
+    return universe
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+效能基準
+單一股票：各引擎函數在不同序列長度下的每次呼叫時間（每次呼叫使用新的指標表，不沿用分析上下文的快取）
+股票池：逐支計算指標與橫截面指標引擎在不同股票數量下的總時間
+"""
+
+import contextlib
+import io
+import time
+
+from benchmarks.engine import offline_analyzer
+from benchmarks.synthetic import generate_ohlcv, generate_universe
+
+SERIES_LENGTHS = (60, 250, 1000)
+UNIVERSE_SIZES = (10, 100, 500)
+QUICK_SERIES_LENGTHS = (60, 250)
+QUICK_UNIVERSE_SIZES = (10, 50)
+
+
+def _best_of(func, repeat):
+    """執行 repeat 次，返回最快一次與平均的秒數"""
+    elapsed = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed), sum(elapsed) / len(elapsed)
+
+
+def time_series_functions(lengths=SERIES_LENGTHS, repeat=5, seed=7):
+    """返回 [{'function', 'length', 'best_ms', 'mean_ms', 'repeat'}]"""
+    rows = []
+    for length in lengths:
+        daily = generate_ohlcv(length, seed=seed + length, segment=max(length // 6, 10))
+        analyzer = offline_analyzer(daily)
+        with contextlib.redirect_stdout(io.StringIO()):
+            indicators = analyzer.calculate_technical_indicators(daily)
+            computations = {
+                'calculate_technical_indicators': lambda: analyzer.calculate_technical_indicators(daily),
+                'calculate_indicator_frame': lambda: analyzer.calculate_indicator_frame(daily),
+                'calculate_sar': lambda: analyzer.calculate_sar(daily),
+                'calculate_enhanced_sar_signals': lambda: analyzer.calculate_enhanced_sar_signals(indicators),
+            }
+            # 評估函數會把結果記在指標表的分析上下文，每次呼叫都使用新的指標表
+            evaluations = {
+                'detect_bullish_signals': analyzer.detect_bullish_signals,
+                'calculate_long_signal_price': analyzer.calculate_long_signal_price,
+                'assess_entry_opportunity': lambda frame: analyzer.assess_entry_opportunity(frame, 'SYN'),
+            }
+
+            for function, call in computations.items():
+                call()  # 預熱（JIT 編譯、匯入）
+                best, mean = _best_of(lambda i: call(), repeat)
+                rows.append({'function': function, 'length': length, 'best_ms': best * 1000,
+                             'mean_ms': mean * 1000, 'repeat': repeat})
+            for function, evaluate in evaluations.items():
+                frames = [analyzer.calculate_indicator_frame(daily) for _ in range(repeat + 1)]
+                evaluate(frames[-1])
+                best, mean = _best_of(lambda i: evaluate(frames[i]), repeat)
+                rows.append({'function': function, 'length': length, 'best_ms': best * 1000,
+                             'mean_ms': mean * 1000, 'repeat': repeat})
+    return rows
+
+
+def time_universe(sizes=UNIVERSE_SIZES, days=60, seed=11):
+    """返回 [{'symbols', 'days', 'per_symbol_ms', 'panel_ms', 'speedup'}]"""
+    from panel_indicators import IndicatorPanel
+
+    rows = []
+    for size in sizes:
+        universe = generate_universe(size, days, seed=seed)
+        analyzer = offline_analyzer(next(iter(universe.values())))
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for data in universe.values():
+                analyzer.calculate_indicator_frame(data)
+            per_symbol = time.perf_counter() - start
+
+            start = time.perf_counter()
+            IndicatorPanel.from_histories(universe)
+            panel = time.perf_counter() - start
+        rows.append({'symbols': size, 'days': days, 'per_symbol_ms': per_symbol * 1000,
+                     'panel_ms': panel * 1000, 'speedup': per_symbol / panel if panel else None})
+    return rows
@@ -7,9 +7,9 @@
 
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from datetime import datetime, timedelta
 import warnings
+from analysis_context import context_for
 
 warnings.filterwarnings('ignore')
 
@@ -158,16 +158,13 @@ class EnhancedConfirmationSystem:
                         confirmation_factors.append("強勢長紅K")
             
             # 2. 支撐阻力分析 (30分)
-            recent_lows = df['Low'].tail(20)
-            recent_highs = df['High'].tail(20)
             current_price = df['Close'].iloc[-1]
             
-            # 找出關鍵支撐位
-            support_levels = []
-            for i in range(1, len(recent_lows) - 1):
-                if (recent_lows.iloc[i] <= recent_lows.iloc[i-1] and 
-                    recent_lows.iloc[i] <= recent_lows.iloc[i+1]):
-                    support_levels.append(recent_lows.iloc[i])
+            # 找出關鍵支撐位：近20根K線中（不含頭尾）的區域低點，遮罩由分析上下文共用
+            lows = df['Low'].to_numpy(dtype=np.float64)
+            is_low = context_for(df).local_lows()
+            window_start = max(len(lows) - 20, 0)
+            support_levels = [lows[i] for i in range(window_start + 1, len(lows) - 1) if is_low[i]]
             
             if support_levels:
                 nearest_support = max([s for s in support_levels if s <= current_price], default=0)
@@ -239,8 +236,9 @@ class EnhancedConfirmationSystem:
                 confirmation_factors.append("成交量萎縮")
             
             # 2. 量價配合分析 (35分)
-            price_change = df['Close'].pct_change().iloc[-1]
-            volume_change = df['Volume'].pct_change().iloc[-1]
+            context = context_for(df)
+            price_change = context.pct_change(1).iloc[-1]
+            volume_change = context.pct_change(1, 'Volume').iloc[-1]
             
             if price_change > 0 and volume_change > 0:
                 if price_change > 0.02 and volume_change > 0.5:
@@ -270,11 +268,13 @@ class EnhancedConfirmationSystem:
         except Exception as e:
             return {'score': 0, 'factors': [f'計算錯誤: {str(e)}'], 'max_score': 100}
     
-    def calculate_comprehensive_confirmation(self, df):
+    def calculate_comprehensive_confirmation(self, df, context=None):
         """
         綜合確認評分
-        整合所有確認機制
+        整合所有確認機制；傳入分析上下文時，結果保存在其中供後續階段沿用
         """
+        if context is not None:
+            return context.memo(('confirmation',), lambda: self.calculate_comprehensive_confirmation(df))
         try:
             # 獲取各項確認評分
             technical_sync = self.calculate_technical_sync_confirmation(df)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+陣列式技術指標表
+所有欄位放在一塊預先配置的 2D 緩衝區（欄 × K線，每欄連續存放），
+指標計算直接寫入各欄，不必像 DataFrame 逐欄新增時反覆配置與合併區塊。
+frame['RSI'] 返回共用記憶體的 Series，frame.array('RSI') 返回 NumPy 視圖，
+需要完整 DataFrame 時以 to_pandas() 零複製轉換。
+"""
+
+import numpy as np
+import pandas as pd
+
+from analysis_context import AnalysisContext
+
+
+class IndicatorFrame:
+    """
+    以單一 float64（或 float32）緩衝區保存K線與指標欄位
+    支援分析程式常用的 DataFrame 介面：frame[col]、col in frame、len、
+    index、columns、empty、tail
+    """
+
+    __slots__ = ('index', 'columns', '_positions', '_values', '_views', '_context')
+
+    def __init__(self, index, columns, values):
+        self.index = index
+        self.columns = list(columns)
+        self._positions = {name: i for i, name in enumerate(self.columns)}
+        self._values = values
+        self._views = {}
+        self._context = None
+
+    @classmethod
+    def allocate(cls, index, columns, dtype=np.float64):
+        """配置空白（NaN）緩衝區"""
+        values = np.full((len(columns), len(index)), np.nan, dtype=dtype)
+        return cls(index, columns, values)
+
+    @classmethod
+    def from_pandas(cls, data, extra_columns=(), dtype=np.float64):
+        """
+        由 DataFrame 建立，並預留 extra_columns 的空間
+        只保留數值欄位；extra_columns 中已存在的欄位沿用原位置
+        """
+        numeric = data.select_dtypes(include=['number', 'bool'])
+        columns = list(numeric.columns)
+        columns += [name for name in extra_columns if name not in numeric.columns]
+        frame = cls.allocate(data.index, columns, dtype)
+        for i, name in enumerate(numeric.columns):
+            frame._values[i] = numeric[name].to_numpy(dtype=dtype, na_value=np.nan)
+        return frame
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self._positions
+
+    def __getitem__(self, name):
+        """返回與緩衝區共用記憶體的 Series（同一欄只建立一次）"""
+        view = self._views.get(name)
+        if view is None:
+            view = pd.Series(self._values[self._positions[name]], index=self.index, name=name, copy=False)
+            self._views[name] = view
+        return view
+
+    def __setitem__(self, name, values):
+        """寫入已配置的欄位；索引不同的 Series 先依索引對齊（同 DataFrame 欄位指定）"""
+        position = self._positions[name]
+        if isinstance(values, pd.Series) and not values.index.equals(self.index):
+            values = values.reindex(self.index)
+        self._values[position] = np.asarray(values, dtype=self._values.dtype)
+
+    def __repr__(self):
+        return f"IndicatorFrame({len(self)} rows × {len(self.columns)} columns, {self._values.dtype})"
+
+    @property
+    def empty(self):
+        return len(self.index) == 0 or not self.columns
+
+    @property
+    def shape(self):
+        return len(self.index), len(self.columns)
+
+    @property
+    def dtype(self):
+        return self._values.dtype
+
+    @property
+    def nbytes(self):
+        return self._values.nbytes
+
+    @property
+    def context(self):
+        """此指標表（一支股票、一個分析日期）共用的 AnalysisContext"""
+        if self._context is None:
+            self._context = AnalysisContext(self)
+        return self._context
+
+    def array(self, name):
+        """欄位的 NumPy 視圖（不複製）"""
+        return self._values[self._positions[name]]
+
+    def last(self, name, default=None):
+        """欄位最後一個值；欄位不存在或沒有資料時返回 default"""
+        position = self._positions.get(name)
+        if position is None or not len(self.index):
+            return default
+        return self._values[position, -1]
+
+    def tail(self, n=5):
+        """最後 n 根K線（共用緩衝區的視圖）"""
+        start = max(len(self.index) - n, 0)
+        return IndicatorFrame(self.index[start:], self.columns, self._values[:, start:])
+
+    def clear_views(self):
+        """釋放快取的 Series 視圖（計算過程中建立的視圖不需隨結果保留）"""
+        self._views.clear()
+
+    def to_pandas(self):
+        """轉為 DataFrame；緩衝區即為 DataFrame 的區塊配置，不需複製"""
+        return pd.DataFrame(self._values.T, index=self.index, columns=self.columns, copy=False)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+技術指標註冊表
+每個指標宣告輸入欄位與暖機K線數，compute(df, want={'SAR', 'RSI'}) 只計算
+所需指標及其依賴，不需要的反轉評分、KD、ADX 等都會略過；
+want 省略時計算全部指標，結果與原本的 calculate_technical_indicators 完全相同；
+compute_frame 以相同流程寫入預先配置的 IndicatorFrame
+"""
+
+import numpy as np
+import pandas as pd
+
+import trend_scores
+from analysis_context import context_for
+from rolling_primitives import rolling
+from indicator_frame import IndicatorFrame
+from sar_engine import calculate_sar
+
+# K線本身的欄位，不需計算
+BAR_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class Indicator:
+    """
+    一個指標欄位
+    inputs: 依賴的欄位（K線欄位或其他指標）
+    warmup: 產生有效值前需要的K線數
+    safe: 計算失敗時返回 0（同原本各 calculate_* 方法的 try/except）
+    func(df, overrides)：overrides 為預先計算的指標值（目前只有 'sar'），None 表示自行計算
+    """
+
+    __slots__ = ('name', 'inputs', 'warmup', 'func', 'safe')
+
+    def __init__(self, name, inputs, warmup, func, safe=False):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.warmup = warmup
+        self.func = func
+        self.safe = safe
+
+    def __repr__(self):
+        return f"Indicator({self.name}, inputs={self.inputs}, warmup={self.warmup})"
+
+
+INDICATORS = {}
+
+
+def register(name, inputs, warmup, safe=False):
+    """以裝飾器註冊指標；註冊順序即完整計算時的欄位順序"""
+    def decorator(func):
+        INDICATORS[name] = Indicator(name, inputs, warmup, func, safe)
+        return func
+    return decorator
+
+
+# --- 移動平均線 ---
+
+def _register_ma(window):
+    register(f'MA{window}', ['Close'], window)(lambda df, overrides: context_for(df).rolling('Close', window))
+
+
+for _window in (5, 10, 20, 30, 60):
+    _register_ma(_window)
+
+
+# --- RSI ---
+
+@register('RSI', ['Close'], 15)
+def rsi(df, overrides):
+    delta = df['Close'].diff()
+    gain = rolling(delta.where(delta > 0, 0), 14)
+    loss = rolling(-delta.where(delta < 0, 0), 14)
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+# --- MACD ---
+
+@register('MACD', ['Close'], 26)
+def macd(df, overrides):
+    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
+    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
+    return exp1 - exp2
+
+
+@register('MACD_Signal', ['MACD'], 34)
+def macd_signal(df, overrides):
+    return df['MACD'].ewm(span=9, adjust=False).mean()
+
+
+@register('MACD_Histogram', ['MACD', 'MACD_Signal'], 34)
+def macd_histogram(df, overrides):
+    return df['MACD'] - df['MACD_Signal']
+
+
+# --- 布林通道（標準差與 Volatility 為同一計算）---
+
+@register('BB_Middle', ['Close'], 20)
+def bb_middle(df, overrides):
+    # 與 MA20 為同一個滾動均值，由分析上下文共用
+    return context_for(df).rolling('Close', 20)
+
+
+@register('BB_Upper', ['BB_Middle', 'Volatility'], 20)
+def bb_upper(df, overrides):
+    return df['BB_Middle'] + (df['Volatility'] * 2)
+
+
+@register('BB_Lower', ['BB_Middle', 'Volatility'], 20)
+def bb_lower(df, overrides):
+    return df['BB_Middle'] - (df['Volatility'] * 2)
+
+
+# --- 成交量與動量 ---
+
+@register('Volume_MA', ['Volume'], 20)
+def volume_ma(df, overrides):
+    return context_for(df).rolling('Volume', 20)
+
+
+@register('Volume_Ratio', ['Volume', 'Volume_MA'], 20)
+def volume_ratio(df, overrides):
+    return df['Volume'] / df['Volume_MA']
+
+
+@register('Price_Momentum', ['Close'], 6)
+def price_momentum(df, overrides):
+    return context_for(df).pct_change(5)
+
+
+# --- KD ---
+
+@register('RSV', ['Close', 'High', 'Low'], 9)
+def rsv(df, overrides):
+    context = context_for(df)
+    low_min = context.rolling('Low', 9, 'min')
+    high_max = context.rolling('High', 9, 'max')
+    return (df['Close'] - low_min) / (high_max - low_min) * 100
+
+
+@register('K', ['RSV'], 9)
+def k_line(df, overrides):
+    return df['RSV'].ewm(com=2).mean()
+
+
+@register('D', ['K'], 9)
+def d_line(df, overrides):
+    return df['K'].ewm(com=2).mean()
+
+
+# --- SAR / OBV / ADX ---
+
+@register('SAR', ['High', 'Low', 'Close'], 5)
+def sar(df, overrides):
+    # 可傳入預先計算的序列（例如回測中 PrefixSAR 的結果）
+    precomputed = overrides.get('sar')
+    return precomputed if precomputed is not None else calculate_sar(df)
+
+
+@register('OBV', ['Close', 'Volume'], 1)
+def obv(df, overrides):
+    return (np.sign(df['Close'].diff()) * df['Volume']).fillna(0).cumsum()
+
+
+@register('OBV_MA', ['OBV'], 10)
+def obv_ma(df, overrides):
+    return context_for(df).rolling('OBV', 10)
+
+
+@register('ADX', ['High', 'Low', 'Close'], 28)
+def adx(df, overrides, period=14):
+    """ADX趨勢強度指標"""
+    try:
+        # 計算+DM和-DM
+        high_diff = df['High'].diff()
+        low_diff = df['Low'].diff()
+
+        plus_dm = np.where((high_diff > low_diff) & (high_diff > 0), high_diff, 0)
+        minus_dm = np.where((low_diff > high_diff) & (low_diff > 0), low_diff, 0)
+
+        # 計算TR (True Range)
+        tr1 = df['High'] - df['Low']
+        tr2 = abs(df['High'] - df['Close'].shift(1))
+        tr3 = abs(df['Low'] - df['Close'].shift(1))
+        tr = np.maximum(tr1, np.maximum(tr2, tr3))
+
+        # 平滑處理
+        tr_mean = rolling(pd.Series(tr), period)
+        plus_di = rolling(pd.Series(plus_dm), period) / tr_mean * 100
+        minus_di = rolling(pd.Series(minus_dm), period) / tr_mean * 100
+
+        # 計算DX和ADX
+        dx = abs(plus_di - minus_di) / (plus_di + minus_di) * 100
+        result = rolling(dx, period)
+
+        return result.fillna(0)
+    except:
+        return pd.Series(0, index=df.index)
+
+
+# --- 趨勢與反轉評分（逐列，見 trend_scores）---
+
+register('MA_Bullish_Strength', ['MA5', 'MA10', 'MA20', 'MA30', 'MA60'], 60, safe=True)(
+    lambda df, overrides: trend_scores.ma_bullish_strength(df))
+register('Price_Channel_Slope', ['High', 'Low'], 25, safe=True)(
+    lambda df, overrides: trend_scores.price_channel_slope(df))
+register('Volume_Trend_Alignment', ['Close', 'Volume', 'Volume_MA'], 24, safe=True)(
+    lambda df, overrides: trend_scores.volume_trend_alignment(df))
+register('Momentum_Acceleration', ['Close'], 11, safe=True)(
+    lambda df, overrides: trend_scores.momentum_acceleration(df))
+register('RSI_Slope', ['RSI'], 18)(lambda df, overrides: df['RSI'].diff(periods=3))
+register('MACD_Slope', ['MACD'], 29)(lambda df, overrides: df['MACD'].diff(periods=3))
+register('K_Slope', ['K'], 12)(lambda df, overrides: df['K'].diff(periods=3))
+register('Relative_Strength', ['Close'], 20, safe=True)(
+    lambda df, overrides: trend_scores.relative_strength(df))
+register('Uptrend_Continuity', ['Close', 'RSI', 'MACD', 'K'], 30, safe=True)(
+    lambda df, overrides: trend_scores.uptrend_continuity(df))
+register('Volatility', ['Close'], 20)(lambda df, overrides: context_for(df).rolling('Close', 20, 'std'))
+register('Volatility_Ratio', ['Volatility', 'MA20'], 20)(lambda df, overrides: df['Volatility'] / df['MA20'])
+register('Dynamic_Stop_Loss', ['Close', 'Volatility'], 20, safe=True)(
+    lambda df, overrides: trend_scores.dynamic_stop_loss(df))
+register('Support_Reliability', ['Close', 'MA20', 'MA30', 'BB_Lower', 'SAR'], 30, safe=True)(
+    lambda df, overrides: trend_scores.support_reliability(df))
+register('Trend_Reversal_Confirmation',
+         ['Close', 'MA5', 'MA20', 'RSI', 'MACD', 'MACD_Histogram', 'K', 'D', 'Volume_Ratio',
+          'Price_Momentum', 'BB_Upper', 'BB_Lower'], 34)(
+    lambda df, overrides: trend_scores.trend_reversal_confirmation(df))
+register('Reversal_Strength',
+         ['Close', 'Price_Momentum', 'RSI_Slope', 'MACD_Slope', 'K_Slope', 'Volume_Ratio',
+          'MA_Bullish_Strength', 'Price_Channel_Slope'], 60)(
+    lambda df, overrides: trend_scores.reversal_strength(df))
+register('Reversal_Reliability',
+         ['Close', 'RSI', 'MACD', 'MACD_Histogram', 'K', 'D', 'SAR', 'OBV', 'OBV_MA', 'Volume_Ratio',
+          'BB_Upper', 'BB_Lower', 'ADX', 'Support_Reliability'], 34)(
+    lambda df, overrides: trend_scores.reversal_reliability(df))
+register('Short_Term_Momentum_Turn', ['Close', 'Low', 'RSI', 'MACD_Histogram'], 34, safe=True)(
+    lambda df, overrides: trend_scores.short_term_momentum_turn(df))
+register('Price_Structure_Reversal', ['Close', 'High', 'Low', 'MA20', 'BB_Lower', 'SAR'], 20, safe=True)(
+    lambda df, overrides: trend_scores.price_structure_reversal(df))
+
+# 完整計算時新增的欄位（依序）
+INDICATOR_COLUMNS = list(INDICATORS)
+
+# 常用的指標組合
+TREND_INDICATORS = frozenset({'MA5', 'MA20', 'MA30', 'RSI', 'MACD', 'MACD_Signal', 'MACD_Histogram'})
+
+
+def resolve(want=None):
+    """
+    返回計算 want 所需的指標（含依賴），依計算順序排列
+    want 省略時為全部指標；未知的名稱拋出 KeyError
+    """
+    if want is None:
+        want = INDICATOR_COLUMNS
+    elif isinstance(want, str):
+        want = [want]
+
+    ordered = []
+    visiting = set()
+    done = set()
+
+    def visit(name):
+        if name in done or name in BAR_COLUMNS:
+            return
+        if name not in INDICATORS:
+            raise KeyError(f"未知的技術指標: {name}")
+        if name in visiting:
+            raise ValueError(f"技術指標依賴出現循環: {name}")
+        visiting.add(name)
+        for dependency in INDICATORS[name].inputs:
+            visit(dependency)
+        visiting.discard(name)
+        done.add(name)
+        ordered.append(name)
+
+    # 依註冊順序走訪，集合輸入時結果也固定
+    position = {name: i for i, name in enumerate(INDICATORS)}
+    for name in sorted(want, key=lambda name: position.get(name, -1)):
+        visit(name)
+    return ordered
+
+
+def required_history(want=None):
+    """計算 want 所需的最少K線數（各依賴暖機K線數的最大值）"""
+    return max((INDICATORS[name].warmup for name in resolve(want)), default=0)
+
+
+def compute(data, want=None, sar=None):
+    """
+    計算技術指標，返回含K線欄位與所需指標的 DataFrame
+    want: 需要的指標名稱集合，省略時計算全部（同 calculate_technical_indicators）
+    sar: 預先計算的 SAR 序列，省略時重新計算
+    """
+    if data is None or data.empty:
+        return None
+
+    df = data.copy()
+    overrides = {'sar': sar}
+    names = resolve(want)
+    for name in names:
+        indicator = INDICATORS[name]
+        if indicator.safe:
+            try:
+                df[name] = indicator.func(df, overrides)
+            except:
+                df[name] = pd.Series(0, index=df.index)
+        else:
+            df[name] = indicator.func(df, overrides)
+
+    # 欄位依註冊順序排列，與完整計算一致
+    computed = set(names)
+    ordered = [name for name in INDICATOR_COLUMNS if name in computed]
+    if ordered != names:
+        df = df[list(data.columns) + [name for name in ordered if name not in data.columns]]
+    return df
+
+
+def compute_frame(data, want=None, sar=None, dtype=np.float64, precomputed=None):
+    """
+    同 compute，但結果寫入一塊預先配置的 IndicatorFrame（K線欄位轉為 dtype）
+    指標欄位依註冊順序接在K線數值欄位之後
+    precomputed: 已算好的 {指標: 陣列}（例如 panel_indicators 的橫截面結果），直接寫入不再計算
+    """
+    if data is None or data.empty:
+        return None
+
+    names = resolve(want)
+    computed = set(names)
+    frame = IndicatorFrame.from_pandas(
+        data, [name for name in INDICATOR_COLUMNS if name in computed], dtype=dtype)
+    overrides = {'sar': sar}
+    for name in names:
+        if precomputed is not None and name in precomputed:
+            frame[name] = precomputed[name]
+            continue
+        indicator = INDICATORS[name]
+        if indicator.safe:
+            try:
+                frame[name] = indicator.func(frame, overrides)
+            except:
+                frame[name] = 0
+        else:
+            frame[name] = indicator.func(frame, overrides)
+    frame.clear_views()
+    return frame
@@ -0,0 +1,821 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量技術指標狀態
+每支股票保存滾動窗口、EMA、OBV 與 SAR 的遞迴狀態，加入一根新K線時以 O(1) 更新，
+返回與 calculate_technical_indicators(df).iloc[-1] 相同的最新一列指標，
+不必為了一根新K線重新計算整段歷史；狀態可序列化（to_dict / from_dict / save / load）
+
+與批次計算的一致性：
+- 移動平均、RSI、MACD、KD、OBV、SAR 及各評分逐位元相同（滾動平均重現 pandas 的 Kahan 加減法）
+- 布林通道與波動率的滾動標準差在浮點誤差範圍內相同
+- SAR 的波動性分級使用累計的報酬率標準差，只有剛好落在分級門檻上時可能不同
+- ADX 與批次計算相同：calculate_adx 的結果索引與 K 線不對齊，DatetimeIndex 時固定為 0
+"""
+
+import json
+import math
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sar_engine import (IncrementalSAR, INITIAL_BARS, SAR_VOLATILITY_TIERS, SAR_DEFAULT_PARAMS,
+                        select_sar_params)
+
+NAN = float('nan')
+
+
+def _div(a, b):
+    """同 NumPy float64 的除法：除以 0 時得到 inf / nan 而不拋出例外"""
+    if b == 0:
+        if a != a or a == 0:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+def _pct_change(current, previous):
+    """同 Series.pct_change 的單點結果"""
+    return _div(current, previous) - 1
+
+
+def _nanmin(values):
+    result = NAN
+    for value in values:
+        if value == value and (result != result or value < result):
+            result = value
+    return result
+
+
+def _nanmax(values):
+    result = NAN
+    for value in values:
+        if value == value and (result != result or value > result):
+            result = value
+    return result
+
+
+def _recent(values, offset):
+    """values[-offset]，長度不足時返回 NaN"""
+    return values[-offset] if len(values) >= offset else NAN
+
+
+class _State:
+    """以 __slots__ 保存狀態，deque 與巢狀狀態可轉為 JSON 相容的 dict"""
+
+    __slots__ = ()
+
+    def to_dict(self):
+        return {name: _encode(getattr(self, name)) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(state, name, _decode(data[name]))
+        return state
+
+
+def _encode(value):
+    if isinstance(value, deque):
+        return {'__deque__': list(value), 'maxlen': value.maxlen}
+    if isinstance(value, (_State, IncrementalSAR)):
+        return {'__state__': type(value).__name__, 'data': value.to_dict()}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if '__deque__' in value:
+            return deque(value['__deque__'], maxlen=value['maxlen'])
+        if '__state__' in value:
+            return _STATE_TYPES[value['__state__']].from_dict(value['data'])
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+class RollingMean(_State):
+    """
+    同 Series.rolling(window).mean()：重現 pandas 的 Kahan 加法/減法補償、
+    負數計數與連續相同值的處理，結果逐位元相同
+    """
+
+    __slots__ = ('window', 'values', 'nobs', 'total', 'neg_ct', 'comp_add', 'comp_remove',
+                 'same_count', 'prev_value')
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.nobs = 0
+        self.total = 0.0
+        self.neg_ct = 0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_count = 0
+        self.prev_value = NAN
+
+    def _add(self, value):
+        if value != value:
+            return
+        self.nobs += 1
+        y = value - self.comp_add
+        t = self.total + y
+        self.comp_add = t - self.total - y
+        self.total = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct += 1
+        if value == self.prev_value:
+            self.same_count += 1
+        else:
+            self.same_count = 1
+        self.prev_value = value
+
+    def _remove(self, value):
+        if value != value:
+            return
+        self.nobs -= 1
+        y = -value - self.comp_remove
+        t = self.total + y
+        self.comp_remove = t - self.total - y
+        self.total = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct -= 1
+
+    def update(self, value):
+        if len(self.values) == self.window:
+            self._remove(self.values[0])
+        self.values.append(value)
+        self._add(value)
+
+        if self.nobs < self.window or self.nobs == 0:
+            return NAN
+        result = self.total / self.nobs
+        if self.same_count >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class RollingStd(_State):
+    """同 Series.rolling(window).std()：Welford 加減法（含 Kahan 補償），結果在浮點誤差範圍內相同"""
+
+    __slots__ = ('window', 'values', 'nobs', 'mean', 'ssqdm', 'comp_add', 'comp_remove',
+                 'same_count', 'prev_value')
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_count = 0
+        self.prev_value = NAN
+
+    def _add(self, value):
+        if value != value:
+            return
+        self.nobs += 1
+        if value == self.prev_value:
+            self.same_count += 1
+        else:
+            self.same_count = 1
+        self.prev_value = value
+        prev_mean = self.mean - self.comp_add
+        y = value - self.comp_add
+        t = y - self.mean
+        self.comp_add = t + self.mean - y
+        self.mean = self.mean + t / self.nobs
+        self.ssqdm = self.ssqdm + (value - prev_mean) * (value - self.mean)
+
+    def _remove(self, value):
+        if value != value:
+            return
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean - self.comp_remove
+            y = value - self.comp_remove
+            t = y - self.mean
+            self.comp_remove = t + self.mean - y
+            self.mean = self.mean - t / self.nobs
+            self.ssqdm = self.ssqdm - (value - prev_mean) * (value - self.mean)
+        else:
+            self.mean = 0.0
+            self.ssqdm = 0.0
+
+    def update(self, value):
+        if len(self.values) == self.window:
+            self._remove(self.values[0])
+        self.values.append(value)
+        self._add(value)
+
+        all_same = self.nobs > 0 and self.same_count >= self.nobs
+        if all_same:
+            # 窗口內全為相同值：重設累計值避免殘留誤差
+            self.mean = self.prev_value
+            self.ssqdm = 0.0
+        if self.nobs < self.window or self.nobs <= 1:
+            return NAN
+        if all_same:
+            return 0.0
+        variance = self.ssqdm / (self.nobs - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class RollingExtreme(_State):
+    """同 Series.rolling(window).max() / .min()（略過 NaN，非 NaN 數量不足窗口時為 NaN）"""
+
+    __slots__ = ('window', 'values', 'use_max')
+
+    def __init__(self, window, use_max=True):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.use_max = use_max
+
+    def update(self, value):
+        self.values.append(value)
+        if len(self.values) < self.window or any(v != v for v in self.values):
+            return NAN
+        return max(self.values) if self.use_max else min(self.values)
+
+
+class EWMean(_State):
+    """同 Series.ewm(com=..., adjust=...).mean()（ignore_na=False）的遞迴"""
+
+    __slots__ = ('old_wt_factor', 'new_wt', 'adjust', 'weighted', 'old_wt')
+
+    def __init__(self, com=None, span=None, adjust=True):
+        if com is None:
+            com = (span - 1) / 2.0
+        alpha = 1.0 / (1.0 + com)
+        self.old_wt_factor = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.adjust = adjust
+        self.weighted = NAN
+        self.old_wt = 1.0
+
+    def update(self, value):
+        is_observation = value == value
+        if self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = ((self.old_wt * self.weighted + self.new_wt * value)
+                                     / (self.old_wt + self.new_wt))
+                if self.adjust:
+                    self.old_wt += self.new_wt
+                else:
+                    self.old_wt = 1.0
+        elif is_observation:
+            self.weighted = value
+        return self.weighted
+
+
+class RunningStd(_State):
+    """全歷史的樣本標準差（Welford），用於 SAR 的波動性分級"""
+
+    __slots__ = ('nobs', 'mean', 'm2')
+
+    def __init__(self):
+        self.nobs = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, value):
+        if value == value and not math.isinf(value):
+            self.nobs += 1
+            delta = value - self.mean
+            self.mean += delta / self.nobs
+            self.m2 += delta * (value - self.mean)
+        elif value != value:
+            return self.value()
+        else:
+            # 報酬率出現 inf 時 pandas 的標準差為 NaN
+            self.nobs = -1
+        return self.value()
+
+    def value(self):
+        if self.nobs < 2:
+            return NAN
+        return math.sqrt(self.m2 / (self.nobs - 1))
+
+
+_STATE_TYPES = {cls.__name__: cls for cls in (RollingMean, RollingStd, RollingExtreme, EWMean,
+                                              RunningStd, IncrementalSAR)}
+
+
+class IndicatorState(_State):
+    """
+    單一股票的增量指標狀態
+    用法：
+        state = IndicatorState.from_history(df)      # 以既有K線建立（O(n) 一次）
+        row = state.update({'Open': ..., 'High': ..., 'Low': ..., 'Close': ..., 'Volume': ...})
+    row 為 {欄位: 值}，欄位與 calculate_technical_indicators 的結果相同
+    """
+
+    __slots__ = (
+        'symbol', 'count', 'columns', 'last_timestamp', 'first_close',
+        # 最近的K線與指標（僅保留評分需要的長度）
+        'closes', 'highs', 'lows', 'volumes', 'ma5_hist', 'ma20_hist', 'volume_ma_hist',
+        'rsi_hist', 'macd_hist', 'k_hist', 'histogram_hist', 'mid_channel_hist',
+        # 滾動與遞迴狀態
+        'ma5', 'ma10', 'ma20', 'ma30', 'ma60', 'gain', 'loss', 'std20', 'volume_ma',
+        'ema12', 'ema26', 'signal', 'low9', 'high9', 'k_ewm', 'd_ewm', 'obv', 'obv_ma',
+        'high20', 'low20', 'returns_std', 'close_min', 'close_max', 'sar_af', 'sar_max_af', 'sar_states',
+        'latest'
+    )
+
+    def __init__(self, symbol=None, af=None, max_af=None):
+        self.symbol = symbol
+        self.count = 0
+        self.columns = None
+        self.last_timestamp = None
+        self.first_close = NAN
+
+        self.closes = deque(maxlen=20)
+        self.highs = deque(maxlen=5)
+        self.lows = deque(maxlen=10)
+        self.volumes = deque(maxlen=6)
+        self.ma5_hist = deque(maxlen=5)
+        self.ma20_hist = deque(maxlen=5)
+        self.volume_ma_hist = deque(maxlen=5)
+        self.rsi_hist = deque(maxlen=5)
+        self.macd_hist = deque(maxlen=5)
+        self.k_hist = deque(maxlen=5)
+        self.histogram_hist = deque(maxlen=4)
+        self.mid_channel_hist = deque(maxlen=5)
+
+        self.ma5 = RollingMean(5)
+        self.ma10 = RollingMean(10)
+        self.ma20 = RollingMean(20)
+        self.ma30 = RollingMean(30)
+        self.ma60 = RollingMean(60)
+        self.gain = RollingMean(14)
+        self.loss = RollingMean(14)
+        self.std20 = RollingStd(20)
+        self.volume_ma = RollingMean(20)
+        self.ema12 = EWMean(span=12, adjust=False)
+        self.ema26 = EWMean(span=26, adjust=False)
+        self.signal = EWMean(span=9, adjust=False)
+        self.low9 = RollingExtreme(9, use_max=False)
+        self.high9 = RollingExtreme(9, use_max=True)
+        self.k_ewm = EWMean(com=2)
+        self.d_ewm = EWMean(com=2)
+        self.obv = 0.0
+        self.obv_ma = RollingMean(10)
+        self.high20 = RollingExtreme(20, use_max=True)
+        self.low20 = RollingExtreme(20, use_max=False)
+
+        # SAR：每個可能的波動性分級各自遞迴，依目前的波動率選擇
+        self.returns_std = RunningStd()
+        self.close_min = NAN
+        self.close_max = NAN
+        self.sar_af = af
+        self.sar_max_af = max_af
+        params = [(tier_af if af is None else af, tier_max_af if max_af is None else max_af)
+                  for tier_af, tier_max_af in [tier[1:] for tier in SAR_VOLATILITY_TIERS] + [SAR_DEFAULT_PARAMS]]
+        self.sar_states = [IncrementalSAR(a, m) for a, m in dict.fromkeys(params)]
+        self.latest = None
+
+    # --- 建立與序列化 ---
+
+    @classmethod
+    def from_history(cls, df, symbol=None, af=None, max_af=None):
+        """依序加入既有K線建立狀態"""
+        state = cls(symbol=symbol, af=af, max_af=max_af)
+        state.update_many(df)
+        return state
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    # --- 更新 ---
+
+    def update_many(self, df):
+        """依序加入多根K線，返回最後一列指標"""
+        if self.columns is None:
+            self.columns = list(df.columns)
+        columns = list(df.columns)
+        row = self.latest
+        for timestamp, values in zip(df.index, df.itertuples(index=False, name=None)):
+            row = self.update(dict(zip(columns, values)), timestamp=timestamp)
+        return row
+
+    def update(self, bar, timestamp=None):
+        """
+        加入一根新K線（dict 或 Series，需有 High / Low / Close / Volume）
+        返回最新一列的 {欄位: 值}；K線時間必須遞增
+        """
+        if isinstance(bar, pd.Series):
+            if timestamp is None:
+                timestamp = bar.name
+            bar = bar.to_dict()
+        if timestamp is not None:
+            timestamp = pd.Timestamp(timestamp).isoformat()
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                raise ValueError(f"{self.symbol or ''} K線時間必須遞增: {timestamp} <= {self.last_timestamp}")
+            self.last_timestamp = timestamp
+        if self.columns is None:
+            self.columns = list(bar)
+
+        high = float(bar['High'])
+        low = float(bar['Low'])
+        close = float(bar['Close'])
+        volume = float(bar['Volume'])
+        prev_close = self.closes[-1] if self.closes else NAN
+
+        self.count += 1
+        if self.count == 1:
+            self.first_close = close
+        self.closes.append(close)
+        self.highs.append(high)
+        self.lows.append(low)
+        self.volumes.append(volume)
+        n = self.count
+
+        row = {column: bar.get(column, NAN) for column in self.columns}
+
+        # 移動平均線
+        ma5 = row['MA5'] = self.ma5.update(close)
+        row['MA10'] = self.ma10.update(close)
+        ma20 = row['MA20'] = self.ma20.update(close)
+        row['MA30'] = self.ma30.update(close)
+        row['MA60'] = self.ma60.update(close)
+        self.ma5_hist.append(ma5)
+        self.ma20_hist.append(ma20)
+
+        # RSI（同 delta.where(delta > 0, 0)：NaN 視為 0，下跌欄位的 0 為 -0.0）
+        delta = close - prev_close
+        gain = self.gain.update(delta if delta > 0 else 0.0)
+        loss = self.loss.update(-(delta if delta < 0 else 0.0))
+        rsi = row['RSI'] = 100 - (100 / (1 + _div(gain, loss)))
+        self.rsi_hist.append(rsi)
+
+        # MACD
+        macd = row['MACD'] = self.ema12.update(close) - self.ema26.update(close)
+        macd_signal = row['MACD_Signal'] = self.signal.update(macd)
+        histogram = row['MACD_Histogram'] = macd - macd_signal
+        self.macd_hist.append(macd)
+        self.histogram_hist.append(histogram)
+
+        # 布林通道
+        bb_std = self.std20.update(close)
+        row['BB_Middle'] = ma20
+        bb_upper = row['BB_Upper'] = ma20 + (bb_std * 2)
+        bb_lower = row['BB_Lower'] = ma20 - (bb_std * 2)
+
+        # 成交量指標
+        volume_ma = row['Volume_MA'] = self.volume_ma.update(volume)
+        volume_ratio = row['Volume_Ratio'] = _div(volume, volume_ma)
+        self.volume_ma_hist.append(volume_ma)
+
+        # 價格動量
+        momentum = row['Price_Momentum'] = _pct_change(close, _recent(self.closes, 6))
+
+        # KD指標
+        low_min = self.low9.update(low)
+        high_max = self.high9.update(high)
+        rsv = row['RSV'] = _div(close - low_min, high_max - low_min) * 100
+        k = row['K'] = self.k_ewm.update(rsv)
+        d = row['D'] = self.d_ewm.update(k)
+        self.k_hist.append(k)
+
+        # SAR指標
+        sar = row['SAR'] = self._update_sar(low, high, close, prev_close)
+
+        # OBV指標
+        sign = NAN if delta != delta else (delta > 0) - (delta < 0)
+        step = sign * volume
+        self.obv += step if step == step else 0.0
+        obv = row['OBV'] = self.obv
+        obv_ma = row['OBV_MA'] = self.obv_ma.update(obv)
+
+        # ADX：批次計算的結果索引與K線不對齊，固定為 0
+        adx = row['ADX'] = 0.0
+
+        # 均線多頭排列強度
+        row['MA_Bullish_Strength'] = self._ma_bullish_strength(row, n)
+
+        # 價格通道斜率
+        mid_channel = (self.high20.update(high) + self.low20.update(low)) / 2
+        self.mid_channel_hist.append(mid_channel)
+        if n >= 25:
+            prev_mid = self.mid_channel_hist[-5]
+            row['Price_Channel_Slope'] = _div(mid_channel - prev_mid, prev_mid) * 100
+        else:
+            row['Price_Channel_Slope'] = 0
+
+        # 成交量趨勢配合度
+        alignment_score = 0
+        if n > 5:
+            price_trend = momentum
+            volume_trend = _pct_change(volume, self.volumes[-6])
+            if price_trend > 0 and volume_trend > 0:
+                alignment_score += 50
+            if price_trend < 0 and volume_trend < 0:
+                alignment_score += 30
+            if volume_ma > self.volume_ma_hist[-5]:
+                alignment_score += 20
+        row['Volume_Trend_Alignment'] = alignment_score
+
+        # 動量加速度
+        momentum_10d = _pct_change(close, _recent(self.closes, 11))
+        row['Momentum_Acceleration'] = momentum - momentum_10d if n >= 10 else 0
+
+        # 技術指標斜率變化
+        row['RSI_Slope'] = rsi - _recent(self.rsi_hist, 4)
+        row['MACD_Slope'] = macd - _recent(self.macd_hist, 4)
+        row['K_Slope'] = k - _recent(self.k_hist, 4)
+
+        # 相對強度比較（20根前，不足時用第一根）
+        base_price = self.closes[-20] if n >= 20 else self.first_close
+        row['Relative_Strength'] = (_div(close, base_price) - 1) * 100
+
+        # 上漲動能延續性
+        row['Uptrend_Continuity'] = self._uptrend_continuity(n)
+
+        # 波動率評估
+        volatility = row['Volatility'] = bb_std
+        row['Volatility_Ratio'] = _div(volatility, ma20)
+
+        # 動態停損建議
+        atr = volatility * 2
+        row['Dynamic_Stop_Loss'] = close - (atr * 2)
+
+        # 支撐位可靠性
+        supports = [ma20, row['MA30'], bb_lower, sar]
+        support_reliability = sum(1 for s in supports if close > s * 0.95 and close < s * 1.05) * 25
+        row['Support_Reliability'] = support_reliability
+
+        bb_position = _div(close - bb_lower, bb_upper - bb_lower)
+        row['Trend_Reversal_Confirmation'] = self._trend_reversal_confirmation(
+            close, ma20, ma5, rsi, macd, histogram, k, d, volume_ratio, momentum, bb_position)
+        row['Reversal_Strength'] = self._reversal_strength(
+            momentum, momentum_10d, row, volume_ratio)
+        row['Reversal_Reliability'] = self._reversal_reliability(
+            close, rsi, macd, histogram, k, d, sar, obv, obv_ma, volume_ratio, bb_position, adx,
+            support_reliability)
+        row['Short_Term_Momentum_Turn'] = self._short_term_momentum_turn(close, rsi, histogram, n)
+        row['Price_Structure_Reversal'] = self._price_structure_reversal(close, ma20, bb_lower, sar, n)
+
+        self.latest = row
+        return row
+
+    # --- 指標與評分（邏輯同 IntegratedStockAnalyzer 的對應方法，只計算最新一列）---
+
+    def _update_sar(self, low, high, close, prev_close):
+        volatility = self.returns_std.update(_pct_change(close, prev_close)) * np.sqrt(252)
+        if close == close:
+            if self.close_min != self.close_min or close < self.close_min:
+                self.close_min = close
+            if self.close_max != self.close_max or close > self.close_max:
+                self.close_max = close
+
+        values = [sar_state.update(low, high, close) for sar_state in self.sar_states]
+        if self.count < INITIAL_BARS:
+            return self.first_close * 0.98
+
+        params = select_sar_params(volatility, self.sar_af, self.sar_max_af)
+        sar = NAN
+        for sar_state, value in zip(self.sar_states, values):
+            if (sar_state.af, sar_state.max_af) == params:
+                sar = value
+                break
+
+        # 限制在合理範圍內（同 Series.clip，上下限為 NaN 時不限制）
+        lower = self.close_min * 0.5
+        upper = self.close_max * 1.5
+        if lower == lower and sar < lower:
+            sar = lower
+        if upper == upper and sar > upper:
+            sar = upper
+        return sar
+
+    def _ma_bullish_strength(self, row, n):
+        ma5, ma10, ma20, ma30, ma60 = row['MA5'], row['MA10'], row['MA20'], row['MA30'], row['MA60']
+        bullish_count = 0
+        total_checks = 6
+        if ma5 > ma10:
+            bullish_count += 1
+        if ma10 > ma20:
+            bullish_count += 1
+        if ma20 > ma30:
+            bullish_count += 1
+        if ma30 > ma60:
+            bullish_count += 1
+
+        ma5_slope = _div(ma5 - self.ma5_hist[-5], self.ma5_hist[-5]) if n >= 5 else 0
+        ma20_slope = _div(ma20 - self.ma20_hist[-5], self.ma20_hist[-5]) if n >= 5 else 0
+        if ma5_slope > 0:
+            bullish_count += 1
+        if ma20_slope > 0:
+            bullish_count += 1
+        return bullish_count / total_checks * 100
+
+    def _uptrend_continuity(self, n):
+        closes = self.closes
+        up_days = 0
+        for i in range(min(10, n - 1)):
+            if closes[-(i + 1)] > closes[-(i + 2)]:
+                up_days += 1
+            else:
+                break
+        continuity_score = up_days * 10
+
+        if n >= 5:
+            if self.rsi_hist[-1] > self.rsi_hist[-5]:
+                continuity_score += 20
+            if self.macd_hist[-1] > self.macd_hist[-5]:
+                continuity_score += 20
+            if self.k_hist[-1] > self.k_hist[-5]:
+                continuity_score += 20
+        return continuity_score
+
+    @staticmethod
+    def _trend_reversal_confirmation(close, ma20, ma5, rsi, macd, histogram, k, d, volume_ratio,
+                                     momentum, bb_position):
+        score = 0
+        if close > ma20 and close > ma5:
+            score += 20
+        elif close > ma20:
+            score += 10
+
+        if rsi > 30 and rsi < 60:
+            score += 15
+        elif rsi < 30:
+            score += 10
+
+        if macd > 0 and histogram > 0:
+            score += 15
+        elif macd > 0:
+            score += 10
+
+        if k > d and k < 40:
+            score += 10
+
+        if volume_ratio > 1.2:
+            score += 10
+        elif volume_ratio > 1.0:
+            score += 5
+
+        if momentum > 0:
+            score += 10
+
+        if bb_position < 0.5:
+            score += 10
+        elif bb_position < 0.7:
+            score += 5
+        return min(100, score)
+
+    @staticmethod
+    def _reversal_strength(momentum_5d, momentum_10d, row, volume_ratio):
+        score = 0
+        if momentum_5d > 0.02:
+            score += 20
+        elif momentum_5d > 0:
+            score += 10
+
+        if momentum_10d > 0.05:
+            score += 15
+        elif momentum_10d > 0:
+            score += 10
+
+        positive_slopes = sum([row['RSI_Slope'] > 0, row['MACD_Slope'] > 0, row['K_Slope'] > 0])
+        if positive_slopes == 3:
+            score += 20
+        elif positive_slopes == 2:
+            score += 15
+        elif positive_slopes == 1:
+            score += 10
+
+        if volume_ratio > 1.5:
+            score += 15
+        elif volume_ratio > 1.2:
+            score += 10
+        elif volume_ratio > 1.0:
+            score += 5
+
+        ma_bullish_strength = row['MA_Bullish_Strength']
+        if ma_bullish_strength > 80:
+            score += 15
+        elif ma_bullish_strength > 60:
+            score += 10
+
+        price_channel_slope = row['Price_Channel_Slope']
+        if price_channel_slope > 1:
+            score += 10
+        elif price_channel_slope > 0:
+            score += 5
+        return min(100, score)
+
+    @staticmethod
+    def _reversal_reliability(close, rsi, macd, histogram, k, d, sar, obv, obv_ma, volume_ratio,
+                              bb_position, adx, support_reliability):
+        score = 0
+        bullish_indicators = 0
+        if 30 < rsi < 70:
+            bullish_indicators += 1
+        if macd > 0 and histogram > 0:
+            bullish_indicators += 1
+        elif macd > 0:
+            bullish_indicators += 0.5
+        if k > d and k < 40:
+            bullish_indicators += 1
+        if close > sar:
+            bullish_indicators += 1
+        if obv > obv_ma:
+            bullish_indicators += 1
+
+        if bullish_indicators >= 4:
+            score += 30
+        elif bullish_indicators >= 3:
+            score += 20
+        elif bullish_indicators >= 2:
+            score += 15
+
+        if 0.8 <= volume_ratio <= 2.0:
+            score += 20
+        elif volume_ratio > 2.0:
+            score += 10
+
+        if 0.2 <= bb_position <= 0.7:
+            score += 20
+        elif bb_position < 0.2:
+            score += 15
+        elif bb_position > 0.8:
+            score += 5
+
+        if 20 <= adx <= 40:
+            score += 15
+        elif adx > 40:
+            score += 10
+        elif adx < 20:
+            score += 5
+
+        if support_reliability > 60:
+            score += 15
+        elif support_reliability > 40:
+            score += 10
+        return min(100, score)
+
+    def _short_term_momentum_turn(self, close, rsi, histogram, n):
+        turn_score = 0
+        if n >= 7:
+            momentum_3d = _pct_change(close, self.closes[-4])
+            momentum_7d = _pct_change(close, _recent(self.closes, 8))
+            if momentum_3d > 0 and momentum_3d > momentum_7d:
+                turn_score += 30
+
+            if self.rsi_hist[-4] < 40 and rsi > 45:
+                turn_score += 25
+
+            if self.histogram_hist[-4] < 0 and histogram > 0:
+                turn_score += 25
+
+            lows = self.lows
+            low_1 = _nanmin([lows[-5], lows[-4], lows[-3]])
+            low_2 = _nanmin([lows[-2], lows[-1]])
+            if low_2 > low_1:
+                turn_score += 20
+        return turn_score
+
+    def _price_structure_reversal(self, close, ma20, bb_lower, sar, n):
+        structure_score = 0
+        if n >= 10:
+            # 雙底或W底結構
+            lows = self.lows
+            low_points = []
+            for i in range(1, len(lows) - 1):
+                if lows[i] < lows[i - 1] and lows[i] < lows[i + 1]:
+                    low_points.append(lows[i])
+            if len(low_points) >= 2 and low_points[-1] > low_points[-2]:
+                structure_score += 40
+
+            # 突破頸線
+            neckline = _nanmax(self.highs)
+            if close > neckline * 0.98:
+                structure_score += 30
+
+            # 價格在支撐位反彈
+            for support in (ma20, bb_lower, sar):
+                if 0.98 < _div(close, support) < 1.02:
+                    structure_score += 15
+                    break
+        return structure_score
@@ -19,7 +19,6 @@ if sys.platform.startswith('win'):
     except:
         pass
 import numpy as np
-import yfinance as yf
 from datetime import datetime
 import warnings
 import time
@@ -28,6 +27,58 @@ warnings.filterwarnings('ignore')
 from pathlib import Path
 from enhanced_confirmation_system import EnhancedConfirmationSystem
 from multi_timeframe_analyzer import MultiTimeframeAnalyzer
+from market_data_cache import get_market_data_cache, SymbolDataContext, DEFAULT_MAX_AGE
+from symbol_metadata import get_symbol_metadata_store
+from market_sentiment import get_market_sentiment_engine
+from async_fetcher import classify_error, ERROR_NOT_FOUND, ERROR_TIMEOUT
+from negative_cache import NegativeCacheHit
+from sar_engine import calculate_sar, sar_flip_signals
+import trend_scores
+from indicator_registry import compute as compute_indicators, compute_frame as compute_indicator_frame, adx as indicator_adx
+from panel_indicators import IndicatorPanel
+from analysis_context import context_for
+from indicator_frame import IndicatorFrame
+from signal_journal import get_signal_journal
+from symbol_analysis import SymbolAnalysis
+
+# detect_bullish_signals 使用的欄位
+SIGNAL_COLUMNS = (
+    'Close', 'SAR', 'RSI', 'MACD', 'MACD_Histogram', 'K', 'D', 'MA5', 'MA20', 'BB_Upper', 'BB_Lower',
+    'Volume_Ratio', 'OBV', 'OBV_MA', 'Price_Momentum', 'ADX', 'MA_Bullish_Strength', 'Price_Channel_Slope',
+    'Volume_Trend_Alignment', 'Momentum_Acceleration', 'RSI_Slope', 'MACD_Slope', 'Relative_Strength',
+    'Uptrend_Continuity', 'Trend_Reversal_Confirmation', 'Reversal_Strength', 'Reversal_Reliability',
+    'Short_Term_Momentum_Turn', 'Price_Structure_Reversal',
+)
+
+
+# 趨勢反轉相關的多頭條件（訊號至少需包含其中 2 個）
+REVERSAL_CONDITIONS = ("趨勢反轉確認", "反轉強度強勁", "反轉可信度高", "短期動能轉折", "價格結構反轉")
+
+# 訊號之間至少間隔的天數
+SIGNAL_COOLDOWN_DAYS = 3
+
+
+def _trailing_mean_change(closes, window=5):
+    """
+    逐列的近期平均漲跌幅：第 i 個值同 Series(closes[i-window:i]).pct_change().mean()
+    （忽略 NaN，依原本的順序累加，與逐列計算逐位元相同）
+    """
+    n = len(closes)
+    changes = np.full(n, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes[1:] = closes[1:] / closes[:-1] - 1
+
+    total = np.zeros(n)
+    count = np.zeros(n)
+    for offset in range(window - 1, 0, -1):
+        shifted = np.full(n, np.nan)
+        shifted[offset:] = changes[:n - offset]
+        valid = ~np.isnan(shifted)
+        total = np.where(valid, total + shifted, total)
+        count += valid
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(count > 0, total / count, np.nan)
+
 
 class IntegratedStockAnalyzer:
     def __init__(self, watchlist_file='stock_watchlist.json'):
@@ -37,6 +88,15 @@ class IntegratedStockAnalyzer:
         self.market_sentiment = None  # 市場情緒指標
         self.confirmation_system = EnhancedConfirmationSystem()  # 強化確認系統
         self.mtf_analyzer = MultiTimeframeAnalyzer()  # 多時間框架分析器
+        self.data_cache = get_market_data_cache()  # 本地K線快取
+        self.metadata_store = get_symbol_metadata_store()  # 本地股票基本資料表
+        self.prefetched_data = {}  # 批量預載的日線數據
+        self.symbol_contexts = {}  # 本次執行中每支股票共用的日線上下文
+        self.run_started_at = None  # 本次執行的預載數據與日線上下文建立時間
+        self.run_max_age = DEFAULT_MAX_AGE  # 超過此秒數後重新讀取K線快取（與快取的新鮮度相同）
+        self.indicator_panel = None  # 觀察清單的橫截面矩陣指標
+        self.context_period = '2y'  # 各分析階段所需的最長日線歷史（多時間框架分析）
+        self.signal_journal = get_signal_journal()  # 每支股票已確認K線的多頭訊號日誌
         
     def load_watchlist(self):
         try:
@@ -47,371 +107,159 @@ class IntegratedStockAnalyzer:
             return {"stocks": []}
     
     def get_stock_info(self, symbol):
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            name = info.get('longName', info.get('shortName', symbol))
-            if '.TW' in symbol:
-                market = 'TWSE'
-            elif '.HK' in symbol:
-                market = 'HKEX'
-            else:
-                market = 'US'
-            return {'symbol': symbol, 'name': name, 'market': market}
-        except Exception as e:
-            return {'symbol': symbol, 'name': symbol, 'market': 'Unknown'}
+        # 從本地基本資料表讀取，過期資料由背景執行緒更新
+        return self.metadata_store.get(symbol)
     
-    def get_stock_data(self, symbol, period='60d', max_retries=3):
+    def get_stock_data(self, symbol, period='60d'):
         # 檢查股票代號有效性
         if not symbol or symbol in ['UNKNOWN', '$UNKNOWN'] or symbol.startswith('$'):
             return None
 
-        for attempt in range(max_retries):
+        # 網路請求的重試（依錯誤類別退避）由共用的數據擷取器處理
+        try:
+            data = self.get_symbol_context(symbol).slice(period)
+
+            if data.empty:
+                try:
+                    print(f"  ⚠️  {symbol}: 無數據返回")
+                except UnicodeEncodeError:
+                    print(f"  WARNING {symbol}: 無數據返回")
+                return None
+
+            if len(data) < 30:
+                try:
+                    print(f"  ⚠️  {symbol}: 數據不足 ({len(data)}天)")
+                except UnicodeEncodeError:
+                    print(f"  WARNING {symbol}: 數據不足 ({len(data)}天)")
+                return None
+
+            return data
+
+        except NegativeCacheHit as e:
+            # 已知失敗的股票，到期前不再發出請求
+            try:
+                print(f"  ⏭️  {e}")
+            except UnicodeEncodeError:
+                print(f"  SKIP {symbol}: {e.entry['reason']}")
+
+        except Exception as e:
+            error_msg = str(e)
+            error_class = classify_error(e)
+
             try:
-                ticker = yf.Ticker(symbol)
-                data = ticker.history(period=period, timeout=60)
-
-                if data.empty:
-                    if attempt == 0:  # 只在第一次嘗試時顯示警告
-                        try:
-                            print(f"  ⚠️  {symbol}: 無數據返回")
-                        except UnicodeEncodeError:
-                            print(f"  WARNING {symbol}: 無數據返回")
-                    return None
-
-                if len(data) < 30:
-                    if attempt == 0:
-                        try:
-                            print(f"  ⚠️  {symbol}: 數據不足 ({len(data)}天)")
-                        except UnicodeEncodeError:
-                            print(f"  WARNING {symbol}: 數據不足 ({len(data)}天)")
-                    return None
-
-                return data
-
-            except Exception as e:
-                error_msg = str(e)
-
-                if attempt == 0:  # 只在第一次嘗試時顯示詳細錯誤
-                    try:
-                        if "404" in error_msg or "delisted" in error_msg.lower():
-                            print(f"  ❌ {symbol}: 股票可能已下市")
-                            return None  # 不重試下市股票
-                        elif "No data found" in error_msg:
-                            print(f"  ❌ {symbol}: 無數據")
-                            return None  # 不重試無數據股票
-                        elif "timeout" in error_msg.lower():
-                            print(f"  ⏳ {symbol}: 請求超時，重試中...")
-                        else:
-                            print(f"  ❌ {symbol}: 獲取數據失敗 - {error_msg}")
-                    except UnicodeEncodeError:
-                        if "404" in error_msg or "delisted" in error_msg.lower():
-                            print(f"  ERROR {symbol}: 股票可能已下市")
-                            return None
-                        elif "No data found" in error_msg:
-                            print(f"  ERROR {symbol}: 無數據")
-                            return None
-                        elif "timeout" in error_msg.lower():
-                            print(f"  TIMEOUT {symbol}: 請求超時，重試中...")
-                        else:
-                            print(f"  ERROR {symbol}: 獲取數據失敗 - {error_msg}")
-
-                if attempt < max_retries - 1:
-                    time.sleep(2)  # 等待後重試
+                if error_class == ERROR_NOT_FOUND:
+                    print(f"  ❌ {symbol}: 股票可能已下市或無數據")
+                elif error_class == ERROR_TIMEOUT:
+                    print(f"  ⏳ {symbol}: 請求超時")
                 else:
-                    return None
+                    print(f"  ❌ {symbol}: 獲取數據失敗 - {error_msg}")
+            except UnicodeEncodeError:
+                if error_class == ERROR_NOT_FOUND:
+                    print(f"  ERROR {symbol}: 股票可能已下市或無數據")
+                elif error_class == ERROR_TIMEOUT:
+                    print(f"  TIMEOUT {symbol}: 請求超時")
+                else:
+                    print(f"  ERROR {symbol}: 獲取數據失敗 - {error_msg}")
 
         return None
     
-    def calculate_technical_indicators(self, data):
-        if data is None or data.empty:
-            return None
-            
-        df = data.copy()
-        
-        # 移動平均線
-        df['MA5'] = df['Close'].rolling(window=5).mean()
-        df['MA10'] = df['Close'].rolling(window=10).mean()
-        df['MA20'] = df['Close'].rolling(window=20).mean()
-        df['MA30'] = df['Close'].rolling(window=30).mean()
-        df['MA60'] = df['Close'].rolling(window=60).mean()
-        
-        # RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-        
-        # MACD
-        exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = exp1 - exp2
-        df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        df['MACD_Histogram'] = df['MACD'] - df['MACD_Signal']
-        
-        # 布林通道
-        df['BB_Middle'] = df['Close'].rolling(window=20).mean()
-        bb_std = df['Close'].rolling(window=20).std()
-        df['BB_Upper'] = df['BB_Middle'] + (bb_std * 2)
-        df['BB_Lower'] = df['BB_Middle'] - (bb_std * 2)
-        
-        # 成交量指標
-        df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
-        df['Volume_Ratio'] = df['Volume'] / df['Volume_MA']
-        
-        # 價格動量
-        df['Price_Momentum'] = df['Close'].pct_change(periods=5)
-        
-        # KD指標
-        low_min = df['Low'].rolling(window=9).min()
-        high_max = df['High'].rolling(window=9).max()
-        df['RSV'] = (df['Close'] - low_min) / (high_max - low_min) * 100
-        df['K'] = df['RSV'].ewm(com=2).mean()
-        df['D'] = df['K'].ewm(com=2).mean()
-        
-        # SAR指標
-        df['SAR'] = self.calculate_sar(df)
-        
-        # OBV指標
-        df['OBV'] = (np.sign(df['Close'].diff()) * df['Volume']).fillna(0).cumsum()
-        df['OBV_MA'] = df['OBV'].rolling(window=10).mean()
-        
-        # ADX趨勢強度指標
-        df['ADX'] = self.calculate_adx(df)
-        
-        # 均線多頭排列強度
-        df['MA_Bullish_Strength'] = self.calculate_ma_bullish_strength(df)
-        
-        # 價格通道斜率
-        df['Price_Channel_Slope'] = self.calculate_price_channel_slope(df)
-        
-        # 成交量趨勢配合度
-        df['Volume_Trend_Alignment'] = self.calculate_volume_trend_alignment(df)
-        
-        # 動量加速度指標
-        df['Momentum_Acceleration'] = self.calculate_momentum_acceleration(df)
-        
-        # 技術指標斜率變化
-        df['RSI_Slope'] = df['RSI'].diff(periods=3)
-        df['MACD_Slope'] = df['MACD'].diff(periods=3)
-        df['K_Slope'] = df['K'].diff(periods=3)
-        
-        # 相對強度比較
-        df['Relative_Strength'] = self.calculate_relative_strength(df)
-        
-        # 上漲動能延續性
-        df['Uptrend_Continuity'] = self.calculate_uptrend_continuity(df)
-        
-        # 波動率評估
-        df['Volatility'] = df['Close'].rolling(window=20).std()
-        df['Volatility_Ratio'] = df['Volatility'] / df['Close'].rolling(window=20).mean()
-        
-        # 動態停損建議
-        df['Dynamic_Stop_Loss'] = self.calculate_dynamic_stop_loss(df)
-        
-        # 支撐位可靠性
-        df['Support_Reliability'] = self.calculate_support_reliability(df)
-        
-        # ===== 新增：短期趨勢反轉識別指標 =====
-        
-        # 趨勢反轉確認指標
-        df['Trend_Reversal_Confirmation'] = self.calculate_trend_reversal_confirmation(df)
-        
-        # 反轉強度評估
-        df['Reversal_Strength'] = self.calculate_reversal_strength(df)
-        
-        # 反轉可信度驗證
-        df['Reversal_Reliability'] = self.calculate_reversal_reliability(df)
-        
-        # 短期動能轉折點
-        df['Short_Term_Momentum_Turn'] = self.calculate_short_term_momentum_turn(df)
-        
-        # 價格結構反轉
-        df['Price_Structure_Reversal'] = self.calculate_price_structure_reversal(df)
-        
-        return df
-    
-    def calculate_sar(self, df, af=None, max_af=None):
+    def expire_run_state(self):
         """
-        智能動態SAR計算
-        根據股票波動性自動調整參數
+        預載數據、橫截面指標與日線上下文只在一次執行中有效；
+        長時間存活的分析器（後端服務）超過 run_max_age 後清除，下次分析重新讀取K線快取
         """
-        # 計算股票的歷史波動性
-        volatility = df['Close'].pct_change().std() * np.sqrt(252)
-
-        # 根據波動性動態調整參數
-        if af is None:
-            if volatility > 0.4:  # 高波動股票
-                af = 0.015  # 較小的加速因子，避免過於敏感
-            elif volatility > 0.25:  # 中等波動
-                af = 0.02   # 標準參數
-            else:  # 低波動股票
-                af = 0.025  # 較大的加速因子，提高敏感度
-
-        if max_af is None:
-            if volatility > 0.4:
-                max_af = 0.15  # 降低最大加速因子
-            elif volatility > 0.25:
-                max_af = 0.2   # 標準參數
-            else:
-                max_af = 0.25  # 提高最大加速因子
+        if self.run_started_at is not None and time.time() - self.run_started_at > self.run_max_age:
+            self.prefetched_data = {}
+            self.symbol_contexts = {}
+            self.indicator_panel = None
+            self.run_started_at = None
 
-        # 改進的初始趨勢判斷
-        if len(df) < 5:
-            # 對於數據不足的情況，返回一個簡單的SAR序列
-            close_price = df['Close'].iloc[0] if not df.empty else 0
-            return pd.Series([close_price * 0.98] * len(df), index=df.index)
-
-        # 使用前5天的趨勢來判斷初始方向
-        initial_trend = 1 if df['Close'].iloc[4] > df['Close'].iloc[0] else -1
-
-        sar = []
-        if initial_trend == 1:
-            sar.append(df['Low'].iloc[:5].min())
-            ep = df['High'].iloc[:5].max()
-        else:
-            sar.append(df['High'].iloc[:5].max())
-            ep = df['Low'].iloc[:5].min()
-
-        trend = initial_trend
-        af_val = af
-
-        for i in range(1, len(df)):
-            prev_sar = sar[-1]
-
-            if trend == 1:  # 上升趨勢
-                sar_val = prev_sar + af_val * (ep - prev_sar)
-
-                # 防止SAR超過前兩天的最低價
-                if i >= 2:
-                    sar_val = min(sar_val, df['Low'].iloc[i-1], df['Low'].iloc[i-2])
-
-                if df['Low'].iloc[i] < sar_val:
-                    # 趨勢反轉
-                    trend = -1
-                    sar_val = ep
-                    ep = df['Low'].iloc[i]
-                    af_val = af
-                else:
-                    if df['High'].iloc[i] > ep:
-                        ep = df['High'].iloc[i]
-                        af_val = min(af_val + af, max_af)
-            else:  # 下降趨勢
-                sar_val = prev_sar + af_val * (ep - prev_sar)
-
-                # 防止SAR低於前兩天的最高價
-                if i >= 2:
-                    sar_val = max(sar_val, df['High'].iloc[i-1], df['High'].iloc[i-2])
-
-                if df['High'].iloc[i] > sar_val:
-                    # 趨勢反轉
-                    trend = 1
-                    sar_val = ep
-                    ep = df['High'].iloc[i]
-                    af_val = af
-                else:
-                    if df['Low'].iloc[i] < ep:
-                        ep = df['Low'].iloc[i]
-                        af_val = min(af_val + af, max_af)
-
-            sar.append(sar_val)
-
-        # 確保返回的SAR序列沒有無效值
-        sar_series = pd.Series(sar, index=df.index)
+    def get_symbol_context(self, symbol):
+        """
+        取得股票在本次執行中共用的日線上下文
+        只取得一次最長所需歷史，之後各階段都從同一份數據切片
+        """
+        self.expire_run_state()
+        if self.run_started_at is None:
+            self.run_started_at = time.time()
+        context = self.symbol_contexts.get(symbol)
+        if context is None:
+            daily = self.prefetched_data.get(symbol)
+            if daily is None:
+                daily = self.data_cache.get_history(symbol, period=self.context_period, timeout=60)
+            context = SymbolDataContext(symbol, daily)
+            self.symbol_contexts[symbol] = context
+        return context
+
+    def prefetch_data(self, symbols):
+        """
+        批量預載多支股票的日線數據
+        以分組的 yf.download 取代逐支下載，結果保存在記憶體中供 get_symbol_context 使用
+        """
+        valid_symbols = [s for s in symbols if s and s not in ['UNKNOWN', '$UNKNOWN'] and not s.startswith('$')]
+        print(f"正在批量預載 {len(valid_symbols)} 支股票的日線數據...")
+
+        self.symbol_contexts = {}
+        self.run_started_at = time.time()
+        self.prefetched_data = self.data_cache.get_histories(valid_symbols, period=self.context_period)
+        # 一次補齊基本資料表中缺少的股票，之後 get_stock_info 不再發出請求
+        self.metadata_store.get_many(valid_symbols)
+        # 均線、RSI、MACD 等矩陣指標對整個清單一次算完，analyze_stock 直接取用
+        self.indicator_panel = self.build_indicator_panel(valid_symbols)
+
+        print(f"預載完成: {len(self.prefetched_data)}/{len(valid_symbols)} 支股票")
+        return self.prefetched_data
+    
+    def build_indicator_panel(self, symbols, period='60d'):
+        """以預載的日線建立橫截面指標（與 get_stock_data 使用相同的切片）"""
+        histories = {}
+        for symbol in symbols:
+            if symbol not in self.prefetched_data:
+                continue
+            try:
+                histories[symbol] = self.get_symbol_context(symbol).slice(period)
+            except Exception:
+                continue
 
-        # 處理可能的無效值
-        sar_series = sar_series.ffill()  # 前向填充
-        sar_series = sar_series.fillna(df['Close'])     # 如果還有NaN，用收盤價填充
+        try:
+            return IndicatorPanel.from_histories(histories)
+        except Exception as e:
+            print(f"⚠️ 橫截面指標計算失敗，改為逐支計算: {e}")
+            return None
 
-        # 確保SAR值在合理範圍內（不能是負數或過大）
-        sar_series = sar_series.clip(lower=df['Close'].min() * 0.5, upper=df['Close'].max() * 1.5)
+    def calculate_technical_indicators(self, data, sar=None, want=None):
+        """
+        計算技術指標（由 indicator_registry 依依賴關係計算）
+        sar 可傳入預先計算的SAR序列（例如回測中 PrefixSAR 的結果），省略時重新計算
+        want 為需要的指標名稱集合，省略時計算全部指標
+        """
+        return compute_indicators(data, want=want, sar=sar)
 
-        return sar_series
+    def calculate_indicator_frame(self, data, sar=None, want=None, symbol=None):
+        """
+        同 calculate_technical_indicators，但返回陣列式的 IndicatorFrame
+        分析流程直接讀取其欄位，需要 DataFrame 時呼叫 to_pandas()
+        傳入 symbol 且橫截面指標涵蓋同一份數據時，直接沿用其矩陣指標
+        """
+        precomputed = None
+        if symbol is not None and self.indicator_panel is not None and data is not None:
+            precomputed = self.indicator_panel.columns_for(symbol, data)
+        return compute_indicator_frame(data, want=want, sar=sar, precomputed=precomputed)
+    
+    def calculate_sar(self, df, af=None, max_af=None):
+        """
+        智能動態SAR計算
+        根據股票波動性自動調整參數（由 sar_engine 在 NumPy 陣列上計算）
+        """
+        return calculate_sar(df, af=af, max_af=max_af)
 
-    def analyze_market_sentiment(self):
+    def analyze_market_sentiment(self, as_of=None):
         """
         分析整體市場情緒
-        使用SPY、QQQ、VIX等指標
+        使用SPY、QQQ、VIX等指標，由共用的每日情緒序列查詢 as_of 當日的值
         """
         try:
-            # 獲取市場指標數據
-            spy_data = yf.download('SPY', period='30d', progress=False, auto_adjust=True)
-            qqq_data = yf.download('QQQ', period='30d', progress=False, auto_adjust=True)
-            vix_data = yf.download('^VIX', period='30d', progress=False, auto_adjust=True)
-
-            if spy_data.empty or qqq_data.empty:
-                return {'sentiment': 'neutral', 'score': 50, 'factors': ['數據不足']}
-
-            sentiment_score = 50  # 基準分數
-            factors = []
-
-            # SPY趨勢分析
-            spy_ma5 = spy_data['Close'].rolling(5).mean().iloc[-1]
-            spy_ma20 = spy_data['Close'].rolling(20).mean().iloc[-1]
-            spy_current = spy_data['Close'].iloc[-1]
-
-            if spy_current > spy_ma5 > spy_ma20:
-                sentiment_score += 15
-                factors.append("SPY多頭排列")
-            elif spy_current < spy_ma5 < spy_ma20:
-                sentiment_score -= 15
-                factors.append("SPY空頭排列")
-
-            # QQQ科技股趨勢
-            qqq_ma5 = qqq_data['Close'].rolling(5).mean().iloc[-1]
-            qqq_ma20 = qqq_data['Close'].rolling(20).mean().iloc[-1]
-            qqq_current = qqq_data['Close'].iloc[-1]
-
-            if qqq_current > qqq_ma5 > qqq_ma20:
-                sentiment_score += 10
-                factors.append("科技股強勢")
-            elif qqq_current < qqq_ma5 < qqq_ma20:
-                sentiment_score -= 10
-                factors.append("科技股弱勢")
-
-            # VIX恐慌指數分析
-            if not vix_data.empty:
-                vix_current = vix_data['Close'].iloc[-1]
-                vix_ma10 = vix_data['Close'].rolling(10).mean().iloc[-1]
-
-                if vix_current < 20:
-                    sentiment_score += 10
-                    factors.append("VIX低位，市場樂觀")
-                elif vix_current > 30:
-                    sentiment_score -= 15
-                    factors.append("VIX高位，市場恐慌")
-
-                if vix_current < vix_ma10:
-                    sentiment_score += 5
-                    factors.append("VIX下降趨勢")
-
-            # 近期波動性分析
-            spy_volatility = spy_data['Close'].pct_change().std() * np.sqrt(252)
-            if spy_volatility < 0.15:
-                sentiment_score += 5
-                factors.append("市場波動性低")
-            elif spy_volatility > 0.25:
-                sentiment_score -= 10
-                factors.append("市場波動性高")
-
-            # 確定情緒等級
-            if sentiment_score >= 70:
-                sentiment = 'bullish'
-            elif sentiment_score >= 55:
-                sentiment = 'positive'
-            elif sentiment_score >= 45:
-                sentiment = 'neutral'
-            elif sentiment_score >= 30:
-                sentiment = 'negative'
-            else:
-                sentiment = 'bearish'
-
-            return {
-                'sentiment': sentiment,
-                'score': sentiment_score,
-                'factors': factors
-            }
+            return get_market_sentiment_engine().as_of(as_of)
 
         except Exception as e:
             return {'sentiment': 'neutral', 'score': 50, 'factors': ['分析失敗']}
@@ -419,81 +267,18 @@ class IntegratedStockAnalyzer:
     def calculate_volatility_risk_score(self, df):
         """
         計算波動性風險評分
-        高波動性股票需要更嚴格的進場條件
+        高波動性股票需要更嚴格的進場條件（逐列結果見 trend_scores.volatility_risk）
         """
         try:
-            # 計算多種波動性指標
-            returns = df['Close'].pct_change().dropna()
-
-            # 1. 歷史波動率（年化）
-            historical_vol = returns.std() * np.sqrt(252)
-
-            # 2. 近期波動率（最近10天）
-            recent_vol = returns.tail(10).std() * np.sqrt(252)
-
-            # 3. 價格跳空分析
-            gaps = []
-            for i in range(1, len(df)):
-                gap = abs(df['Open'].iloc[i] - df['Close'].iloc[i-1]) / df['Close'].iloc[i-1]
-                gaps.append(gap)
-            avg_gap = np.mean(gaps) if gaps else 0
-
-            # 4. 日內波動率
-            intraday_vol = ((df['High'] - df['Low']) / df['Close']).mean()
-
-            # 風險評分計算
-            risk_score = 0
-            risk_factors = []
-
-            # 歷史波動率評估
-            if historical_vol > 0.4:
-                risk_score += 30
-                risk_factors.append("高歷史波動率")
-            elif historical_vol > 0.25:
-                risk_score += 15
-                risk_factors.append("中等波動率")
-            elif historical_vol < 0.15:
-                risk_score -= 10
-                risk_factors.append("低波動率")
-
-            # 近期波動率變化
-            if recent_vol > historical_vol * 1.5:
-                risk_score += 20
-                risk_factors.append("近期波動率激增")
-            elif recent_vol < historical_vol * 0.7:
-                risk_score -= 5
-                risk_factors.append("近期波動率下降")
-
-            # 跳空風險
-            if avg_gap > 0.03:
-                risk_score += 15
-                risk_factors.append("頻繁跳空")
-
-            # 日內波動
-            if intraday_vol > 0.05:
-                risk_score += 10
-                risk_factors.append("日內波動大")
-
-            # 確定風險等級
-            if risk_score >= 50:
-                risk_level = 'very_high'
-            elif risk_score >= 30:
-                risk_level = 'high'
-            elif risk_score >= 15:
-                risk_level = 'medium'
-            elif risk_score >= 0:
-                risk_level = 'low'
-            else:
-                risk_level = 'very_low'
-
+            risk = trend_scores.last_row(trend_scores.volatility_risk(df))
             return {
-                'risk_score': risk_score,
-                'risk_level': risk_level,
-                'historical_vol': historical_vol,
-                'recent_vol': recent_vol,
-                'avg_gap': avg_gap,
-                'intraday_vol': intraday_vol,
-                'risk_factors': risk_factors
+                'risk_score': int(risk['risk_score']),
+                'risk_level': risk['risk_level'],
+                'historical_vol': risk['historical_vol'],
+                'recent_vol': risk['recent_vol'],
+                'avg_gap': risk['avg_gap'],
+                'intraday_vol': risk['intraday_vol'],
+                'risk_factors': trend_scores.factor_labels(risk, trend_scores.RISK_FACTORS)
             }
 
         except Exception as e:
@@ -510,118 +295,16 @@ class IntegratedStockAnalyzer:
     def calculate_entry_timing_score(self, df):
         """
         計算進場時機評分
-        分析短期價格行為和動量特徵
+        分析短期價格行為和動量特徵（逐列結果見 trend_scores.entry_timing）
         """
         try:
-            timing_score = 0
-            timing_factors = []
-
-            # 1. 短期價格結構分析
-            recent_prices = df['Close'].tail(5)
-            recent_lows = df['Low'].tail(5)
-            recent_highs = df['High'].tail(5)
-            current_price = df['Close'].iloc[-1]
-
-            # 檢查是否在近期低點附近
-            recent_low = recent_lows.min()
-            if current_price <= recent_low * 1.02:
-                timing_score += 20
-                timing_factors.append("接近近期低點")
-
-            # 檢查是否形成雙底或多重底部
-            if len(recent_lows) >= 3:
-                low_points = []
-                for i in range(1, len(recent_lows)-1):
-                    if recent_lows.iloc[i] <= recent_lows.iloc[i-1] and recent_lows.iloc[i] <= recent_lows.iloc[i+1]:
-                        low_points.append(recent_lows.iloc[i])
-
-                if len(low_points) >= 2:
-                    # 檢查是否為上升底部
-                    if low_points[-1] > low_points[0]:
-                        timing_score += 25
-                        timing_factors.append("上升底部結構")
-
-            # 2. 短期動量分析
-            momentum_1d = df['Close'].pct_change(1).iloc[-1]
-            momentum_3d = df['Close'].pct_change(3).iloc[-1]
-            momentum_5d = df['Close'].pct_change(5).iloc[-1]
-
-            # 動量轉折檢測
-            if momentum_1d > 0 and momentum_3d <= 0:
-                timing_score += 15
-                timing_factors.append("短期動量轉正")
-
-            if momentum_1d > momentum_3d > momentum_5d:
-                timing_score += 10
-                timing_factors.append("動量加速向上")
-
-            # 3. 成交量確認
-            volume_ratio = df['Volume_Ratio'].iloc[-1]
-            volume_trend = df['Volume_Ratio'].tail(3).mean()
-
-            if volume_ratio > 1.2 and momentum_1d > 0:
-                timing_score += 15
-                timing_factors.append("放量上漲")
-            elif volume_ratio > 1.5 and momentum_1d < 0:
-                timing_score -= 10
-                timing_factors.append("放量下跌")
-
-            # 4. 技術指標同步性
-            rsi_current = df['RSI'].iloc[-1]
-            rsi_prev = df['RSI'].iloc[-2] if len(df) > 1 else rsi_current
-            macd_hist_current = df['MACD_Histogram'].iloc[-1]
-            macd_hist_prev = df['MACD_Histogram'].iloc[-2] if len(df) > 1 else macd_hist_current
-
-            # RSI從超賣區反彈
-            if rsi_prev < 35 and rsi_current > 35:
-                timing_score += 20
-                timing_factors.append("RSI超賣反彈")
-
-            # MACD柱狀圖轉正
-            if macd_hist_prev <= 0 and macd_hist_current > 0:
-                timing_score += 15
-                timing_factors.append("MACD柱狀圖轉正")
-
-            # 5. 支撐位測試
-            support_levels = [
-                df['MA20'].iloc[-1],
-                df['BB_Lower'].iloc[-1],
-                df['SAR'].iloc[-1]
-            ]
-
-            for support in support_levels:
-                if pd.notna(support) and 0.98 <= current_price / support <= 1.03:
-                    timing_score += 10
-                    timing_factors.append("測試關鍵支撐位")
-                    break
-
-            # 6. 反轉K線形態
-            if len(df) >= 3:
-                # 檢查錘子線或十字星
-                body_size = abs(df['Close'].iloc[-1] - df['Open'].iloc[-1])
-                total_range = df['High'].iloc[-1] - df['Low'].iloc[-1]
-                lower_shadow = min(df['Open'].iloc[-1], df['Close'].iloc[-1]) - df['Low'].iloc[-1]
-
-                if total_range > 0:
-                    body_ratio = body_size / total_range
-                    shadow_ratio = lower_shadow / total_range
-
-                    # 錘子線：小實體，長下影線
-                    if body_ratio < 0.3 and shadow_ratio > 0.6:
-                        timing_score += 15
-                        timing_factors.append("錘子線形態")
-
-                    # 十字星：極小實體
-                    elif body_ratio < 0.1:
-                        timing_score += 10
-                        timing_factors.append("十字星形態")
-
+            timing = trend_scores.last_row(trend_scores.entry_timing(df))
             return {
-                'timing_score': timing_score,
-                'timing_factors': timing_factors,
-                'momentum_1d': momentum_1d,
-                'momentum_3d': momentum_3d,
-                'volume_confirmation': volume_ratio > 1.2 and momentum_1d > 0
+                'timing_score': int(timing['timing_score']),
+                'timing_factors': trend_scores.factor_labels(timing, trend_scores.TIMING_FACTORS),
+                'momentum_1d': timing['momentum_1d'],
+                'momentum_3d': timing['momentum_3d'],
+                'volume_confirmation': bool(timing['volume_confirmation'])
             }
 
         except Exception as e:
@@ -636,831 +319,252 @@ class IntegratedStockAnalyzer:
     def calculate_enhanced_sar_signals(self, df):
         """
         增強的SAR信號計算，包含確認機制
+        直接使用指標表已計算的 SAR 欄位（沒有時才重新計算），以陣列運算找出翻轉與確認分數；
+        返回 {'sar', 'signal', 'score', 'factors', 'max_score'}，signal 為 SAR_BUY / SAR_SELL / 0，
+        factors 為確認因素位元遮罩（以 sar_signal_factors 轉回說明）
         """
-        sar = self.calculate_sar(df)
-        df_temp = df.copy()
-        df_temp['SAR'] = sar
-
-        signals = []
-        confirmations = []
-
-        for i in range(2, len(df_temp)):
-            current_price = df_temp['Close'].iloc[i]
-            current_sar = df_temp['SAR'].iloc[i]
-            prev_price = df_temp['Close'].iloc[i-1]
-            prev_sar = df_temp['SAR'].iloc[i-1]
-
-            # 基本SAR信號
-            basic_signal = None
-            if prev_price >= prev_sar and current_price < current_sar:
-                basic_signal = 'SELL'
-            elif prev_price <= prev_sar and current_price > current_sar:
-                basic_signal = 'BUY'
-
-            # 信號確認機制
-            confirmation_score = 0
-            confirmation_factors = []
-
-            if basic_signal == 'SELL':
-                # 賣出信號確認
-                # 1. 成交量確認
-                if df_temp['Volume_Ratio'].iloc[i] > 1.2:
-                    confirmation_score += 1
-                    confirmation_factors.append("放量下跌")
-
-                # 2. RSI確認
-                if df_temp['RSI'].iloc[i] > 60:
-                    confirmation_score += 1
-                    confirmation_factors.append("RSI偏高")
-
-                # 3. MACD確認
-                if (df_temp['MACD_Histogram'].iloc[i] < df_temp['MACD_Histogram'].iloc[i-1] and
-                    df_temp['MACD_Histogram'].iloc[i] < 0):
-                    confirmation_score += 1
-                    confirmation_factors.append("MACD轉弱")
-
-                # 4. 均線確認
-                if current_price < df_temp['MA5'].iloc[i]:
-                    confirmation_score += 1
-                    confirmation_factors.append("跌破5日均線")
-
-                # 5. 連續下跌確認
-                if (current_price < prev_price and
-                    prev_price < df_temp['Close'].iloc[i-2]):
-                    confirmation_score += 1
-                    confirmation_factors.append("連續下跌")
-
-            elif basic_signal == 'BUY':
-                # 買入信號確認（雖然主要用於停損，但可作為參考）
-                # 1. 成交量確認
-                if df_temp['Volume_Ratio'].iloc[i] > 1.2:
-                    confirmation_score += 1
-                    confirmation_factors.append("放量上漲")
-
-                # 2. RSI確認
-                if 30 < df_temp['RSI'].iloc[i] < 70:
-                    confirmation_score += 1
-                    confirmation_factors.append("RSI健康")
-
-                # 3. MACD確認
-                if (df_temp['MACD_Histogram'].iloc[i] > df_temp['MACD_Histogram'].iloc[i-1] and
-                    df_temp['MACD_Histogram'].iloc[i] > 0):
-                    confirmation_score += 1
-                    confirmation_factors.append("MACD轉強")
-
-            signals.append(basic_signal)
-            confirmations.append({
-                'score': confirmation_score,
-                'factors': confirmation_factors,
-                'max_score': 5 if basic_signal == 'SELL' else 3
-            })
-
-        # 補齊前面的空值
-        signals = [None, None] + signals
-        confirmations = [{'score': 0, 'factors': [], 'max_score': 0},
-                        {'score': 0, 'factors': [], 'max_score': 0}] + confirmations
-
-        return {
-            'sar': sar,
-            'signals': signals,
-            'confirmations': confirmations
-        }
+        sar = df['SAR'] if 'SAR' in df.columns else self.calculate_sar(df)
+        result = sar_flip_signals(df['Close'].values, sar.values, df['Volume_Ratio'].values,
+                                  df['RSI'].values, df['MACD_Histogram'].values, df['MA5'].values)
+        result['sar'] = sar
+        return result
     
     def calculate_adx(self, df, period=14):
         """計算ADX趨勢強度指標"""
-        try:
-            # 計算+DM和-DM
-            high_diff = df['High'].diff()
-            low_diff = df['Low'].diff()
-            
-            plus_dm = np.where((high_diff > low_diff) & (high_diff > 0), high_diff, 0)
-            minus_dm = np.where((low_diff > high_diff) & (low_diff > 0), low_diff, 0)
-            
-            # 計算TR (True Range)
-            tr1 = df['High'] - df['Low']
-            tr2 = abs(df['High'] - df['Close'].shift(1))
-            tr3 = abs(df['Low'] - df['Close'].shift(1))
-            tr = np.maximum(tr1, np.maximum(tr2, tr3))
-            
-            # 平滑處理
-            plus_di = pd.Series(plus_dm).rolling(window=period).mean() / pd.Series(tr).rolling(window=period).mean() * 100
-            minus_di = pd.Series(minus_dm).rolling(window=period).mean() / pd.Series(tr).rolling(window=period).mean() * 100
-            
-            # 計算DX和ADX
-            dx = abs(plus_di - minus_di) / (plus_di + minus_di) * 100
-            adx = dx.rolling(window=period).mean()
-            
-            return adx.fillna(0)
-        except:
-            return pd.Series(0, index=df.index)
+        return indicator_adx(df, None, period=period)
     
     def calculate_ma_bullish_strength(self, df):
-        """計算均線多頭排列強度"""
+        """計算均線多頭排列強度（逐列）"""
         try:
-            # 檢查均線多頭排列
-            ma5 = df['MA5']
-            ma10 = df['MA10']
-            ma20 = df['MA20']
-            ma30 = df['MA30']
-            ma60 = df['MA60']
-            
-            # 計算多頭排列強度 (0-100)
-            bullish_count = 0
-            total_checks = 0
-            
-            # 檢查各均線排列
-            if len(df) > 0:
-                if ma5.iloc[-1] > ma10.iloc[-1]:
-                    bullish_count += 1
-                total_checks += 1
-                
-                if ma10.iloc[-1] > ma20.iloc[-1]:
-                    bullish_count += 1
-                total_checks += 1
-                
-                if ma20.iloc[-1] > ma30.iloc[-1]:
-                    bullish_count += 1
-                total_checks += 1
-                
-                if ma30.iloc[-1] > ma60.iloc[-1]:
-                    bullish_count += 1
-                total_checks += 1
-                
-                # 計算均線斜率
-                ma5_slope = (ma5.iloc[-1] - ma5.iloc[-5]) / ma5.iloc[-5] if len(df) >= 5 else 0
-                ma20_slope = (ma20.iloc[-1] - ma20.iloc[-5]) / ma20.iloc[-5] if len(df) >= 5 else 0
-                
-                if ma5_slope > 0:
-                    bullish_count += 1
-                total_checks += 1
-                
-                if ma20_slope > 0:
-                    bullish_count += 1
-                total_checks += 1
-            
-            strength = (bullish_count / total_checks * 100) if total_checks > 0 else 0
-            return pd.Series([strength] * len(df), index=df.index)
+            return trend_scores.ma_bullish_strength(df)
         except:
             return pd.Series(0, index=df.index)
     
     def calculate_price_channel_slope(self, df, period=20):
-        """計算價格通道斜率"""
+        """計算價格通道斜率（逐列）"""
         try:
-            # 計算價格通道
-            high_channel = df['High'].rolling(window=period).max()
-            low_channel = df['Low'].rolling(window=period).min()
-            mid_channel = (high_channel + low_channel) / 2
-            
-            # 計算斜率
-            if len(df) >= period + 5:
-                current_mid = mid_channel.iloc[-1]
-                prev_mid = mid_channel.iloc[-5]
-                slope = (current_mid - prev_mid) / prev_mid * 100
-            else:
-                slope = 0
-            
-            return pd.Series([slope] * len(df), index=df.index)
+            return trend_scores.price_channel_slope(df, period=period)
         except:
             return pd.Series(0, index=df.index)
     
     def calculate_volume_trend_alignment(self, df):
-        """計算成交量趨勢配合度"""
+        """計算成交量趨勢配合度（逐列）"""
         try:
-            # 計算價格趨勢
-            price_trend = df['Close'].pct_change(periods=5)
-            
-            # 計算成交量趨勢
-            volume_trend = df['Volume'].pct_change(periods=5)
-            
-            # 評估配合度
-            alignment_score = 0
-            
-            if len(df) > 5:
-                # 價格上漲時成交量放大
-                if price_trend.iloc[-1] > 0 and volume_trend.iloc[-1] > 0:
-                    alignment_score += 50
-                
-                # 價格下跌時成交量萎縮
-                if price_trend.iloc[-1] < 0 and volume_trend.iloc[-1] < 0:
-                    alignment_score += 30
-                
-                # 成交量均線向上
-                if df['Volume_MA'].iloc[-1] > df['Volume_MA'].iloc[-5]:
-                    alignment_score += 20
-            
-            return pd.Series([alignment_score] * len(df), index=df.index)
+            return trend_scores.volume_trend_alignment(df)
         except:
             return pd.Series(0, index=df.index)
     
     def calculate_momentum_acceleration(self, df):
-        """計算動量加速度指標"""
+        """計算動量加速度指標（逐列）"""
         try:
-            # 計算價格動量
-            momentum_5d = df['Close'].pct_change(periods=5)
-            momentum_10d = df['Close'].pct_change(periods=10)
-            
-            # 計算動量加速度
-            if len(df) >= 10:
-                acceleration = momentum_5d.iloc[-1] - momentum_10d.iloc[-1]
-            else:
-                acceleration = 0
-            
-            return pd.Series([acceleration] * len(df), index=df.index)
+            return trend_scores.momentum_acceleration(df)
         except:
             return pd.Series(0, index=df.index)
     
     def calculate_relative_strength(self, df):
-        """計算相對強度比較"""
+        """計算相對強度比較（逐列）"""
         try:
-            # 簡化的相對強度計算
-            # 實際應用中可能需要與大盤或同業比較
-            current_price = df['Close'].iloc[-1]
-            price_20d_ago = df['Close'].iloc[-20] if len(df) >= 20 else df['Close'].iloc[0]
-            
-            relative_strength = (current_price / price_20d_ago - 1) * 100
-            return pd.Series([relative_strength] * len(df), index=df.index)
+            return trend_scores.relative_strength(df)
         except:
             return pd.Series(0, index=df.index)
     
     def calculate_uptrend_continuity(self, df):
-        """計算上漲動能延續性"""
+        """計算上漲動能延續性（逐列）"""
         try:
-            continuity_score = 0
-            
-            # 檢查連續上漲天數
-            up_days = 0
-            for i in range(min(10, len(df)-1)):
-                if df['Close'].iloc[-(i+1)] > df['Close'].iloc[-(i+2)]:
-                    up_days += 1
-                else:
-                    break
-            
-            continuity_score += up_days * 10
-            
-            # 檢查技術指標持續向上
-            if len(df) >= 5:
-                if df['RSI'].iloc[-1] > df['RSI'].iloc[-5]:
-                    continuity_score += 20
-                if df['MACD'].iloc[-1] > df['MACD'].iloc[-5]:
-                    continuity_score += 20
-                if df['K'].iloc[-1] > df['K'].iloc[-5]:
-                    continuity_score += 20
-            
-            return pd.Series([continuity_score] * len(df), index=df.index)
+            return trend_scores.uptrend_continuity(df)
         except:
             return pd.Series(0, index=df.index)
     
     def calculate_dynamic_stop_loss(self, df):
-        """計算動態停損建議"""
+        """計算動態停損建議（逐列）"""
         try:
-            # 基於ATR的動態停損
-            atr = df['Volatility'].iloc[-1] * 2  # 簡化ATR計算
-            current_price = df['Close'].iloc[-1]
-            
-            # 停損位 = 當前價格 - 2倍ATR
-            stop_loss = current_price - (atr * 2)
-            
-            return pd.Series([stop_loss] * len(df), index=df.index)
+            return trend_scores.dynamic_stop_loss(df)
         except:
             return pd.Series(0, index=df.index)
     
     def calculate_support_reliability(self, df):
-        """計算支撐位可靠性"""
+        """計算支撐位可靠性（逐列）"""
         try:
-            reliability_score = 0
-            current_price = df['Close'].iloc[-1]
-            
-            # 檢查多重支撐
-            supports = [
-                df['MA20'].iloc[-1],
-                df['MA30'].iloc[-1],
-                df['BB_Lower'].iloc[-1],
-                df['SAR'].iloc[-1]
-            ]
-            
-            # 計算支撐位數量
-            support_count = sum(1 for s in supports if current_price > s * 0.95 and current_price < s * 1.05)
-            reliability_score = support_count * 25
-            
-            return pd.Series([reliability_score] * len(df), index=df.index)
+            return trend_scores.support_reliability(df)
         except:
             return pd.Series(0, index=df.index)
     
     def calculate_trend_reversal_confirmation(self, df):
-        """計算趨勢反轉確認指標"""
-        score = 0
-        
-        # 1. 價格結構反轉確認
-        current_price = df['Close'].iloc[-1]
-        ma20 = df['MA20'].iloc[-1]
-        ma5 = df['MA5'].iloc[-1]
-        
-        # 價格突破均線
-        if current_price > ma20 and current_price > ma5:
-            score += 20
-        elif current_price > ma20:
-            score += 10
-        
-        # 2. 技術指標反轉確認
-        rsi = df['RSI'].iloc[-1]
-        macd = df['MACD'].iloc[-1]
-        macd_hist = df['MACD_Histogram'].iloc[-1]
-        k = df['K'].iloc[-1]
-        d = df['D'].iloc[-1]
-        
-        # RSI從超賣區反轉
-        if rsi > 30 and rsi < 60:  # 避免超買狀態
-            score += 15
-        elif rsi < 30:
-            score += 10
-        
-        # MACD反轉
-        if macd > 0 and macd_hist > 0:
-            score += 15
-        elif macd > 0:
-            score += 10
-        
-        # KD反轉
-        if k > d and k < 40:  # 避免過高K值
-            score += 10
-        
-        # 3. 成交量確認
-        volume_ratio = df['Volume_Ratio'].iloc[-1]
-        if volume_ratio > 1.2:
-            score += 10
-        elif volume_ratio > 1.0:
-            score += 5
-        
-        # 4. 動量確認
-        momentum = df['Price_Momentum'].iloc[-1]
-        if momentum > 0:
-            score += 10
-        
-        # 5. 布林通道位置確認
-        bb_upper = df['BB_Upper'].iloc[-1]
-        bb_lower = df['BB_Lower'].iloc[-1]
-        bb_position = (current_price - bb_lower) / (bb_upper - bb_lower)
-        
-        if bb_position < 0.5:  # 避免接近上軌
-            score += 10
-        elif bb_position < 0.7:
-            score += 5
-        
-        return min(100, score)
+        """計算趨勢反轉確認指標（逐列）"""
+        return trend_scores.trend_reversal_confirmation(df)
     
     def calculate_reversal_strength(self, df):
-        """計算反轉強度指標"""
-        score = 0
-        
-        # 1. 價格動量強度
-        momentum_5d = df['Price_Momentum'].iloc[-1]
-        momentum_10d = df['Close'].pct_change(periods=10).iloc[-1]
-        
-        if momentum_5d > 0.02:  # 強勁動量
-            score += 20
-        elif momentum_5d > 0:
-            score += 10
-        
-        if momentum_10d > 0.05:  # 中期強勁動量
-            score += 15
-        elif momentum_10d > 0:
-            score += 10
-        
-        # 2. 技術指標強度
-        rsi_slope = df['RSI_Slope'].iloc[-1]
-        macd_slope = df['MACD_Slope'].iloc[-1]
-        k_slope = df['K_Slope'].iloc[-1]
-        
-        # 指標斜率強度
-        positive_slopes = sum([rsi_slope > 0, macd_slope > 0, k_slope > 0])
-        if positive_slopes == 3:
-            score += 20
-        elif positive_slopes == 2:
-            score += 15
-        elif positive_slopes == 1:
-            score += 10
-        
-        # 3. 成交量強度
-        volume_ratio = df['Volume_Ratio'].iloc[-1]
-        if volume_ratio > 1.5:
-            score += 15
-        elif volume_ratio > 1.2:
-            score += 10
-        elif volume_ratio > 1.0:
-            score += 5
-        
-        # 4. 均線排列強度
-        ma_bullish_strength = df['MA_Bullish_Strength'].iloc[-1]
-        if ma_bullish_strength > 80:
-            score += 15
-        elif ma_bullish_strength > 60:
-            score += 10
-        
-        # 5. 價格通道斜率強度
-        price_channel_slope = df['Price_Channel_Slope'].iloc[-1]
-        if price_channel_slope > 1:
-            score += 10
-        elif price_channel_slope > 0:
-            score += 5
-        
-        return min(100, score)
+        """計算反轉強度指標（逐列）"""
+        return trend_scores.reversal_strength(df)
     
     def calculate_reversal_reliability(self, df):
-        """計算反轉可信度指標"""
-        score = 0
-        
-        # 1. 多重技術指標一致性
-        rsi = df['RSI'].iloc[-1]
-        macd = df['MACD'].iloc[-1]
-        macd_hist = df['MACD_Histogram'].iloc[-1]
-        k = df['K'].iloc[-1]
-        d = df['D'].iloc[-1]
-        
-        # 指標一致性檢查
-        bullish_indicators = 0
-        
-        # RSI條件
-        if 30 < rsi < 70:  # 避免極端值
-            bullish_indicators += 1
-        
-        # MACD條件
-        if macd > 0 and macd_hist > 0:
-            bullish_indicators += 1
-        elif macd > 0:
-            bullish_indicators += 0.5
-        
-        # KD條件
-        if k > d and k < 40:
-            bullish_indicators += 1
-        
-        # SAR條件
-        current_sar = df['SAR'].iloc[-1]
-        if df['Close'].iloc[-1] > current_sar:
-            bullish_indicators += 1
-        
-        # OBV條件
-        current_obv = df['OBV'].iloc[-1]
-        if current_obv > df['OBV_MA'].iloc[-1]:
-            bullish_indicators += 1
-        
-        # 根據一致性給分
-        if bullish_indicators >= 4:
-            score += 30
-        elif bullish_indicators >= 3:
-            score += 20
-        elif bullish_indicators >= 2:
-            score += 15
-        
-        # 2. 成交量可靠性
-        volume_ratio = df['Volume_Ratio'].iloc[-1]
-        if 0.8 <= volume_ratio <= 2.0:  # 合理範圍
-            score += 20
-        elif volume_ratio > 2.0:
-            score += 10  # 過高成交量可能不可靠
-        
-        # 3. 價格位置可靠性
-        bb_upper = df['BB_Upper'].iloc[-1]
-        bb_lower = df['BB_Lower'].iloc[-1]
-        bb_position = (df['Close'].iloc[-1] - bb_lower) / (bb_upper - bb_lower)
-        
-        if 0.2 <= bb_position <= 0.7:  # 合理位置
-            score += 20
-        elif bb_position < 0.2:
-            score += 15
-        elif bb_position > 0.8:
-            score += 5  # 接近上軌不可靠
-        
-        # 4. 趨勢強度可靠性
-        adx = df['ADX'].iloc[-1]
-        if 20 <= adx <= 40:  # 適中趨勢強度
-            score += 15
-        elif adx > 40:
-            score += 10
-        elif adx < 20:
-            score += 5
-        
-        # 5. 支撐位可靠性
-        support_reliability = df['Support_Reliability'].iloc[-1]
-        if support_reliability > 60:
-            score += 15
-        elif support_reliability > 40:
-            score += 10
-        
-        return min(100, score)
+        """計算反轉可信度指標（逐列）"""
+        return trend_scores.reversal_reliability(df)
     
     def calculate_short_term_momentum_turn(self, df):
-        """計算短期動能轉折點"""
+        """計算短期動能轉折點（逐列）"""
         try:
-            turn_score = 0
-            
-            if len(df) >= 7:
-                # 檢查動能轉折
-                momentum_3d = df['Close'].pct_change(periods=3).iloc[-1]
-                momentum_7d = df['Close'].pct_change(periods=7).iloc[-1]
-                
-                # 短期動能轉正且強於中期
-                if momentum_3d > 0 and momentum_3d > momentum_7d:
-                    turn_score += 30
-                
-                # 檢查RSI動能轉折
-                rsi_current = df['RSI'].iloc[-1]
-                rsi_3d_ago = df['RSI'].iloc[-4]
-                if rsi_3d_ago < 40 and rsi_current > 45:
-                    turn_score += 25
-                
-                # 檢查MACD動能轉折
-                macd_hist_current = df['MACD_Histogram'].iloc[-1]
-                macd_hist_3d_ago = df['MACD_Histogram'].iloc[-4]
-                if macd_hist_3d_ago < 0 and macd_hist_current > 0:
-                    turn_score += 25
-                
-                # 檢查價格結構轉折
-                if len(df) >= 5:
-                    # 檢查是否形成低點抬高的結構
-                    low_1 = df['Low'].iloc[-5:-2].min()
-                    low_2 = df['Low'].iloc[-2:].min()
-                    if low_2 > low_1:
-                        turn_score += 20
-            
-            return pd.Series([turn_score] * len(df), index=df.index)
+            return trend_scores.short_term_momentum_turn(df)
         except:
             return pd.Series(0, index=df.index)
     
     def calculate_price_structure_reversal(self, df):
-        """計算價格結構反轉"""
+        """計算價格結構反轉（逐列）"""
         try:
-            structure_score = 0
-            
-            if len(df) >= 10:
-                # 檢查雙底或W底結構
-                lows = df['Low'].iloc[-10:]
-                if len(lows) >= 10:
-                    # 尋找兩個低點
-                    low_points = []
-                    for i in range(1, len(lows)-1):
-                        if lows.iloc[i] < lows.iloc[i-1] and lows.iloc[i] < lows.iloc[i+1]:
-                            low_points.append((i, lows.iloc[i]))
-                    
-                    if len(low_points) >= 2:
-                        # 檢查第二個低點是否高於第一個
-                        if low_points[-1][1] > low_points[-2][1]:
-                            structure_score += 40
-                
-                # 檢查突破頸線
-                if len(df) >= 5:
-                    recent_highs = df['High'].iloc[-5:]
-                    neckline = recent_highs.max()
-                    if df['Close'].iloc[-1] > neckline * 0.98:  # 接近突破
-                        structure_score += 30
-                
-                # 檢查價格在支撐位反彈
-                current_price = df['Close'].iloc[-1]
-                support_levels = [
-                    df['MA20'].iloc[-1],
-                    df['BB_Lower'].iloc[-1],
-                    df['SAR'].iloc[-1]
-                ]
-                
-                for support in support_levels:
-                    if 0.98 < current_price / support < 1.02:
-                        structure_score += 15
-                        break
-            
-            return pd.Series([structure_score] * len(df), index=df.index)
+            return trend_scores.price_structure_reversal(df)
         except:
             return pd.Series(0, index=df.index)
     
     def detect_bullish_signals(self, df):
         if df is None or df.empty:
             return []
-        signals = []
-        last_signal_date = None  # 時間過濾：避免短期內重複訊號
-        
-        for i in range(20, len(df)):
-            current = df.iloc[i]
-            prev = df.iloc[i-1]
-            
-            # 價格過濾：避免明顯下跌趨勢中的假訊號
-            if i >= 5:
-                recent_trend = df['Close'].iloc[i-5:i].pct_change().mean()
-                if recent_trend < -0.02:  # 近5日平均跌幅>2%，跳過
-                    continue
-            
-            # 時間過濾：避免短期內重複訊號
-            if last_signal_date is not None:
-                days_since_last = (df.index[i] - last_signal_date).days
-                if days_since_last < 3:  # 3天內不重複訊號
-                    continue
-            
-            # 修正：加入超買過濾
-            if current['RSI'] > 75:  # 嚴重超買狀態跳過
-                continue
-            
-            # 修正：加入布林通道位置過濾
-            bb_upper = current['BB_Upper']
-            bb_lower = current['BB_Lower']
-            bb_position = (current['Close'] - bb_lower) / (bb_upper - bb_lower)
-            if bb_position > 0.85:  # 接近上軌跳過
-                continue
-            
-            bullish_conditions = []
-            
+        # 同一份指標表只掃描一次（analyze_stock 與 assess_entry_opportunity 共用結果）
+        return context_for(df).memo(('bullish_signals',), lambda: self._scan_bullish_signals(df))
+
+    def journal_bullish_signals(self, df, symbol):
+        """
+        由訊號日誌取得分析窗口內的多頭訊號，只掃描上次執行後新增的K線（見 signal_journal）
+        結果記在指標表的分析上下文，assess_entry_opportunity 直接沿用
+        """
+        if df is None or df.empty:
+            return []
+        return context_for(df).memo(('bullish_signals',),
+                                    lambda: self.signal_journal.signals(symbol, df, self._scan_bullish_signals))
+
+    def _scan_bullish_signals(self, df, start=20, last_signal_date=None):
+        """
+        以整欄布林遮罩評估過濾條件與 22 個多頭條件，只有 3 天冷卻期需要依序檢查候選K線
+        結果與逐根K線判斷相同（第 i 根K線只使用第 i、i-1、i-2 根的欄位）；
+        start 之後才掃描，last_signal_date 為接續掃描時的冷卻期狀態
+        """
+        n = len(df)
+        if n <= start:
+            return []
+
+        if isinstance(df, IndicatorFrame):
+            columns = {name: np.asarray(df.array(name), dtype=np.float64) for name in SIGNAL_COLUMNS}
+        else:
+            columns = {name: df[name].to_numpy(dtype=np.float64) for name in SIGNAL_COLUMNS}
+
+        def current(name):
+            return columns[name][start:]
+
+        def prev(name):
+            return columns[name][start - 1:n - 1]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 價格過濾：近5日平均跌幅>2% 跳過；超買過濾：RSI>75 跳過；布林通道位置過濾：接近上軌跳過
+            # 第 i 根只用到前 5 根收盤價，接續掃描時只計算尾端
+            lookback = min(start, 5)
+            recent_trend = _trailing_mean_change(columns['Close'][start - lookback:])[lookback:]
+            bb_position = (current('Close') - current('BB_Lower')) / (current('BB_Upper') - current('BB_Lower'))
+        eligible = ~(recent_trend < -0.02) & ~(current('RSI') > 75) & ~(bb_position > 0.85)
+
+        conditions = (
             # 黃金交叉+放量（改為1.5倍）
-            if (current['MA5'] > current['MA20'] and prev['MA5'] <= prev['MA20'] and current['Volume_Ratio'] > 1.5):
-                bullish_conditions.append("黃金交叉+放量")
-            
+            ("黃金交叉+放量", (current('MA5') > current('MA20')) & (prev('MA5') <= prev('MA20'))
+             & (current('Volume_Ratio') > 1.5)),
             # MACD柱狀圖轉正且RSI未超買
-            if (current['MACD_Histogram'] > 0 and prev['MACD_Histogram'] <= 0 and current['RSI'] < 70):
-                bullish_conditions.append("MACD柱狀圖轉正+RSI未超買")
-            
+            ("MACD柱狀圖轉正+RSI未超買", (current('MACD_Histogram') > 0) & (prev('MACD_Histogram') <= 0)
+             & (current('RSI') < 70)),
             # KD低檔交叉（加入K<20且D<25條件）
-            if (current['K'] > current['D'] and prev['K'] <= prev['D'] and current['K'] < 20 and current['D'] < 25):
-                bullish_conditions.append("KD低檔交叉")
-            
+            ("KD低檔交叉", (current('K') > current('D')) & (prev('K') <= prev('D'))
+             & (current('K') < 20) & (current('D') < 25)),
             # SAR翻多（加入連續2根K線確認）
-            if (i >= 2 and 
-                current['Close'] > current['SAR'] and 
-                prev['Close'] > prev['SAR'] and 
-                df['Close'].iloc[i-2] <= df['SAR'].iloc[i-2]):
-                bullish_conditions.append("SAR翻多")
-            
+            ("SAR翻多", (current('Close') > current('SAR')) & (prev('Close') > prev('SAR'))
+             & (columns['Close'][start - 2:n - 2] <= columns['SAR'][start - 2:n - 2])),
             # OBV突破均線
-            if (current['OBV'] > current['OBV_MA'] and prev['OBV'] <= prev['OBV_MA']):
-                bullish_conditions.append("OBV突破均線")
-            
+            ("OBV突破均線", (current('OBV') > current('OBV_MA')) & (prev('OBV') <= prev('OBV_MA'))),
             # RSI超賣反轉
-            if (current['RSI'] > 30 and prev['RSI'] <= 30):
-                bullish_conditions.append("RSI超賣反轉")
-            
+            ("RSI超賣反轉", (current('RSI') > 30) & (prev('RSI') <= 30)),
             # 價格突破布林下軌
-            if (current['Close'] > current['BB_Lower'] and prev['Close'] <= prev['BB_Lower']):
-                bullish_conditions.append("突破布林下軌")
-            
+            ("突破布林下軌", (current('Close') > current('BB_Lower')) & (prev('Close') <= prev('BB_Lower'))),
             # 動量轉正
-            if (current['Price_Momentum'] > 0 and prev['Price_Momentum'] <= 0):
-                bullish_conditions.append("動量轉正")
-            
-            # ===== 新增：趨勢持續性指標 =====
-            
-            # ADX趨勢強度確認
-            if current['ADX'] > 25:  # ADX > 25表示趨勢明確
-                bullish_conditions.append("ADX趨勢強勁")
-            
-            # 均線多頭排列強度
-            if current['MA_Bullish_Strength'] > 80:  # 多頭排列強度>80%
-                bullish_conditions.append("均線多頭排列")
-            
-            # 價格通道斜率向上
-            if current['Price_Channel_Slope'] > 0:
-                bullish_conditions.append("價格通道向上")
-            
-            # 成交量趨勢配合
-            if current['Volume_Trend_Alignment'] > 70:  # 成交量配合度>70%
-                bullish_conditions.append("成交量配合")
-            
-            # ===== 新增：動能分析指標 =====
-            
-            # 動量加速度為正
-            if current['Momentum_Acceleration'] > 0:
-                bullish_conditions.append("動量加速")
-            
-            # 技術指標斜率向上
-            if (current['RSI_Slope'] > 0 and current['MACD_Slope'] > 0):
-                bullish_conditions.append("指標斜率向上")
-            
-            # 相對強度為正
-            if current['Relative_Strength'] > 0:
-                bullish_conditions.append("相對強度為正")
-            
-            # 上漲動能延續性
-            if current['Uptrend_Continuity'] > 50:  # 延續性>50分
-                bullish_conditions.append("上漲動能延續")
-            
-            # ===== 新增：短期趨勢反轉識別 =====
-            
-            # 修正：趨勢反轉確認（統一判斷標準）
-            trend_reversal_confirmation = current['Trend_Reversal_Confirmation']
-            reversal_strength = current['Reversal_Strength']
-            reversal_reliability = current['Reversal_Reliability']
-            short_term_momentum_turn = current['Short_Term_Momentum_Turn']
-            price_structure_reversal = current['Price_Structure_Reversal']
-            
-            # 趨勢反轉確認（要求更嚴格）
-            if trend_reversal_confirmation > 60:  # 提高門檻
-                bullish_conditions.append("趨勢反轉確認")
-            
-            # 反轉強度
-            if reversal_strength > 70:  # 提高門檻
-                bullish_conditions.append("反轉強度強勁")
-            
-            # 反轉可信度
-            if reversal_reliability > 70:  # 提高門檻
-                bullish_conditions.append("反轉可信度高")
-            
-            # 短期動能轉折
-            if short_term_momentum_turn > 60:  # 提高門檻
-                bullish_conditions.append("短期動能轉折")
-            
-            # 價格結構反轉
-            if price_structure_reversal > 50:  # 提高門檻
-                bullish_conditions.append("價格結構反轉")
-            
-            # 修正：更嚴格的多頭訊號條件
-            if len(bullish_conditions) >= 5:  # 提高條件數量要求
-                # 必須包含至少2個趨勢反轉相關條件
-                reversal_conditions = [
-                    "趨勢反轉確認", "反轉強度強勁", "反轉可信度高", 
-                    "短期動能轉折", "價格結構反轉"
-                ]
-                reversal_count = sum(1 for cond in bullish_conditions if cond in reversal_conditions)
-                
-                if reversal_count >= 2:  # 要求至少2個反轉條件
-                    # 計算距離當前的天數
-                    days_ago = len(df) - 1 - i
-
-                    signals.append({
-                        'date': df.index[i],
-                        'price': current['Close'],
-                        'conditions': bullish_conditions,
-                        'signal_types': bullish_conditions,  # 添加signal_types別名
-                        'days_ago': days_ago,  # 添加days_ago字段
-                        'rsi': current['RSI'],
-                        'macd': current['MACD'],
-                        'volume_ratio': current['Volume_Ratio'],
-                        'k': current['K'],
-                        'd': current['D'],
-                        'sar': current['SAR'],
-                        'obv': current['OBV'],
-                        'adx': current['ADX'],
-                        'ma_bullish_strength': current['MA_Bullish_Strength'],
-                        'momentum_acceleration': current['Momentum_Acceleration'],
-                        'uptrend_continuity': current['Uptrend_Continuity'],
-                        'trend_reversal_confirmation': current['Trend_Reversal_Confirmation'],
-                        'reversal_strength': current['Reversal_Strength'],
-                        'reversal_reliability': current['Reversal_Reliability'],
-                        'short_term_momentum_turn': current['Short_Term_Momentum_Turn'],
-                        'price_structure_reversal': current['Price_Structure_Reversal']
-                    })
-                    last_signal_date = df.index[i]  # 更新最後訊號日期
-        
+            ("動量轉正", (current('Price_Momentum') > 0) & (prev('Price_Momentum') <= 0)),
+
+            # ===== 趨勢持續性指標 =====
+            ("ADX趨勢強勁", current('ADX') > 25),  # ADX > 25表示趨勢明確
+            ("均線多頭排列", current('MA_Bullish_Strength') > 80),  # 多頭排列強度>80%
+            ("價格通道向上", current('Price_Channel_Slope') > 0),
+            ("成交量配合", current('Volume_Trend_Alignment') > 70),  # 成交量配合度>70%
+
+            # ===== 動能分析指標 =====
+            ("動量加速", current('Momentum_Acceleration') > 0),
+            ("指標斜率向上", (current('RSI_Slope') > 0) & (current('MACD_Slope') > 0)),
+            ("相對強度為正", current('Relative_Strength') > 0),
+            ("上漲動能延續", current('Uptrend_Continuity') > 50),  # 延續性>50分
+
+            # ===== 短期趨勢反轉識別（提高門檻）=====
+            ("趨勢反轉確認", current('Trend_Reversal_Confirmation') > 60),
+            ("反轉強度強勁", current('Reversal_Strength') > 70),
+            ("反轉可信度高", current('Reversal_Reliability') > 70),
+            ("短期動能轉折", current('Short_Term_Momentum_Turn') > 60),
+            ("價格結構反轉", current('Price_Structure_Reversal') > 50),
+        )
+
+        # 更嚴格的多頭訊號條件：至少5個條件，且至少2個趨勢反轉相關條件
+        condition_count = np.sum([mask for _, mask in conditions], axis=0)
+        reversal_count = np.sum([mask for label, mask in conditions if label in REVERSAL_CONDITIONS], axis=0)
+        candidates = np.flatnonzero(eligible & (condition_count >= 5) & (reversal_count >= 2)) + start
+
+        signals = []
+        # 時間過濾：避免短期內重複訊號
+        for i in candidates.tolist():
+            if last_signal_date is not None and (df.index[i] - last_signal_date).days < SIGNAL_COOLDOWN_DAYS:
+                continue
+            row = {name: values[i] for name, values in columns.items()}
+            bullish_conditions = [label for label, mask in conditions if mask[i - start]]
+            signals.append({
+                'date': df.index[i],
+                'price': row['Close'],
+                'conditions': bullish_conditions,
+                'signal_types': bullish_conditions,  # 添加signal_types別名
+                'days_ago': n - 1 - i,  # 距離當前的天數
+                'rsi': row['RSI'],
+                'macd': row['MACD'],
+                'volume_ratio': row['Volume_Ratio'],
+                'k': row['K'],
+                'd': row['D'],
+                'sar': row['SAR'],
+                'obv': row['OBV'],
+                'adx': row['ADX'],
+                'ma_bullish_strength': row['MA_Bullish_Strength'],
+                'momentum_acceleration': row['Momentum_Acceleration'],
+                'uptrend_continuity': row['Uptrend_Continuity'],
+                'trend_reversal_confirmation': row['Trend_Reversal_Confirmation'],
+                'reversal_strength': row['Reversal_Strength'],
+                'reversal_reliability': row['Reversal_Reliability'],
+                'short_term_momentum_turn': row['Short_Term_Momentum_Turn'],
+                'price_structure_reversal': row['Price_Structure_Reversal']
+            })
+            last_signal_date = df.index[i]  # 更新最後訊號日期
+
         return signals
-    
+
     def calculate_long_signal_price(self, df):
-        # 1. 近30日最低價
-        min_low = df['Low'].min()
-        # 2. 30日布林下軌
-        ma = df['Close'].rolling(window=20).mean()
-        std = df['Close'].rolling(window=20).std()
-        bb_lower = (ma - 2 * std).iloc[-1]
-        # 3. 30日均線
-        ma30 = df['MA30'].iloc[-1]
-        # 4. 30日內多頭訊號日的收盤價
-        signals = []
-        for i in range(1, len(df)):
-            # 黃金交叉
-            if (df['MA5'].iloc[i] > df['MA20'].iloc[i] and 
-                df['MA5'].iloc[i-1] <= df['MA20'].iloc[i-1]):
-                signals.append(df['Close'].iloc[i])
-            # RSI反轉
-            if (df['RSI'].iloc[i] > 30 and df['RSI'].iloc[i-1] <= 30):
-                signals.append(df['Close'].iloc[i])
-            # MACD柱狀圖轉正
-            if (df['MACD_Histogram'].iloc[i] > 0 and 
-                df['MACD_Histogram'].iloc[i-1] <= 0):
-                signals.append(df['Close'].iloc[i])
-        if signals:
-            signal_price = min(signals)
-        else:
-            signal_price = min_low
-        # 5. 近30日最大成交量K棒的最低價
-        max_vol_idx = df['Volume'].idxmax()
-        max_vol_low = df.loc[max_vol_idx, 'Low'] if max_vol_idx in df.index else min_low
-        # 6. RSI<30時的最低價
-        rsi_oversold_lows = df['Low'][df['RSI'] < 30]
-        rsi_oversold_low = rsi_oversold_lows.min() if not rsi_oversold_lows.empty else min_low
-        
-        # 修正：確保抄底價位低於當前價格
-        current_price = df['Close'].iloc[-1]
-        
-        # 綜合多重支撐，取最高值但必須低於當前價格
-        candidates = [min_low, bb_lower, ma30, signal_price, max_vol_low, rsi_oversold_low]
-        valid_candidates = [v for v in candidates if not pd.isna(v) and v < current_price]
-        
-        if valid_candidates:
-            long_signal_price = max(valid_candidates)
-        else:
-            # 如果沒有低於當前價格的支撐位，使用最低價的90%作為抄底價位
-            long_signal_price = min_low * 0.9
-        
-        # 信心度：有幾條支撐同時接近long_signal_price
-        close_count = sum([abs(long_signal_price-v)/long_signal_price < 0.03 for v in candidates if not pd.isna(v)])
-        confidence = min(100, 40 + close_count*15)
-        
-        return long_signal_price, confidence
-    
-    def assess_entry_opportunity(self, df):
+        """抄底價位與支撐信心度（最後一根K線的值，逐列結果見 calculate_long_signal_levels）"""
+        levels = self.calculate_long_signal_levels(df)
+        return levels['long_signal_price'].iloc[-1], int(levels['confidence'].iloc[-1])
+
+    def calculate_long_signal_levels(self, df):
         """
-        增強的進場機會評估
+        每根K線的抄底價位、信心度與六個支撐（見 trend_scores.long_signal_levels）
+        同一份指標表只計算一次，回測與圖表可直接讀取歷史的抄底區間
+        """
+        return context_for(df).memo(('long_signal_levels',), lambda: trend_scores.long_signal_levels(df))
+
+    def calculate_multi_timeframe(self, df, symbol):
+        """
+        symbol 的多時間框架分析，結果記在指標表的分析上下文
+        與日線分析共用同一份日線，避免重複下載並確保最後一根K線一致
+        """
+        context = self.symbol_contexts.get(symbol)
+        daily_data = context.slice(self.context_period) if context is not None else None
+        return self.mtf_analyzer.calculate_multi_timeframe_score(symbol, daily_data=daily_data, context=context_for(df))
+
+    def assess_entry_opportunity(self, df, symbol):
+        """
+        增強的進場機會評估（symbol 用於多時間框架分析）
         結合市場情緒、波動性風險和時機分析
         """
         score = 0
@@ -1568,7 +672,7 @@ class IntegratedStockAnalyzer:
         
         # 價格動量評估
         momentum_5d = df['Price_Momentum'].iloc[-1]
-        momentum_10d = df['Close'].pct_change(periods=10).iloc[-1]
+        momentum_10d = context_for(df).pct_change(10).iloc[-1]
         
         if momentum_5d > 0 and momentum_10d > 0:
             score += 1
@@ -1836,7 +940,8 @@ class IntegratedStockAnalyzer:
 
         # === 新增：強化確認機制 ===
         try:
-            enhanced_confirmation = self.confirmation_system.calculate_comprehensive_confirmation(df)
+            enhanced_confirmation = self.confirmation_system.calculate_comprehensive_confirmation(
+                df, context=context_for(df))
             confirmation_score = 0
 
             if enhanced_confirmation and isinstance(enhanced_confirmation.get('total_score'), (int, float)):
@@ -1847,13 +952,12 @@ class IntegratedStockAnalyzer:
             confirmation_score = 0
 
         # === 新增：多時間框架分析 ===
-        symbol = getattr(self, 'current_symbol', 'UNKNOWN')
         mtf_analysis = None
         mtf_score = 0
         mtf_factors = []
 
         try:
-            mtf_analysis = self.mtf_analyzer.calculate_multi_timeframe_score(symbol)
+            mtf_analysis = self.calculate_multi_timeframe(df, symbol)
 
             if mtf_analysis and isinstance(mtf_analysis.get('final_score'), (int, float)):
                 mtf_score = float(mtf_analysis['final_score']) / 10  # 轉換為10分制
@@ -2028,29 +1132,30 @@ class IntegratedStockAnalyzer:
         if data is None:
             return None
         
-        # 計算技術指標
-        df = self.calculate_technical_indicators(data)
-        if df is None or df.empty:
+        # 單次分析：指標表（陣列式 IndicatorFrame）只計算一次，訊號、抄底價位與進場評估都從同一個物件讀取
+        analysis = SymbolAnalysis(self, symbol, data, journal=True)
+        if not analysis.valid:
             return None
+        df = analysis.frame
         
         # 確保 current_price, SAR, confidence_factors 總是存在
-        current_price = df['Close'].iloc[-1] if not df.empty else None
+        current_price = df.last('Close')
 
         # 改進SAR數據處理
         current_sar = None
-        if 'SAR' in df.columns and not df.empty:
-            sar_value = df['SAR'].iloc[-1]
+        if 'SAR' in df:
+            sar_value = df.last('SAR')
             # 檢查SAR值是否有效（不是NaN且不是無窮大）
             if pd.notna(sar_value) and np.isfinite(sar_value):
                 current_sar = float(sar_value)
 
-        entry_advice, confidence_score, confidence_level, confidence_factors = self.assess_entry_opportunity(df)
+        # 檢測多頭訊號（由訊號日誌接續，只掃描新增的K線；進場評估共用同一份結果）
+        signals = analysis.signals
 
-        # 檢測多頭訊號
-        signals = self.detect_bullish_signals(df)
+        entry_advice, confidence_score, confidence_level, confidence_factors = analysis.entry
         
         # 計算Long Signal Price
-        long_signal_price, long_signal_confidence = self.calculate_long_signal_price(df)
+        long_signal_price, long_signal_confidence = analysis.long_signal
         
         base_result = {
             'symbol': symbol,
@@ -2059,9 +1164,9 @@ class IntegratedStockAnalyzer:
             'current_price': current_price,
             'sar': current_sar, # 總是包含 SAR
             'confidence_factors': confidence_factors, # 總是包含 confidence_factors
-            'rsi': df['RSI'].iloc[-1] if 'RSI' in df.columns else None,
-            'macd': df['MACD'].iloc[-1] if 'MACD' in df.columns else None,
-            'volume_ratio': df['Volume_Ratio'].iloc[-1] if 'Volume_Ratio' in df.columns else None,
+            'rsi': df.last('RSI'),
+            'macd': df.last('MACD'),
+            'volume_ratio': df.last('Volume_Ratio'),
             'long_signal_price': long_signal_price,
             'long_signal_confidence': long_signal_confidence,
             'entry_opportunity': entry_advice,
@@ -2104,12 +1209,12 @@ class IntegratedStockAnalyzer:
     def analyze_specific_stocks(self, symbols):
         results = []
         print(f"開始對指定的 {len(symbols)} 支股票進行單獨分析...")
+        self.prefetch_data(symbols)
         for i, symbol in enumerate(symbols):
-            print(f"   正在分析 {symbol} ({i+1}/{len(self.stocks)})...")
+            print(f"   正在分析 {symbol} ({i+1}/{len(symbols)})...")
             result = self.analyze_stock(symbol)
             if result:
                 results.append(result)
-            time.sleep(1)
         print("指定股票分析完成")
         return results
     
@@ -2117,13 +1222,13 @@ class IntegratedStockAnalyzer:
         results = []
         
         print(f"開始分析 {len(self.stocks)} 支股票...")
+        self.prefetch_data(self.stocks)
         
         for i, symbol in enumerate(self.stocks):
             print(f"   正在分析 {symbol} ({i+1}/{len(self.stocks)})...")
             result = self.analyze_stock(symbol)
             if result:
                 results.append(result)
-            time.sleep(1)
         
         print("正在整合分析結果...")
         
@@ -2133,7 +1238,7 @@ class IntegratedStockAnalyzer:
         # 計算綜合評分
         if not df_results.empty:
             print("正在計算綜合評分...")
-            df_results['composite_score'] = 0
+            df_results['composite_score'] = 0.0
             
             # 有訊號的股票
             signal_stocks = df_results[df_results['long_days'].notna()].copy()
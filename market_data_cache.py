@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地K線數據快取
+按股票代號與週期保存歷史K線，每次只下載最後一根已存K線之後的數據
+"""
+
+import os
+import pickle
+import threading
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from async_fetcher import get_async_fetcher, classify_error
+from backend.path_manager import SharedInstance, get_cache_dir, write_atomic
+from market_data_provider import get_market_data_provider
+from negative_cache import get_negative_cache, NegativeCacheHit, REASON_NO_DATA
+
+warnings.filterwarnings('ignore')
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 冷快取時一次下載的歷史長度（涵蓋多時間框架分析所需的2年日線）
+DEFAULT_HISTORY_PERIOD = '2y'
+
+# 快取數據在此秒數內視為最新，不再發出尾部請求
+DEFAULT_MAX_AGE = int(os.environ.get('BULLPS_MARKET_DATA_MAX_AGE', 15 * 60))
+
+# 批量下載時每組 yf.download 最多包含的股票數
+DEFAULT_BATCH_SIZE = 50
+
+# 還原權息後的價格若與已存數據差異超過此比例，視為歷史已被重新調整
+ADJUSTMENT_TOLERANCE = 1e-4
+
+# 由日線合成週線/月線時使用的交易所週期與聚合方式
+RESAMPLE_PERIODS = {'1wk': 'W-SUN', '1mo': 'M'}
+RESAMPLE_AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+PERIOD_UNITS = [('wk', 'weeks'), ('mo', 'months'), ('y', 'years'), ('d', 'days')]
+
+
+def get_default_cache_dir():
+    """獲取K線快取目錄"""
+    return get_cache_dir('market_data')
+
+
+def period_to_start(period, now=None):
+    """
+    將 yfinance 風格的 period（如 '60d'、'2y'）轉換為起始時間
+    'max' 或 None 返回 None，表示不限制起始日期
+    """
+    if period is None or period == 'max':
+        return None
+
+    now = pd.Timestamp(now) if now is not None else pd.Timestamp(datetime.now())
+    if period == 'ytd':
+        return pd.Timestamp(year=now.year, month=1, day=1)
+
+    for suffix, unit in PERIOD_UNITS:
+        if period.endswith(suffix):
+            return now - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+
+    raise ValueError(f"不支援的 period 格式: {period}")
+
+
+def normalize_bars(data):
+    """
+    統一K線格式：只保留OHLCV欄位，索引轉為交易所當地日期（不含時區）
+    """
+    if data is None or data.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    df = data.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    df = df[[col for col in OHLCV_COLUMNS if col in df.columns]]
+
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize()
+    df.index.name = 'Date'
+
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df.dropna(subset=['Open', 'High', 'Low', 'Close'], how='all')
+
+
+def resample_bars(daily, interval, include_partial=True, as_of=None):
+    """
+    由日線合成週線或月線
+    以交易所當地日期分組（週一至週日為一週、自然月為一月），
+    K線日期標記為該期第一個交易日，與 Yahoo 的週線/月線一致
+    include_partial=False 時，若最後一期在 as_of（預設為今天）仍未結束則捨棄
+    """
+    if daily is None or daily.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    periods = daily.index.to_period(RESAMPLE_PERIODS[interval])
+    bars = daily.groupby(periods).agg(RESAMPLE_AGGREGATIONS)
+    bars.index = pd.DatetimeIndex(pd.Series(daily.index, index=periods).groupby(level=0).first().values)
+    bars.index.name = 'Date'
+
+    if not include_partial:
+        as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp(datetime.now())
+        if as_of <= periods[-1].end_time:
+            bars = bars.iloc[:-1]
+
+    return bars.dropna(subset=['Close'])
+
+
+def split_download(df_all, symbol, group_size):
+    """從 yf.download 的多股票結果中取出單一股票的K線"""
+    if df_all is None or df_all.empty:
+        return None
+
+    if isinstance(df_all.columns, pd.MultiIndex):
+        if symbol in df_all.columns.get_level_values(1):
+            return df_all.xs(symbol, level=1, axis=1).copy()
+        return None
+
+    if group_size == 1:
+        return df_all.copy()
+    return None
+
+
+class MarketDataCache:
+    """
+    每支股票、每個K線週期保存一個快取檔案
+    快取過期後只請求最後幾根K線，並與已存歷史合併
+    """
+
+    def __init__(self, cache_dir=None, max_age=DEFAULT_MAX_AGE, history_period=DEFAULT_HISTORY_PERIOD,
+                 fetcher=None, provider=None, negative_cache=None):
+        self.provider = provider or get_market_data_provider()
+        if cache_dir:
+            self.cache_dir = Path(cache_dir)
+        elif self.provider.name == 'yfinance':
+            self.cache_dir = get_default_cache_dir()
+        else:
+            # 其他數據來源使用獨立的子目錄，避免與 Yahoo 的快取混用
+            self.cache_dir = get_default_cache_dir() / self.provider.name
+        self.max_age = max_age
+        self.history_period = history_period
+        self.fetcher = fetcher or get_async_fetcher()
+        self.negative_cache = negative_cache or get_negative_cache()
+        self._memory = {}
+        self._lock = threading.RLock()
+        self.stats = {'full_requests': 0, 'tail_requests': 0, 'cache_hits': 0, 'negative_hits': 0}
+
+    # --- 檔案讀寫 ---
+
+    def _entry_path(self, symbol, interval):
+        safe_symbol = symbol.replace('/', '_').replace('^', '_')
+        return self.cache_dir / f"{safe_symbol}_{interval}.pkl"
+
+    def load_entry(self, symbol, interval='1d'):
+        """讀取快取項目：{'bars', 'start', 'updated_at'}，不存在時返回 None"""
+        key = (symbol, interval)
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+
+            path = self._entry_path(symbol, interval)
+            if not path.exists():
+                return None
+
+            try:
+                with open(path, 'rb') as f:
+                    entry = pickle.load(f)
+            except Exception as e:
+                print(f"  ⚠️  {symbol}: 快取檔案損壞，將重新下載 - {e}")
+                return None
+
+            self._memory[key] = entry
+            return entry
+
+    def save_entry(self, symbol, interval, bars, start):
+        """保存快取項目（先寫暫存檔再替換，避免寫入中斷造成損壞）"""
+        entry = {'bars': bars, 'start': start, 'updated_at': time.time()}
+        key = (symbol, interval)
+        with self._lock:
+            self._memory[key] = entry
+            write_atomic(self._entry_path(symbol, interval),
+                         lambda f: pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL),
+                         f'{symbol} K線快取', binary=True)
+        return entry
+
+    # --- 快取狀態判斷 ---
+
+    def _covers(self, entry, required_start):
+        """已存歷史是否涵蓋所需的起始日期"""
+        if entry['start'] is None:
+            return True
+        if required_start is None:
+            return False
+        return entry['start'] <= required_start
+
+    def _is_fresh(self, entry):
+        return time.time() - entry['updated_at'] < self.max_age
+
+    def _full_start(self, required_start):
+        """冷快取下載的起始日期：所需起始與預設歷史長度取較早者"""
+        if required_start is None:
+            return None
+        default_start = period_to_start(self.history_period)
+        if default_start is None:
+            return None
+        # 以日期為單位，讓同一批次的股票落在同一下載分組
+        return min(required_start, default_start).normalize()
+
+    def _tail_start(self, entry):
+        """尾部請求從倒數第二根K線開始，用於比對權息調整並覆蓋未收盤K線"""
+        bars = entry['bars']
+        return bars.index[-2] if len(bars) >= 2 else bars.index[-1]
+
+    def _plan(self, symbol, interval, required_start):
+        """
+        決定一支股票需要的網路請求
+        返回 ('hit', None) / ('tail', 起始日) / ('full', 起始日)
+        """
+        entry = self.load_entry(symbol, interval)
+        if entry is None or entry['bars'].empty or not self._covers(entry, required_start):
+            return 'full', self._full_start(required_start)
+        if self._is_fresh(entry):
+            return 'hit', None
+        return 'tail', self._tail_start(entry)
+
+    def _merge_tail(self, symbol, interval, tail):
+        """
+        將尾部K線併入已存歷史
+        若重疊K線價格不一致（權息調整），返回 None 表示需要完整重新下載
+        """
+        entry = self.load_entry(symbol, interval)
+        bars = entry['bars']
+        tail = normalize_bars(tail)
+
+        if tail.empty:
+            return self.save_entry(symbol, interval, bars, entry['start'])
+
+        overlap = tail.index.intersection(bars.index)
+        if len(overlap) > 0:
+            reference_date = overlap[0]
+            stored_close = bars.loc[reference_date, 'Close']
+            fetched_close = tail.loc[reference_date, 'Close']
+            if stored_close and abs(fetched_close / stored_close - 1) > ADJUSTMENT_TOLERANCE:
+                return None
+
+        merged = pd.concat([bars[bars.index < tail.index[0]], tail])
+        return self.save_entry(symbol, interval, merged, entry['start'])
+
+    def _slice(self, bars, start=None, end=None):
+        if start is not None:
+            bars = bars[bars.index >= start]
+        if end is not None:
+            bars = bars[bars.index < pd.Timestamp(end)]
+        return bars.copy()
+
+    # --- 網路請求 ---
+
+    def _history_request(self, symbol, interval, start=None, timeout=60):
+        return self.provider.history(symbol, period='max', interval=interval, start=start, timeout=timeout)
+
+    def _download_request(self, symbols, interval, start=None, timeout=60, progress=False):
+        return self.provider.download(symbols, period='max', interval=interval, start=start,
+                                      timeout=timeout, progress=progress)
+
+    def _fetch(self, symbol, interval, start=None, timeout=60):
+        try:
+            return self.fetcher.call(self._history_request, symbol, interval, start, timeout, key=symbol)
+        except Exception as e:
+            self.negative_cache.record_error(symbol, classify_error(e), e)
+            raise
+
+    def _refresh_full(self, symbol, interval, start, timeout):
+        self.stats['full_requests'] += 1
+        bars = normalize_bars(self._fetch(symbol, interval, start, timeout))
+        if bars.empty:
+            self.negative_cache.record(symbol, REASON_NO_DATA, '無數據返回')
+            return None
+        self.negative_cache.clear(symbol)
+        return self.save_entry(symbol, interval, bars, start)
+
+    # --- 公開介面 ---
+
+    def get_history(self, symbol, period='60d', interval='1d', start=None, end=None, timeout=60):
+        """
+        取得單一股票的K線，行為對應 yf.Ticker(symbol).history(period=...)
+        網路錯誤會直接拋出，由呼叫端決定重試策略；
+        在失敗快取中的股票不發出請求：有舊快取時返回舊數據，否則拋出 NegativeCacheHit
+        """
+        required_start = pd.Timestamp(start) if start is not None else period_to_start(period)
+
+        with self._lock:
+            action, fetch_start = self._plan(symbol, interval, required_start)
+
+        if action != 'hit':
+            blocked = self.negative_cache.get(symbol)
+            if blocked is not None:
+                self.stats['negative_hits'] += 1
+                if action != 'tail':
+                    raise NegativeCacheHit(symbol, blocked)
+                action = 'hit'
+
+        if action == 'hit':
+            self.stats['cache_hits'] += 1
+            entry = self.load_entry(symbol, interval)
+        elif action == 'tail':
+            self.stats['tail_requests'] += 1
+            tail = self._fetch(symbol, interval, fetch_start, timeout)
+            with self._lock:
+                entry = self._merge_tail(symbol, interval, tail)
+            if entry is not None:
+                self.negative_cache.clear(symbol)
+            else:
+                print(f"  🔄 {symbol}: 偵測到權息調整，重新下載完整歷史")
+                old_start = self.load_entry(symbol, interval)['start']
+                entry = self._refresh_full(symbol, interval, old_start, timeout)
+        else:
+            entry = self._refresh_full(symbol, interval, fetch_start, timeout)
+
+        if entry is None:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        return self._slice(entry['bars'], required_start, end)
+
+    def get_resampled(self, symbol, interval, period='2y', include_partial=True, persist=False, daily=None,
+                      timeout=60):
+        """
+        由快取的日線合成週線/月線，不對週線與月線發出額外的網路請求
+        傳入 daily 時直接使用呼叫端已取得的日線；
+        persist=True 時將合成結果另存為 '<interval>_local' 快取項目，方便離線重現
+        """
+        if daily is None:
+            daily = self.get_history(symbol, period=period, interval='1d', timeout=timeout)
+        bars = resample_bars(daily, interval, include_partial=include_partial)
+        if persist and not bars.empty:
+            self.save_entry(symbol, f"{interval}_local", bars, period_to_start(period))
+        return bars
+
+    def get_histories(self, symbols, period='60d', interval='1d', start=None, end=None,
+                      timeout=60, progress=False, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        批量取得多支股票的K線
+        需要下載的股票依起始日期分組，每組最多 batch_size 支股票、只發出一次 yf.download 請求；
+        失敗快取中的股票不下載（有舊快取時返回舊數據）
+        """
+        required_start = pd.Timestamp(start) if start is not None else period_to_start(period)
+
+        groups = {}
+        results = {}
+        skipped = []
+        with self._lock:
+            for symbol in symbols:
+                action, fetch_start = self._plan(symbol, interval, required_start)
+                if action != 'hit' and self.negative_cache.is_blocked(symbol):
+                    self.stats['negative_hits'] += 1
+                    if action != 'tail':
+                        skipped.append(symbol)
+                        continue
+                    action = 'hit'
+                if action == 'hit':
+                    self.stats['cache_hits'] += 1
+                    results[symbol] = self.load_entry(symbol, interval)
+                else:
+                    groups.setdefault((action, fetch_start), []).append(symbol)
+
+        if skipped:
+            print(f"  ⏭️  跳過 {len(skipped)} 支失敗快取中的股票: {', '.join(skipped[:10])}"
+                  f"{' ...' if len(skipped) > 10 else ''}")
+
+        batches = []
+        for (action, fetch_start), group_symbols in groups.items():
+            for i in range(0, len(group_symbols), batch_size):
+                batches.append((action, fetch_start, group_symbols[i:i + batch_size]))
+
+        # 各批次並行下載，速率由擷取器的令牌桶控制
+        calls = {}
+        for index, (action, fetch_start, group) in enumerate(batches):
+            if action == 'tail':
+                self.stats['tail_requests'] += 1
+            else:
+                self.stats['full_requests'] += 1
+            calls[index] = (self._download_request, (group, interval, fetch_start, timeout, progress), {})
+        downloads = self.fetcher.run_many(calls)
+
+        needs_full = []
+        for index, (action, fetch_start, group) in enumerate(batches):
+            download = downloads[index]
+            if not download.ok:
+                print(f"  ❌ 批量下載失敗 ({len(group)} 支股票): {download.error}")
+                continue
+            df_all = download.data
+
+            for symbol in group:
+                df_symbol = split_download(df_all, symbol, len(group))
+                with self._lock:
+                    if action == 'tail':
+                        entry = self._merge_tail(symbol, interval, df_symbol)
+                        if entry is None:
+                            needs_full.append(symbol)
+                            continue
+                    else:
+                        bars = normalize_bars(df_symbol)
+                        if bars.empty:
+                            self.negative_cache.record(symbol, REASON_NO_DATA, '批量下載無數據')
+                            continue
+                        entry = self.save_entry(symbol, interval, bars, fetch_start)
+                self.negative_cache.clear(symbol)
+                results[symbol] = entry
+
+        if needs_full:
+            refetch = {}
+            for symbol in needs_full:
+                print(f"  🔄 {symbol}: 偵測到權息調整，重新下載完整歷史")
+                old_start = self.load_entry(symbol, interval)['start']
+                self.stats['full_requests'] += 1
+                refetch[symbol] = (self._history_request, (symbol, interval, old_start, timeout), {})
+            for symbol, download in self.fetcher.run_many(refetch).items():
+                if not download.ok:
+                    print(f"  ❌ {symbol}: 重新下載失敗 - {download.error}")
+                    self.negative_cache.record_error(symbol, download.error_class, download.error)
+                    continue
+                bars = normalize_bars(download.data)
+                if bars.empty:
+                    continue
+                with self._lock:
+                    results[symbol] = self.save_entry(symbol, interval, bars, refetch[symbol][1][2])
+
+        return {
+            symbol: self._slice(entry['bars'], required_start, end)
+            for symbol, entry in results.items()
+        }
+
+
+class SymbolDataContext:
+    """
+    單次分析中一支股票共用的日線數據
+    只取得一次各階段所需的最長歷史，60日分析與各時間框架都取用同一份數據的切片，
+    確保所有階段看到的最後一根K線一致
+    now 為 period 的基準時間（回測的模擬日），省略時為目前時間
+    """
+
+    def __init__(self, symbol, daily, now=None):
+        self.symbol = symbol
+        self.daily = daily if daily is not None else pd.DataFrame(columns=OHLCV_COLUMNS)
+        self.as_of = self.daily.index[-1] if not self.daily.empty else None
+        self.now = now
+        self._slices = {}
+
+    def slice(self, period):
+        """取得最近 period（如 '60d'、'2y'）的日線，語意與 yf.Ticker.history(period=...) 相同"""
+        if period not in self._slices:
+            start = period_to_start(period, now=self.now)
+            bars = self.daily if start is None else self.daily[self.daily.index >= start]
+            self._slices[period] = bars
+        return self._slices[period].copy()
+
+
+_shared_cache = SharedInstance(MarketDataCache)
+
+
+def get_market_data_cache():
+    """全局共享的K線快取實例，分析器、多時間框架分析與回測共用"""
+    return _shared_cache.get()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+市場數據來源
+K線、基本資料與指數數據統一經由 MarketDataProvider 取得：
+- yfinance：從 Yahoo Finance 下載（預設）
+- local：從本地 CSV 檔案讀取，可在離線環境中重現分析、回測與 API 的效能測試
+
+以環境變數 BULLPS_MARKET_DATA_PROVIDER 選擇來源，
+local 來源的檔案目錄由 BULLPS_LOCAL_DATA_DIR 指定
+"""
+
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import pandas as pd
+
+from backend.path_manager import SharedInstance, get_data_subdir
+
+DEFAULT_PROVIDER = os.environ.get('BULLPS_MARKET_DATA_PROVIDER', 'yfinance').lower()
+
+LOCAL_METADATA_FILENAME = 'metadata.json'
+LOCAL_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def get_default_local_data_dir():
+    """獲取本地K線檔案目錄"""
+    env_dir = os.environ.get('BULLPS_LOCAL_DATA_DIR')
+    if env_dir:
+        return Path(env_dir)
+    return get_data_subdir('market_data')
+
+
+class MarketDataProvider(ABC):
+    """
+    市場數據來源介面
+    history 的返回格式同 yf.Ticker.history，download 同 yf.download（多股票時欄位為 (Price, Ticker)）
+    """
+
+    name = 'base'
+    rate_limited = True  # 是否需要經過 Yahoo 請求限流
+
+    @abstractmethod
+    def history(self, symbol, period=None, interval='1d', start=None, end=None, timeout=60):
+        """單一股票的K線"""
+
+    @abstractmethod
+    def download(self, symbols, period=None, interval='1d', start=None, end=None, timeout=60, progress=False):
+        """多支股票的K線"""
+
+    @abstractmethod
+    def info(self, symbol):
+        """股票基本資料（同 yf.Ticker.info）"""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance 數據來源"""
+
+    name = 'yfinance'
+    rate_limited = True
+
+    def history(self, symbol, period=None, interval='1d', start=None, end=None, timeout=60):
+        import yfinance as yf
+        kwargs = {'interval': interval, 'timeout': timeout}
+        if start is not None:
+            kwargs['start'] = pd.Timestamp(start).strftime('%Y-%m-%d')
+            if end is not None:
+                kwargs['end'] = pd.Timestamp(end).strftime('%Y-%m-%d')
+        else:
+            kwargs['period'] = period or 'max'
+        return yf.Ticker(symbol).history(**kwargs)
+
+    def download(self, symbols, period=None, interval='1d', start=None, end=None, timeout=60, progress=False):
+        import yfinance as yf
+        kwargs = {'interval': interval, 'progress': progress, 'auto_adjust': True, 'timeout': timeout}
+        if start is not None:
+            kwargs['start'] = pd.Timestamp(start).strftime('%Y-%m-%d')
+            if end is not None:
+                kwargs['end'] = pd.Timestamp(end).strftime('%Y-%m-%d')
+        else:
+            kwargs['period'] = period or 'max'
+        return yf.download(symbols, **kwargs)
+
+    def info(self, symbol):
+        import yfinance as yf
+        return yf.Ticker(symbol).info
+
+
+class LocalFileProvider(MarketDataProvider):
+    """
+    本地檔案數據來源
+    每支股票一個 <SYMBOL>.csv（Date, Open, High, Low, Close, Volume），
+    週線/月線優先讀取 <SYMBOL>_<interval>.csv，不存在時由日線合成；
+    股票名稱讀取 metadata.json（{symbol: {"name": ...}}）
+    """
+
+    name = 'local'
+    rate_limited = False
+
+    def __init__(self, data_dir=None):
+        self.data_dir = Path(data_dir) if data_dir else get_default_local_data_dir()
+        self._frames = {}
+        self._metadata = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _file_stem(symbol):
+        return symbol.replace('^', '_').replace('/', '_')
+
+    def _path(self, symbol, interval='1d'):
+        stem = self._file_stem(symbol)
+        if interval != '1d':
+            stem = f"{stem}_{interval}"
+        return self.data_dir / f"{stem}.csv"
+
+    def _read(self, symbol, interval):
+        key = (symbol, interval)
+        with self._lock:
+            if key in self._frames:
+                return self._frames[key]
+
+        path = self._path(symbol, interval)
+        if path.exists():
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+            df = df[[c for c in LOCAL_COLUMNS if c in df.columns]].sort_index()
+        elif interval != '1d' and self._path(symbol).exists():
+            from market_data_cache import resample_bars
+            df = resample_bars(self._read(symbol, '1d'), interval)
+        else:
+            # 訊息格式與 Yahoo 一致，讓錯誤分類視為查無數據而不重試
+            raise FileNotFoundError(f"{symbol}: No data found, symbol may be delisted ({path})")
+
+        with self._lock:
+            self._frames[key] = df
+        return df
+
+    def _select(self, df, period=None, start=None, end=None):
+        from market_data_cache import period_to_start
+        start = pd.Timestamp(start) if start is not None else period_to_start(period)
+        if start is not None:
+            df = df[df.index >= start]
+        if end is not None:
+            df = df[df.index < pd.Timestamp(end)]
+        return df.copy()
+
+    def history(self, symbol, period=None, interval='1d', start=None, end=None, timeout=60):
+        return self._select(self._read(symbol, interval), period, start, end)
+
+    def download(self, symbols, period=None, interval='1d', start=None, end=None, timeout=60, progress=False):
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        frames = {}
+        for symbol in symbols:
+            try:
+                frames[symbol] = self.history(symbol, period, interval, start, end)
+            except FileNotFoundError as e:
+                print(f"  ⚠️  {e}")
+        if not frames:
+            return pd.DataFrame()
+        combined = pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+        combined.columns.names = ['Price', 'Ticker']
+        return combined
+
+    def info(self, symbol):
+        with self._lock:
+            if self._metadata is None:
+                path = self.data_dir / LOCAL_METADATA_FILENAME
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        self._metadata = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    self._metadata = {}
+        record = self._metadata.get(symbol, {})
+        return {'longName': record.get('name', symbol)}
+
+    def write_history(self, symbol, bars, interval='1d'):
+        """保存一支股票的K線，供之後離線重現"""
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        bars[[c for c in LOCAL_COLUMNS if c in bars.columns]].to_csv(self._path(symbol, interval), index_label='Date')
+        with self._lock:
+            self._frames.pop((symbol, interval), None)
+
+    def write_metadata(self, records):
+        """保存股票名稱表 {symbol: {"name": ...}}"""
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.data_dir / LOCAL_METADATA_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+        with self._lock:
+            self._metadata = None
+
+
+PROVIDERS = {
+    'yfinance': YFinanceProvider,
+    'local': LocalFileProvider,
+}
+
+
+def create_provider(name=None):
+    """依名稱建立數據來源，未知名稱回退到 yfinance"""
+    name = (name or DEFAULT_PROVIDER).lower()
+    provider_class = PROVIDERS.get(name)
+    if provider_class is None:
+        print(f"⚠️ 未知的市場數據來源 '{name}'，改用 yfinance")
+        provider_class = YFinanceProvider
+    return provider_class()
+
+
+_shared_provider = SharedInstance(create_provider)
+
+
+def get_market_data_provider():
+    """全局共享的市場數據來源（由 BULLPS_MARKET_DATA_PROVIDER 決定）"""
+    return _shared_provider.get()
+
+
+def snapshot_to_local(symbols, period='2y', data_dir=None, source=None):
+    """
+    將股票K線與名稱從數據來源（預設 yfinance）保存為本地檔案，供離線重現
+    """
+    source = source or YFinanceProvider()
+    target = LocalFileProvider(data_dir)
+    metadata = {}
+    saved = 0
+    for symbol in symbols:
+        try:
+            bars = source.history(symbol, period=period)
+            if bars.empty:
+                print(f"  ⚠️  {symbol}: 無數據返回")
+                continue
+            if bars.index.tz is not None:
+                bars.index = bars.index.tz_localize(None)
+            target.write_history(symbol, bars)
+            info = source.info(symbol)
+            metadata[symbol] = {'name': info.get('longName', info.get('shortName', symbol)) or symbol}
+            saved += 1
+            print(f"  ✅ {symbol}: 已保存 {len(bars)} 根K線")
+        except Exception as e:
+            print(f"  ❌ {symbol}: 保存失敗 - {e}")
+    target.write_metadata(metadata)
+    print(f"保存完成: {saved}/{len(symbols)} 支股票 -> {target.data_dir}")
+    return saved
+
+
+if __name__ == "__main__":
+    # 將觀察名單與市場指數保存為本地檔案：python market_data_provider.py [watchlist.json] [period]
+    import sys
+    watchlist_file = sys.argv[1] if len(sys.argv) > 1 else 'stock_watchlist.json'
+    period = sys.argv[2] if len(sys.argv) > 2 else '2y'
+    with open(watchlist_file, 'r', encoding='utf-8') as f:
+        stocks = json.load(f).get('stocks', [])
+    snapshot_to_local(list(dict.fromkeys(stocks + ['SPY', 'QQQ', '^VIX'])), period=period)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+市場情緒時間序列
+由快取的 SPY、QQQ、VIX 日線計算每日的市場情緒評分，
+即時分析與回測都以 as_of 查詢當日可得的情緒，不再各自下載指數數據
+"""
+
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backend.path_manager import SharedInstance
+from market_data_cache import get_market_data_cache
+
+# 情緒評分使用的指數與回看天數（對應原本 period='30d' 的下載）
+INDEX_SYMBOLS = ['SPY', 'QQQ', '^VIX']
+WINDOW_DAYS = 30
+
+# 預設載入的歷史長度，回測需要更早的數據時會自動延伸
+DEFAULT_HISTORY_PERIOD = '2y'
+
+NEUTRAL_SENTIMENT = {'sentiment': 'neutral', 'score': 50, 'factors': ['數據不足']}
+
+
+def _window_mean(values, length):
+    """窗口內最後 length 個值的平均，不足時返回 NaN（同 rolling(length).mean().iloc[-1]）"""
+    if len(values) < length:
+        return np.nan
+    return values[-length:].mean()
+
+
+def score_window(spy_close, qqq_close, vix_close):
+    """
+    以單一回看窗口內的收盤價計算市場情緒
+    規則與 IntegratedStockAnalyzer.analyze_market_sentiment 原有邏輯相同
+    """
+    if len(spy_close) == 0 or len(qqq_close) == 0:
+        return dict(NEUTRAL_SENTIMENT)
+
+    sentiment_score = 50  # 基準分數
+    factors = []
+
+    # SPY趨勢分析
+    spy_ma5 = _window_mean(spy_close, 5)
+    spy_ma20 = _window_mean(spy_close, 20)
+    spy_current = spy_close[-1]
+
+    if spy_current > spy_ma5 > spy_ma20:
+        sentiment_score += 15
+        factors.append("SPY多頭排列")
+    elif spy_current < spy_ma5 < spy_ma20:
+        sentiment_score -= 15
+        factors.append("SPY空頭排列")
+
+    # QQQ科技股趨勢
+    qqq_ma5 = _window_mean(qqq_close, 5)
+    qqq_ma20 = _window_mean(qqq_close, 20)
+    qqq_current = qqq_close[-1]
+
+    if qqq_current > qqq_ma5 > qqq_ma20:
+        sentiment_score += 10
+        factors.append("科技股強勢")
+    elif qqq_current < qqq_ma5 < qqq_ma20:
+        sentiment_score -= 10
+        factors.append("科技股弱勢")
+
+    # VIX恐慌指數分析
+    if len(vix_close) > 0:
+        vix_current = vix_close[-1]
+        vix_ma10 = _window_mean(vix_close, 10)
+
+        if vix_current < 20:
+            sentiment_score += 10
+            factors.append("VIX低位，市場樂觀")
+        elif vix_current > 30:
+            sentiment_score -= 15
+            factors.append("VIX高位，市場恐慌")
+
+        if vix_current < vix_ma10:
+            sentiment_score += 5
+            factors.append("VIX下降趨勢")
+
+    # 近期波動性分析
+    returns = spy_close[1:] / spy_close[:-1] - 1
+    spy_volatility = returns.std(ddof=1) * np.sqrt(252) if len(returns) > 1 else np.nan
+    if spy_volatility < 0.15:
+        sentiment_score += 5
+        factors.append("市場波動性低")
+    elif spy_volatility > 0.25:
+        sentiment_score -= 10
+        factors.append("市場波動性高")
+
+    # 確定情緒等級
+    if sentiment_score >= 70:
+        sentiment = 'bullish'
+    elif sentiment_score >= 55:
+        sentiment = 'positive'
+    elif sentiment_score >= 45:
+        sentiment = 'neutral'
+    elif sentiment_score >= 30:
+        sentiment = 'negative'
+    else:
+        sentiment = 'bearish'
+
+    return {
+        'sentiment': sentiment,
+        'score': sentiment_score,
+        'factors': factors
+    }
+
+
+class MarketSentimentEngine:
+    """
+    每日市場情緒評分序列
+    整個程序共用一份計算結果；查詢更早的日期或跨日時才重新計算
+    """
+
+    def __init__(self, data_cache=None):
+        self.data_cache = data_cache or get_market_data_cache()
+        self._lock = threading.Lock()
+        self._series = None
+        self._start = None
+        self._computed_on = None
+
+    def _load_closes(self, start):
+        if start is None:
+            histories = self.data_cache.get_histories(INDEX_SYMBOLS, period=DEFAULT_HISTORY_PERIOD)
+        else:
+            histories = self.data_cache.get_histories(INDEX_SYMBOLS, start=start)
+        return {
+            symbol: histories[symbol]['Close'].dropna() if symbol in histories else pd.Series(dtype=float)
+            for symbol in INDEX_SYMBOLS
+        }
+
+    def _compute(self, closes):
+        """對 SPY 的每個交易日，以 (t - 30天, t] 的窗口計算當日情緒"""
+        spy, qqq, vix = (closes[s] for s in INDEX_SYMBOLS)
+        arrays = {s: (closes[s].index.values, closes[s].values.astype(float)) for s in INDEX_SYMBOLS}
+        window = np.timedelta64(WINDOW_DAYS, 'D')
+
+        def window_values(symbol, date):
+            dates, values = arrays[symbol]
+            lo = np.searchsorted(dates, date - window, side='right')
+            hi = np.searchsorted(dates, date, side='right')
+            return values[lo:hi]
+
+        records = []
+        for date in spy.index.values:
+            result = score_window(window_values('SPY', date), window_values('QQQ', date), window_values('^VIX', date))
+            records.append(result)
+
+        return pd.DataFrame(records, index=spy.index)
+
+    def load(self, start=None):
+        """確保情緒序列涵蓋 start 之後的所有交易日，返回序列"""
+        start = pd.Timestamp(start) if start is not None else None
+        today = datetime.now().date()
+        with self._lock:
+            covered = self._series is not None and self._computed_on == today and (
+                start is None or (self._start is not None and self._start <= start)
+            )
+            if not covered:
+                load_start = start
+                if load_start is not None:
+                    # 每個交易日需要前30天的窗口
+                    load_start = load_start - pd.Timedelta(days=WINDOW_DAYS)
+                closes = self._load_closes(load_start)
+                self._series = self._compute(closes)
+                self._start = start if start is not None else (
+                    self._series.index[0] + pd.Timedelta(days=WINDOW_DAYS) if not self._series.empty else None
+                )
+                self._computed_on = today
+            return self._series
+
+    def as_of(self, date=None):
+        """
+        查詢指定日期收盤時可得的市場情緒（date 為 None 時為最新交易日）
+        非交易日使用之前最近一個交易日的值
+        """
+        series = self.load(start=date)
+        if series is None or series.empty:
+            return dict(NEUTRAL_SENTIMENT)
+
+        if date is None:
+            row = series.iloc[-1]
+        else:
+            position = series.index.searchsorted(pd.Timestamp(date), side='right') - 1
+            if position < 0:
+                return dict(NEUTRAL_SENTIMENT)
+            row = series.iloc[position]
+
+        return {'sentiment': row['sentiment'], 'score': int(row['score']), 'factors': list(row['factors'])}
+
+
+_shared_engine = SharedInstance(MarketSentimentEngine)
+
+
+def get_market_sentiment_engine():
+    """全局共享的市場情緒引擎"""
+    return _shared_engine.get()
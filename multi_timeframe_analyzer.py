@@ -7,21 +7,27 @@
 
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from datetime import datetime, timedelta
 import warnings
+from market_data_cache import get_market_data_cache, resample_bars
+from indicator_registry import compute as compute_indicators, TREND_INDICATORS
 
 warnings.filterwarnings('ignore')
 
 class MultiTimeframeAnalyzer:
     def __init__(self):
-        self.analyzer = None  # 延遲初始化，避免循環導入
+        self.data_cache = get_market_data_cache()  # 本地K線快取
         self.timeframes = {
             'daily': '1d',
             'weekly': '1wk', 
             'monthly': '1mo'
         }
         
+        # 週線、月線預設由快取日線合成，不另外請求；persist_resampled 控制是否保存合成結果
+        self.resample_from_daily = True
+        self.include_partial_period = True
+        self.persist_resampled = False
+        
         # 時間框架權重
         self.timeframe_weights = {
             'monthly': 0.4,   # 月線權重最高，決定主趨勢
@@ -29,50 +35,47 @@ class MultiTimeframeAnalyzer:
             'daily': 0.25     # 日線權重最低，決定短期進場時機
         }
     
-    def get_multi_timeframe_data(self, symbol, period='2y'):
+    def get_multi_timeframe_data(self, symbol, period='2y', daily_data=None):
         """
         獲取多時間框架數據，包含錯誤處理
+        傳入 daily_data 時直接使用呼叫端已取得的日線，不再讀取快取
         """
         try:
             # 檢查股票代號有效性
             if not symbol or symbol in ['UNKNOWN', '$UNKNOWN']:
                 return None
 
-            ticker = yf.Ticker(symbol)
-
             # 獲取日線數據
-            daily_data = ticker.history(period=period, interval='1d')
-
-            # 獲取週線數據
-            weekly_data = ticker.history(period=period, interval='1wk')
-
-            # 獲取月線數據
-            monthly_data = ticker.history(period=period, interval='1mo')
+            if daily_data is None:
+                daily_data = self.data_cache.get_history(symbol, period=period, interval='1d')
 
             # 檢查數據完整性
             if daily_data.empty:
                 print(f"  ⚠️  {symbol}: 日線數據為空")
                 return None
 
+            if self.resample_from_daily:
+                # 由同一份日線合成週線、月線
+                weekly_data = self.data_cache.get_resampled(
+                    symbol, '1wk', period, include_partial=self.include_partial_period,
+                    persist=self.persist_resampled, daily=daily_data)
+                monthly_data = self.data_cache.get_resampled(
+                    symbol, '1mo', period, include_partial=self.include_partial_period,
+                    persist=self.persist_resampled, daily=daily_data)
+            else:
+                # 獲取週線數據
+                weekly_data = self.data_cache.get_history(symbol, period=period, interval='1wk')
+
+                # 獲取月線數據
+                monthly_data = self.data_cache.get_history(symbol, period=period, interval='1mo')
+
             if weekly_data.empty:
                 print(f"  ⚠️  {symbol}: 週線數據為空，使用日線數據替代")
-                weekly_data = daily_data.resample('W').agg({
-                    'Open': 'first',
-                    'High': 'max',
-                    'Low': 'min',
-                    'Close': 'last',
-                    'Volume': 'sum'
-                }).dropna()
+                weekly_data = resample_bars(daily_data, '1wk')
 
             if monthly_data.empty:
                 print(f"  ⚠️  {symbol}: 月線數據為空，使用日線數據替代")
-                monthly_data = daily_data.resample('M').agg({
-                    'Open': 'first',
-                    'High': 'max',
-                    'Low': 'min',
-                    'Close': 'last',
-                    'Volume': 'sum'
-                }).dropna()
+                monthly_data = resample_bars(daily_data, '1mo')
 
             # 確保有足夠的數據
             if len(daily_data) < 30:
@@ -100,13 +103,8 @@ class MultiTimeframeAnalyzer:
         分析單一時間框架的趨勢
         """
         try:
-            # 延遲導入避免循環依賴
-            if self.analyzer is None:
-                from integrated_stock_analyzer import IntegratedStockAnalyzer
-                self.analyzer = IntegratedStockAnalyzer()
-
-            # 計算技術指標
-            df_with_indicators = self.analyzer.calculate_technical_indicators(df)
+            # 只計算趨勢分析用到的均線、RSI 與 MACD
+            df_with_indicators = compute_indicators(df, want=TREND_INDICATORS)
             if df_with_indicators is None:
                 return None
             
@@ -225,13 +223,17 @@ class MultiTimeframeAnalyzer:
                 'error': str(e)
             }
     
-    def calculate_multi_timeframe_score(self, symbol, period='2y'):
+    def calculate_multi_timeframe_score(self, symbol, period='2y', daily_data=None, context=None):
         """
         計算多時間框架綜合評分
+        傳入分析上下文（同一支股票、同一分析日期）時，結果保存在其中供後續階段沿用
         """
+        if context is not None:
+            return context.memo(('mtf', symbol, period),
+                                lambda: self.calculate_multi_timeframe_score(symbol, period, daily_data))
         try:
             # 獲取多時間框架數據
-            mtf_data = self.get_multi_timeframe_data(symbol, period)
+            mtf_data = self.get_multi_timeframe_data(symbol, period, daily_data=daily_data)
             if not mtf_data:
                 return None
             
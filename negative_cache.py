@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+失敗股票快取
+記錄下載失敗的股票代號、原因與到期時間並保存到檔案，
+到期前的分析與回測都會直接跳過，不再對已下市或無效的股票發出請求
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from async_fetcher import ERROR_NOT_FOUND, ERROR_TIMEOUT, ERROR_EMPTY, ERROR_RATE_LIMITED
+from backend.path_manager import SharedInstance, get_cache_dir, write_json_atomic
+
+# 失敗原因
+REASON_DELISTED = 'delisted'  # 404、已下市、代號錯誤
+REASON_NO_DATA = 'no_data'    # 請求成功但沒有K線
+REASON_TIMEOUT = 'timeout'    # 請求超時
+REASON_ERROR = 'error'        # 其他錯誤
+
+HOUR = 3600
+DAY = 86400
+
+# 各原因的跳過時間（秒），連續失敗時加倍，最長不超過下市的跳過時間
+REASON_TTLS = {
+    REASON_DELISTED: float(os.environ.get('BULLPS_NEGATIVE_CACHE_DELISTED_DAYS', 30)) * DAY,
+    REASON_NO_DATA: 1 * DAY,
+    REASON_TIMEOUT: float(os.environ.get('BULLPS_NEGATIVE_CACHE_TIMEOUT_HOURS', 6)) * HOUR,
+    REASON_ERROR: 1 * HOUR,
+}
+
+# 擷取器錯誤類別對應的失敗原因；API限制與股票本身無關，不記錄
+ERROR_CLASS_REASONS = {
+    ERROR_NOT_FOUND: REASON_DELISTED,
+    ERROR_EMPTY: REASON_NO_DATA,
+    ERROR_TIMEOUT: REASON_TIMEOUT,
+}
+
+NEGATIVE_CACHE_FILENAME = 'negative_cache.json'
+
+
+def get_default_negative_cache_path():
+    """獲取失敗股票快取檔案路徑"""
+    return get_cache_dir('symbols') / NEGATIVE_CACHE_FILENAME
+
+
+class NegativeCacheHit(Exception):
+    """股票在失敗快取中尚未到期，已跳過網路請求"""
+
+    def __init__(self, symbol, entry):
+        self.symbol = symbol
+        self.entry = entry
+        super().__init__(f"{symbol}: 已列入失敗快取 ({entry['reason']})，"
+                         f"{format_time(entry['expires_at'])} 前跳過")
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+
+
+class NegativeCache:
+    """
+    以股票代號為鍵的失敗記錄
+    {symbol: {'reason', 'message', 'failed_at', 'expires_at', 'count'}}
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else get_default_negative_cache_path()
+        self._lock = threading.RLock()
+        self._entries = self._load()
+
+    # --- 檔案讀寫 ---
+
+    def _load(self):
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ 讀取失敗股票快取失敗，將重新建立: {e}")
+        return {}
+
+    def _save(self):
+        with self._lock:
+            write_json_atomic(self.path, self._entries, '失敗股票快取', indent=2)
+
+    # --- 記錄 ---
+
+    def record(self, symbol, reason, message=''):
+        """記錄一次失敗；同一原因連續失敗時跳過時間加倍"""
+        now = time.time()
+        with self._lock:
+            previous = self._entries.get(symbol)
+            count = previous['count'] + 1 if previous and previous['reason'] == reason else 1
+            ttl = min(REASON_TTLS[reason] * (2 ** (count - 1)), REASON_TTLS[REASON_DELISTED])
+            entry = {
+                'reason': reason,
+                'message': str(message)[:200],
+                'failed_at': now,
+                'expires_at': now + ttl,
+                'count': count
+            }
+            self._entries[symbol] = entry
+            self._save()
+        return entry
+
+    def record_error(self, symbol, error_class, error=None):
+        """依擷取器的錯誤類別記錄失敗，API限制不記錄"""
+        if error_class == ERROR_RATE_LIMITED:
+            return None
+        reason = ERROR_CLASS_REASONS.get(error_class, REASON_ERROR)
+        return self.record(symbol, reason, error or '')
+
+    def clear(self, symbol):
+        """移除一支股票的失敗記錄（例如下載成功後），返回是否存在"""
+        with self._lock:
+            if symbol not in self._entries:
+                return False
+            del self._entries[symbol]
+            self._save()
+            return True
+
+    def prune(self, symbols=None):
+        """移除已到期的記錄；指定 symbols 時移除這些股票的記錄，返回移除的股票"""
+        now = time.time()
+        with self._lock:
+            if symbols is None:
+                removed = [s for s, e in self._entries.items() if e['expires_at'] <= now]
+            else:
+                removed = [s for s in symbols if s in self._entries]
+            for symbol in removed:
+                del self._entries[symbol]
+            if removed:
+                self._save()
+        return removed
+
+    # --- 查詢 ---
+
+    def get(self, symbol):
+        """尚未到期的失敗記錄，沒有或已到期時返回 None"""
+        with self._lock:
+            entry = self._entries.get(symbol)
+        if entry is None or entry['expires_at'] <= time.time():
+            return None
+        return entry
+
+    def is_blocked(self, symbol):
+        return self.get(symbol) is not None
+
+    def check(self, symbol):
+        """股票尚未到期時拋出 NegativeCacheHit"""
+        entry = self.get(symbol)
+        if entry is not None:
+            raise NegativeCacheHit(symbol, entry)
+
+    def partition(self, symbols):
+        """將股票分為 (可請求, 跳過) 兩組"""
+        allowed, blocked = [], []
+        for symbol in symbols:
+            (blocked if self.is_blocked(symbol) else allowed).append(symbol)
+        return allowed, blocked
+
+    def blocked_symbols(self):
+        now = time.time()
+        with self._lock:
+            return sorted(s for s, e in self._entries.items() if e['expires_at'] > now)
+
+    def entries(self, include_expired=False):
+        """返回失敗記錄列表（含可讀的時間）"""
+        now = time.time()
+        with self._lock:
+            items = sorted(self._entries.items())
+        return [
+            {
+                'symbol': symbol,
+                'reason': entry['reason'],
+                'message': entry['message'],
+                'count': entry['count'],
+                'failed_at': format_time(entry['failed_at']),
+                'expires_at': format_time(entry['expires_at']),
+                'expired': entry['expires_at'] <= now
+            }
+            for symbol, entry in items
+            if include_expired or entry['expires_at'] > now
+        ]
+
+
+_shared_cache = SharedInstance(NegativeCache)
+
+
+def get_negative_cache():
+    """全局共享的失敗股票快取"""
+    return _shared_cache.get()
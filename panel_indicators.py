@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+橫截面技術指標引擎
+把整個觀察清單的K線對齊成（日期 × 股票）矩陣，每個指標對所有股票只執行一次
+向量化計算（均線、RSI、MACD、布林通道、KD、OBV、ADX），取代逐支股票的大量小型 pandas 呼叫。
+指標公式直接沿用 indicator_registry 的定義（pandas 的 rolling/ewm 在 DataFrame 上逐欄計算，
+結果與單支股票完全相同），view(symbol) / columns_for(symbol) 提供單一股票的結果給 analyze_stock。
+"""
+
+import numpy as np
+import pandas as pd
+
+from indicator_frame import IndicatorFrame
+from indicator_registry import INDICATORS, INDICATOR_COLUMNS, resolve
+from rolling_primitives import rolling
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 以整個矩陣計算的指標（其餘逐列評分與 SAR 仍逐支計算）
+PANEL_INDICATORS = (
+    'MA5', 'MA10', 'MA20', 'MA30', 'MA60', 'RSI', 'MACD', 'MACD_Signal', 'MACD_Histogram',
+    'BB_Middle', 'BB_Upper', 'BB_Lower', 'Volatility', 'Volatility_Ratio', 'Volume_MA', 'Volume_Ratio',
+    'Price_Momentum', 'RSV', 'K', 'D', 'OBV', 'OBV_MA', 'ADX', 'RSI_Slope', 'MACD_Slope', 'K_Slope',
+)
+
+
+def adx(matrices, period=14):
+    """
+    矩陣版 ADX，結果與 indicator_registry.adx 逐欄相同
+    原公式以位置索引的 Series 除以K線索引的 TR，索引不是 0..n-1 時對齊後全為 NaN、補 0，
+    因此日期索引的K線 ADX 恆為 0
+    """
+    high, low, close = matrices['High'], matrices['Low'], matrices['Close']
+    if isinstance(high.index, pd.DatetimeIndex):
+        return pd.DataFrame(0.0, index=high.index, columns=high.columns)
+    if not high.index.equals(pd.RangeIndex(len(high))):
+        # 其他索引的對齊結果不易推導，逐支使用原公式
+        return pd.DataFrame({
+            symbol: INDICATORS['ADX'].func(pd.DataFrame({
+                'High': high[symbol], 'Low': low[symbol], 'Close': close[symbol]}), None)
+            for symbol in high.columns
+        }, index=high.index)
+
+    high_diff = high.diff()
+    low_diff = low.diff()
+    plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
+    minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
+
+    tr1 = high - low
+    tr2 = abs(high - close.shift(1))
+    tr3 = abs(low - close.shift(1))
+    tr = np.maximum(tr1, np.maximum(tr2, tr3))
+
+    tr_mean = rolling(tr, period)
+    plus_di = rolling(plus_dm, period) / tr_mean * 100
+    minus_di = rolling(minus_dm, period) / tr_mean * 100
+
+    dx = abs(plus_di - minus_di) / (plus_di + minus_di) * 100
+    return rolling(dx, period).fillna(0)
+
+
+# 需要矩陣專用實作的指標，其餘直接套用註冊表的公式
+PANEL_KERNELS = {'ADX': adx}
+
+
+def align_histories(histories, columns=OHLCV_COLUMNS):
+    """
+    依交易日曆把K線分組，返回 [(index, symbols, {欄位: 日期 × 股票 矩陣})]
+    只有日期完全相同的股票放在同一組，避免補值改變滾動視窗的結果
+    """
+    groups = []
+    for symbol, data in histories.items():
+        if data is None or data.empty or not set(columns).issubset(data.columns):
+            continue
+        for index, symbols in groups:
+            if index.equals(data.index):
+                symbols.append(symbol)
+                break
+        else:
+            groups.append((data.index, [symbol]))
+
+    aligned = []
+    for index, symbols in groups:
+        fields = {
+            column: pd.DataFrame(
+                np.column_stack([histories[symbol][column].to_numpy(dtype=np.float64) for symbol in symbols]),
+                index=index, columns=symbols)
+            for column in columns
+        }
+        aligned.append((index, symbols, fields))
+    return aligned
+
+
+def compute_panel(fields, want=PANEL_INDICATORS):
+    """對（日期 × 股票）矩陣計算 want 中的指標（含依賴），返回 {名稱: 矩陣}"""
+    matrices = dict(fields)
+    overrides = {'sar': None}
+    for name in resolve(want):
+        kernel = PANEL_KERNELS.get(name)
+        matrices[name] = kernel(matrices) if kernel is not None else INDICATORS[name].func(matrices, overrides)
+    return matrices
+
+
+class _CalendarGroup:
+    """同一交易日曆的股票與其指標矩陣"""
+
+    __slots__ = ('index', 'symbols', 'positions', 'matrices')
+
+    def __init__(self, index, symbols, matrices):
+        self.index = index
+        self.symbols = symbols
+        self.positions = {symbol: i for i, symbol in enumerate(symbols)}
+        self.matrices = {name: matrix.to_numpy(dtype=np.float64) for name, matrix in matrices.items()}
+
+
+class IndicatorPanel:
+    """
+    整個觀察清單的橫截面指標
+    matrix(name) 取得（日期 × 股票）矩陣，view(symbol) 取得單一股票的 IndicatorFrame
+    """
+
+    def __init__(self, groups, names):
+        self.groups = groups
+        self.names = list(names)
+        self._group_of = {symbol: group for group in groups for symbol in group.symbols}
+
+    @classmethod
+    def from_histories(cls, histories, want=PANEL_INDICATORS):
+        """histories: {股票代號: K線 DataFrame}"""
+        names = [name for name in INDICATOR_COLUMNS if name in set(resolve(want))]
+        groups = [
+            _CalendarGroup(index, symbols, compute_panel(fields, want))
+            for index, symbols, fields in align_histories(histories)
+        ]
+        return cls(groups, names)
+
+    @property
+    def symbols(self):
+        return list(self._group_of)
+
+    def __contains__(self, symbol):
+        return symbol in self._group_of
+
+    def __len__(self):
+        return len(self._group_of)
+
+    def matrix(self, name, group=0):
+        """第 group 組交易日曆的（日期 × 股票）指標矩陣"""
+        calendar = self.groups[group]
+        return pd.DataFrame(calendar.matrices[name], index=calendar.index, columns=calendar.symbols)
+
+    def columns_for(self, symbol, data=None):
+        """
+        單一股票的 {欄位: 陣列}（K線欄位與指標）
+        傳入 data 時確認日期與收盤價都相同，不同則返回 None（改為逐支計算）
+        """
+        group = self._group_of.get(symbol)
+        if group is None:
+            return None
+        position = group.positions[symbol]
+        if data is not None:
+            if not data.index.equals(group.index) or 'Close' not in data.columns:
+                return None
+            if not np.array_equal(data['Close'].to_numpy(dtype=np.float64),
+                                  group.matrices['Close'][:, position], equal_nan=True):
+                return None
+        return {name: matrix[:, position] for name, matrix in group.matrices.items()}
+
+    def view(self, symbol, dtype=np.float64):
+        """單一股票的 IndicatorFrame（K線欄位 + 矩陣指標）"""
+        columns = self.columns_for(symbol)
+        if columns is None:
+            return None
+        group = self._group_of[symbol]
+        frame = IndicatorFrame.allocate(group.index, OHLCV_COLUMNS + self.names, dtype)
+        for name in frame.columns:
+            frame[name] = columns[name]
+        return frame
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+請求限流器
+以令牌桶控制對 Yahoo Finance 的請求速率，取代固定的 time.sleep 延遲
+"""
+
+import os
+import threading
+import time
+
+from backend.path_manager import SharedInstance
+
+# 預設每秒請求數與允許的突發請求數
+DEFAULT_REQUESTS_PER_SECOND = float(os.environ.get('BULLPS_YAHOO_RPS', 2.0))
+DEFAULT_BURST = int(os.environ.get('BULLPS_YAHOO_BURST', 5))
+
+
+class RateLimiter:
+    """
+    令牌桶限流器
+    平均每秒最多 rate 次請求，閒置時最多累積 burst 個令牌
+    """
+
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+    def try_acquire(self, tokens=1):
+        """嘗試取得令牌，不等待；成功返回 True"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens=1):
+        """距離可取得令牌還需等待的秒數"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """阻塞直到取得令牌，返回實際等待的秒數"""
+        waited = 0.0
+        while not self.try_acquire(tokens):
+            delay = self.wait_time(tokens)
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+
+class UnlimitedRateLimiter:
+    """不限流（本地數據來源使用），介面與 RateLimiter 相同"""
+
+    def try_acquire(self, tokens=1):
+        return True
+
+    def wait_time(self, tokens=1):
+        return 0.0
+
+    def acquire(self, tokens=1):
+        return 0.0
+
+
+_yahoo_limiter = SharedInstance(RateLimiter)
+
+
+def get_yahoo_rate_limiter():
+    """全局共享的 Yahoo Finance 請求限流器"""
+    return _yahoo_limiter.get()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+滾動窗口基本運算
+在 NumPy 陣列上以 O(n) 計算滾動極值（單調佇列）、滾動平均（Kahan 加減法）、
+滾動變異數/標準差（Welford 加減法），以及可設定寬度的區域高低點遮罩。
+極值與平均重現 pandas 的滾動核心（補償項、連續相同值的處理），與 Series.rolling(...).mean() /
+.min() / .max() 逐位元相同；變異數/標準差的 Welford 遞迴與 pandas 在浮點誤差範圍內相同
+（價格、成交量等一般資料多數逐位元相同）。安裝 numba 時使用 JIT 編譯。
+rolling(obj, ...) 接受 Series 或（日期 × 股票）DataFrame，所有指標的滾動計算都經由這裡。
+"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = os.environ.get('BULLPS_DISABLE_JIT', '0') != '1'
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+
+ROLLING_METHODS = ('mean', 'std', 'var', 'min', 'max')
+
+
+def _rolling_extreme(values, window, min_periods, use_max):
+    """
+    單調佇列的滾動最大/最小值：佇列保存窗口內可能成為極值的位置，每個位置最多進出一次
+    NaN 不進入佇列；窗口內非 NaN 的數量少於 min_periods 時為 NaN
+    """
+    n = len(values)
+    result = np.empty(n)
+    queue = np.empty(n, dtype=np.int64)
+    head = 0
+    tail = 0
+    nobs = 0
+    for i in range(n):
+        value = values[i]
+        if value == value:
+            nobs += 1
+            if use_max:
+                while tail > head and values[queue[tail - 1]] <= value:
+                    tail -= 1
+            else:
+                while tail > head and values[queue[tail - 1]] >= value:
+                    tail -= 1
+            queue[tail] = i
+            tail += 1
+        if i >= window:
+            expired = values[i - window]
+            if expired == expired:
+                nobs -= 1
+            if tail > head and queue[head] <= i - window:
+                head += 1
+        if tail > head and nobs >= min_periods:
+            result[i] = values[queue[head]]
+        else:
+            result[i] = np.nan
+    return result
+
+
+def _rolling_mean(values, window, min_periods):
+    """同 pandas roll_mean：Kahan 加減法、負數計數與連續相同值的處理"""
+    n = len(values)
+    result = np.empty(n)
+    nobs = 0
+    total = 0.0
+    neg_ct = 0
+    comp_add = 0.0
+    comp_remove = 0.0
+    same_count = 0
+    prev_value = np.nan
+    for i in range(n):
+        if i == 0 or window <= 1:
+            # 窗口與前一個窗口不重疊：重新累計
+            nobs = 0
+            total = 0.0
+            neg_ct = 0
+            comp_add = 0.0
+            comp_remove = 0.0
+            same_count = 0
+            prev_value = values[max(i - window + 1, 0)]
+        elif i >= window:
+            value = values[i - window]
+            if value == value:
+                nobs -= 1
+                y = -value - comp_remove
+                t = total + y
+                comp_remove = t - total - y
+                total = t
+                if math.copysign(1.0, value) < 0:
+                    neg_ct -= 1
+        value = values[i]
+        if value == value:
+            nobs += 1
+            y = value - comp_add
+            t = total + y
+            comp_add = t - total - y
+            total = t
+            if math.copysign(1.0, value) < 0:
+                neg_ct += 1
+            if value == prev_value:
+                same_count += 1
+            else:
+                same_count = 1
+            prev_value = value
+
+        if nobs >= min_periods and nobs > 0:
+            mean = total / nobs
+            if same_count >= nobs:
+                mean = prev_value
+            elif neg_ct == 0 and mean < 0:
+                mean = 0.0
+            elif neg_ct == nobs and mean > 0:
+                mean = 0.0
+            result[i] = mean
+        else:
+            result[i] = np.nan
+    return result
+
+
+def _rolling_var(values, window, min_periods, ddof):
+    """同 pandas roll_var：Welford 加減法（含 Kahan 補償），窗口內全為相同值時變異數為 0"""
+    n = len(values)
+    result = np.empty(n)
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    comp_add = 0.0
+    comp_remove = 0.0
+    same_count = 0
+    prev_value = np.nan
+    for i in range(n):
+        if i == 0 or window <= 1:
+            nobs = 0
+            mean = 0.0
+            ssqdm = 0.0
+            comp_add = 0.0
+            comp_remove = 0.0
+            same_count = 0
+            prev_value = values[max(i - window + 1, 0)]
+        elif i >= window:
+            value = values[i - window]
+            if value == value:
+                nobs -= 1
+                if nobs == 1:
+                    # 只剩一個值：平均即為該值，不保留遞迴誤差
+                    for j in range(i - window + 1, i):
+                        if values[j] == values[j]:
+                            mean = values[j]
+                    ssqdm = 0.0
+                elif nobs:
+                    prev_mean = mean - comp_remove
+                    y = value - comp_remove
+                    t = y - mean
+                    comp_remove = t + mean - y
+                    mean = mean - t / nobs
+                    ssqdm = ssqdm - (value - prev_mean) * (value - mean)
+                else:
+                    mean = 0.0
+                    ssqdm = 0.0
+        value = values[i]
+        if value == value:
+            nobs += 1
+            if value == prev_value:
+                same_count += 1
+            else:
+                same_count = 1
+            prev_value = value
+            prev_mean = mean - comp_add
+            y = value - comp_add
+            t = y - mean
+            comp_add = t + mean - y
+            mean = mean + t / nobs
+            ssqdm = ssqdm + (value - prev_mean) * (value - mean)
+
+        all_same = nobs > 0 and same_count >= nobs
+        if all_same:
+            # 窗口內全為相同值：重設累計值避免殘留誤差
+            mean = prev_value
+            ssqdm = 0.0
+        if nobs >= min_periods and nobs > ddof:
+            if all_same or nobs == 1:
+                result[i] = 0.0
+            else:
+                result[i] = ssqdm / (nobs - ddof)
+        else:
+            result[i] = np.nan
+    return result
+
+
+if njit is not None:
+    _rolling_extreme_jit = njit(cache=True)(_rolling_extreme)
+    _rolling_mean_jit = njit(cache=True)(_rolling_mean)
+    _rolling_var_jit = njit(cache=True)(_rolling_var)
+else:
+    _rolling_extreme_jit = _rolling_mean_jit = _rolling_var_jit = None
+
+
+def _kernel_input(values, use_jit):
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if use_jit is None:
+        use_jit = NUMBA_AVAILABLE
+    use_jit = use_jit and _rolling_mean_jit is not None
+    # 純 Python 版本在 list 上逐項存取比 NumPy 純量快
+    return (values if use_jit else values.tolist()), use_jit
+
+
+def _min_periods(window, min_periods):
+    if window < 1:
+        raise ValueError("window 必須為正整數")
+    return window if min_periods is None else min_periods
+
+
+def rolling_max(values, window, min_periods=None, use_jit=None):
+    """同 Series.rolling(window, min_periods).max()"""
+    data, use_jit = _kernel_input(values, use_jit)
+    kernel = _rolling_extreme_jit if use_jit else _rolling_extreme
+    return kernel(data, window, _min_periods(window, min_periods), True)
+
+
+def rolling_min(values, window, min_periods=None, use_jit=None):
+    """同 Series.rolling(window, min_periods).min()"""
+    data, use_jit = _kernel_input(values, use_jit)
+    kernel = _rolling_extreme_jit if use_jit else _rolling_extreme
+    return kernel(data, window, _min_periods(window, min_periods), False)
+
+
+def rolling_mean(values, window, min_periods=None, use_jit=None):
+    """同 Series.rolling(window, min_periods).mean()"""
+    data, use_jit = _kernel_input(values, use_jit)
+    kernel = _rolling_mean_jit if use_jit else _rolling_mean
+    return kernel(data, window, _min_periods(window, min_periods))
+
+
+def rolling_var(values, window, min_periods=None, ddof=1, use_jit=None):
+    """同 Series.rolling(window, min_periods).var(ddof)"""
+    data, use_jit = _kernel_input(values, use_jit)
+    kernel = _rolling_var_jit if use_jit else _rolling_var
+    return kernel(data, window, _min_periods(window, min_periods), ddof)
+
+
+def rolling_std(values, window, min_periods=None, ddof=1, use_jit=None):
+    """同 Series.rolling(window, min_periods).std(ddof)（浮點誤差造成的負變異數視為 0）"""
+    return np.sqrt(np.maximum(rolling_var(values, window, min_periods, ddof, use_jit), 0.0))
+
+
+_ARRAY_KERNELS = {
+    'mean': rolling_mean,
+    'std': rolling_std,
+    'var': rolling_var,
+    'min': rolling_min,
+    'max': rolling_max,
+}
+
+
+def _local_extrema(values, width, strict, use_max):
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    mask = np.zeros(n, dtype=bool)
+    if width < 1 or n < 2 * width + 1:
+        return mask
+    center = values[width:n - width]
+    inner = np.ones(len(center), dtype=bool)
+    for offset in range(1, width + 1):
+        for neighbour in (values[width - offset:n - width - offset], values[width + offset:n - width + offset]):
+            if use_max:
+                inner &= (center > neighbour) if strict else (center >= neighbour)
+            else:
+                inner &= (center < neighbour) if strict else (center <= neighbour)
+    mask[width:n - width] = inner
+    return mask
+
+
+def local_minima(values, width=1, strict=False):
+    """
+    區域低點遮罩：第 i 個值低於（strict）或不高於前後各 width 個值
+    前後不足 width 個值的位置與 NaN 恆為 False
+    """
+    return _local_extrema(values, width, strict, use_max=False)
+
+
+def local_maxima(values, width=1, strict=False):
+    """區域高點遮罩：第 i 個值高於（strict）或不低於前後各 width 個值"""
+    return _local_extrema(values, width, strict, use_max=True)
+
+
+def rolling(obj, window, how='mean', min_periods=None, use_jit=None):
+    """
+    同 obj.rolling(window, min_periods).<how>()，obj 為 Series 或 DataFrame（逐欄計算）
+    未安裝 numba 時純 Python 迴圈比 pandas 的編譯核心慢，改用 pandas（兩者結果相同）
+    """
+    if how not in ROLLING_METHODS:
+        raise ValueError(f"不支援的滾動運算: {how}")
+    if use_jit is None:
+        use_jit = NUMBA_AVAILABLE
+    if not use_jit or _rolling_mean_jit is None:
+        return getattr(obj.rolling(window=window, min_periods=min_periods), how)()
+
+    kernel = _ARRAY_KERNELS[how]
+    if isinstance(obj, pd.DataFrame):
+        values = obj.to_numpy(dtype=np.float64, na_value=np.nan)
+        result = np.empty_like(values)
+        for j in range(values.shape[1]):
+            result[:, j] = kernel(values[:, j], window, min_periods, use_jit=True)
+        return pd.DataFrame(result, index=obj.index, columns=obj.columns)
+    values = obj.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.Series(kernel(values, window, min_periods, use_jit=True), index=obj.index, name=obj.name)
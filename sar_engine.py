@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parabolic SAR 計算引擎
+直接在 NumPy 陣列上執行 SAR 遞迴（安裝 numba 時使用 JIT 編譯），
+結果與原本逐列 .iloc 的實作逐位元相同，包含依波動性選擇 af / max_af 的邏輯；
+PrefixSAR 讓回測只對完整歷史計算一次，之後每個模擬日直接取前 n 根K線的 SAR
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = os.environ.get('BULLPS_DISABLE_JIT', '0') != '1'
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+
+# 波動性分級：(年化波動率門檻, af, max_af)，由高到低檢查
+SAR_VOLATILITY_TIERS = [
+    (0.4, 0.015, 0.15),   # 高波動股票：較小的加速因子，避免過於敏感
+    (0.25, 0.02, 0.2),    # 中等波動：標準參數
+]
+SAR_DEFAULT_PARAMS = (0.025, 0.25)  # 低波動股票：較大的加速因子，提高敏感度
+
+# 初始趨勢判斷使用的K線數
+INITIAL_BARS = 5
+
+
+def sar_volatility(close):
+    """SAR 參數選擇使用的年化波動率"""
+    return close.pct_change().std() * np.sqrt(252)
+
+
+def select_sar_params(volatility, af=None, max_af=None):
+    """根據波動性選擇 af 與 max_af；已指定的參數保持不變"""
+    tier_af, tier_max_af = SAR_DEFAULT_PARAMS
+    for threshold, threshold_af, threshold_max_af in SAR_VOLATILITY_TIERS:
+        if volatility > threshold:
+            tier_af, tier_max_af = threshold_af, threshold_max_af
+            break
+    return (tier_af if af is None else af), (tier_max_af if max_af is None else max_af)
+
+
+def _sar_recursion(low, high, close, af, max_af):
+    """
+    SAR 遞迴本體，運算順序與原實作完全相同（包含 NaN 的比較語意）
+    low / high / close 為 float64 陣列或 list，長度至少為 INITIAL_BARS
+    """
+    n = len(close)
+    sar = np.empty(n)
+
+    # 使用前5天的趨勢來判斷初始方向（pandas 的 min/max 會略過 NaN）
+    low_min = np.nan
+    high_max = np.nan
+    for j in range(INITIAL_BARS):
+        if low[j] == low[j] and (low_min != low_min or low[j] < low_min):
+            low_min = low[j]
+        if high[j] == high[j] and (high_max != high_max or high[j] > high_max):
+            high_max = high[j]
+
+    trend = 1 if close[INITIAL_BARS - 1] > close[0] else -1
+    if trend == 1:
+        sar[0] = low_min
+        ep = high_max
+    else:
+        sar[0] = high_max
+        ep = low_min
+
+    af_val = af
+    for i in range(1, n):
+        prev_sar = sar[i - 1]
+        sar_val = prev_sar + af_val * (ep - prev_sar)
+
+        if trend == 1:  # 上升趨勢
+            # 防止SAR超過前兩天的最低價（同 min(sar_val, low[i-1], low[i-2])）
+            if i >= 2:
+                if low[i - 1] < sar_val:
+                    sar_val = low[i - 1]
+                if low[i - 2] < sar_val:
+                    sar_val = low[i - 2]
+
+            if low[i] < sar_val:
+                # 趨勢反轉
+                trend = -1
+                sar_val = ep
+                ep = low[i]
+                af_val = af
+            elif high[i] > ep:
+                ep = high[i]
+                af_val = min(af_val + af, max_af)
+        else:  # 下降趨勢
+            # 防止SAR低於前兩天的最高價（同 max(sar_val, high[i-1], high[i-2])）
+            if i >= 2:
+                if high[i - 1] > sar_val:
+                    sar_val = high[i - 1]
+                if high[i - 2] > sar_val:
+                    sar_val = high[i - 2]
+
+            if high[i] > sar_val:
+                # 趨勢反轉
+                trend = 1
+                sar_val = ep
+                ep = high[i]
+                af_val = af
+            elif low[i] < ep:
+                ep = low[i]
+                af_val = min(af_val + af, max_af)
+
+        sar[i] = sar_val
+
+    return sar
+
+
+_sar_recursion_jit = njit(cache=True)(_sar_recursion) if njit is not None else None
+
+
+def sar_recursion(low, high, close, af, max_af, use_jit=None):
+    """對 float64 陣列執行 SAR 遞迴，可用時使用 JIT 版本"""
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    if use_jit is None:
+        use_jit = NUMBA_AVAILABLE
+    if use_jit and _sar_recursion_jit is not None:
+        return _sar_recursion_jit(low, high, close, float(af), float(max_af))
+    # 純 Python 版本在 list 上逐項存取比 NumPy 純量快
+    return _sar_recursion(low.tolist(), high.tolist(), close.tolist(), float(af), float(max_af))
+
+
+def _finalize(raw, df):
+    """處理無效值並限制在合理範圍內（不能是負數或過大）"""
+    sar_series = pd.Series(raw, index=df.index)
+    sar_series = sar_series.ffill()  # 前向填充
+    sar_series = sar_series.fillna(df['Close'])     # 如果還有NaN，用收盤價填充
+    return sar_series.clip(lower=df['Close'].min() * 0.5, upper=df['Close'].max() * 1.5)
+
+
+def calculate_sar(df, af=None, max_af=None, use_jit=None):
+    """
+    智能動態SAR計算
+    根據股票波動性自動調整參數，返回與 df 同索引的 Series
+    """
+    af, max_af = select_sar_params(sar_volatility(df['Close']), af, max_af)
+
+    # 對於數據不足的情況，返回一個簡單的SAR序列
+    if len(df) < INITIAL_BARS:
+        close_price = df['Close'].iloc[0] if not df.empty else 0
+        return pd.Series([close_price * 0.98] * len(df), index=df.index)
+
+    raw = sar_recursion(df['Low'].values, df['High'].values, df['Close'].values, af, max_af, use_jit)
+    return _finalize(raw, df)
+
+
+class PrefixSAR:
+    """
+    對完整歷史預先計算 SAR，prefix(n) 返回與 calculate_sar(df.iloc[:n]) 完全相同的結果
+    SAR 遞迴只依賴當根及之前的K線，因此每個波動性分級只需對完整歷史遞迴一次；
+    各前綴只重新計算波動率（決定分級）與收盤價範圍（決定上下限）
+    """
+
+    def __init__(self, df, af=None, max_af=None, use_jit=None):
+        self.df = df
+        self.af = af
+        self.max_af = max_af
+        self.use_jit = use_jit
+        self._returns = df['Close'].pct_change()
+        # 各前綴的收盤價最小/最大值（略過 NaN，同 Series.min / Series.max）
+        close = df['Close'].values.astype(np.float64)
+        self._close_min = np.fmin.accumulate(close) if len(close) else close
+        self._close_max = np.fmax.accumulate(close) if len(close) else close
+        self._filled = {}  # {(af, max_af): 已前向填充的完整 SAR 陣列}
+
+    def _filled_sar(self, params):
+        filled = self._filled.get(params)
+        if filled is None:
+            df = self.df
+            raw = sar_recursion(df['Low'].values, df['High'].values, df['Close'].values,
+                                params[0], params[1], self.use_jit)
+            filled = pd.Series(raw, index=df.index).ffill().fillna(df['Close']).values
+            self._filled[params] = filled
+        return filled
+
+    def prefix(self, n):
+        """前 n 根K線的 SAR"""
+        if n < INITIAL_BARS:
+            return calculate_sar(self.df.iloc[:n], self.af, self.max_af, self.use_jit)
+
+        volatility = self._returns.iloc[:n].std() * np.sqrt(252)
+        params = select_sar_params(volatility, self.af, self.max_af)
+        lower = self._close_min[n - 1] * 0.5
+        upper = self._close_max[n - 1] * 1.5
+        values = self._filled_sar(params)[:n]
+        if np.isnan(lower) or np.isnan(upper):
+            # 收盤價全為 NaN 時沒有上下限，交由 pandas 處理
+            return pd.Series(values, index=self.df.index[:n]).clip(lower=lower, upper=upper)
+        return pd.Series(np.minimum(np.maximum(values, lower), upper), index=self.df.index[:n])
+
+
+class IncrementalSAR:
+    """
+    固定 af / max_af 的 SAR 遞迴狀態，每次加入一根K線以 O(1) 更新
+    update 返回前向填充後的最新 SAR（同 _finalize 的 ffill 與 fillna(Close)，未做上下限限制），
+    前 INITIAL_BARS 根K線先暫存，湊齊後一次完成初始化與前幾步遞迴，結果與 sar_recursion 逐位元相同
+    """
+
+    __slots__ = ('af', 'max_af', 'count', 'pending', 'sar', 'trend', 'ep', 'af_val',
+                 'low_1', 'low_2', 'high_1', 'high_2', 'last_valid')
+
+    def __init__(self, af, max_af):
+        self.af = float(af)
+        self.max_af = float(max_af)
+        self.count = 0
+        self.pending = []  # 初始化前暫存的 (low, high, close)
+        self.sar = np.nan
+        self.trend = 1
+        self.ep = np.nan
+        self.af_val = self.af
+        self.low_1 = self.low_2 = np.nan    # 前一天、前兩天的最低價
+        self.high_1 = self.high_2 = np.nan  # 前一天、前兩天的最高價
+        self.last_valid = None              # 最近一個非 NaN 的 SAR（前向填充用）
+
+    def _step(self, low, high, i):
+        """遞迴的第 i 步，運算順序同 _sar_recursion"""
+        prev_sar = self.sar
+        sar_val = prev_sar + self.af_val * (self.ep - prev_sar)
+
+        if self.trend == 1:
+            if i >= 2:
+                if self.low_1 < sar_val:
+                    sar_val = self.low_1
+                if self.low_2 < sar_val:
+                    sar_val = self.low_2
+
+            if low < sar_val:
+                self.trend = -1
+                sar_val = self.ep
+                self.ep = low
+                self.af_val = self.af
+            elif high > self.ep:
+                self.ep = high
+                self.af_val = min(self.af_val + self.af, self.max_af)
+        else:
+            if i >= 2:
+                if self.high_1 > sar_val:
+                    sar_val = self.high_1
+                if self.high_2 > sar_val:
+                    sar_val = self.high_2
+
+            if high > sar_val:
+                self.trend = 1
+                sar_val = self.ep
+                self.ep = high
+                self.af_val = self.af
+            elif low < self.ep:
+                self.ep = low
+                self.af_val = min(self.af_val + self.af, self.max_af)
+
+        self._push(sar_val, low, high)
+
+    def _push(self, sar_val, low, high):
+        self.sar = sar_val
+        if sar_val == sar_val:
+            self.last_valid = sar_val
+        self.low_2, self.low_1 = self.low_1, low
+        self.high_2, self.high_1 = self.high_1, high
+
+    def _initialize(self):
+        lows = [bar[0] for bar in self.pending]
+        highs = [bar[1] for bar in self.pending]
+        closes = [bar[2] for bar in self.pending]
+        self.pending = []
+
+        low_min = np.nan
+        high_max = np.nan
+        for j in range(INITIAL_BARS):
+            if lows[j] == lows[j] and (low_min != low_min or lows[j] < low_min):
+                low_min = lows[j]
+            if highs[j] == highs[j] and (high_max != high_max or highs[j] > high_max):
+                high_max = highs[j]
+
+        self.trend = 1 if closes[INITIAL_BARS - 1] > closes[0] else -1
+        if self.trend == 1:
+            sar_val, self.ep = low_min, high_max
+        else:
+            sar_val, self.ep = high_max, low_min
+        self._push(sar_val, lows[0], highs[0])
+
+        for i in range(1, INITIAL_BARS):
+            self._step(lows[i], highs[i], i)
+
+    def update(self, low, high, close):
+        """加入一根K線；不足 INITIAL_BARS 根時返回 None（此時批次計算不使用遞迴）"""
+        self.count += 1
+        if self.count < INITIAL_BARS:
+            self.pending.append((low, high, close))
+            return None
+        if self.count == INITIAL_BARS:
+            self.pending.append((low, high, close))
+            self._initialize()
+        else:
+            self._step(low, high, self.count - 1)
+        return self.last_valid if self.last_valid is not None else close
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(state, name, data[name])
+        state.pending = [tuple(bar) for bar in state.pending]
+        return state
+
+
+# SAR 翻轉信號代碼
+SAR_BUY = 1
+SAR_SELL = -1
+
+# 確認因素：位元 k 對應第 k 個說明
+SAR_SELL_FACTORS = ("放量下跌", "RSI偏高", "MACD轉弱", "跌破5日均線", "連續下跌")
+SAR_BUY_FACTORS = ("放量上漲", "RSI健康", "MACD轉強")
+
+
+def sar_flip_signals(close, sar, volume_ratio, rsi, macd_hist, ma5):
+    """
+    由已計算的 SAR 以整欄陣列運算找出翻轉信號與確認分數
+    收盤價由 SAR 之上跌破為 SELL、由 SAR 之下突破為 BUY（前兩根K線不判斷），
+    返回 {'signal': int8 (SAR_BUY / SAR_SELL / 0), 'score': int8, 'factors': uint8 位元遮罩,
+    'max_score': int8（SELL 為 5，其餘為 3，前兩根為 0）}
+    """
+    close = np.asarray(close, dtype=np.float64)
+    sar = np.asarray(sar, dtype=np.float64)
+    n = len(close)
+    signal = np.zeros(n, dtype=np.int8)
+    factors = np.zeros(n, dtype=np.uint8)
+    max_score = np.full(n, len(SAR_BUY_FACTORS), dtype=np.int8)
+    max_score[:2] = 0
+    if n <= 2:
+        return {'signal': signal, 'score': np.zeros(n, dtype=np.int8), 'factors': factors, 'max_score': max_score}
+
+    current, prev, prev2 = close[2:], close[1:-1], close[:-2]
+    sell = (prev >= sar[1:-1]) & (current < sar[2:])
+    buy = ~sell & (prev <= sar[1:-1]) & (current > sar[2:])
+    signal[2:][sell] = SAR_SELL
+    signal[2:][buy] = SAR_BUY
+    max_score[2:][sell] = len(SAR_SELL_FACTORS)
+
+    volume_ratio = np.asarray(volume_ratio, dtype=np.float64)[2:]
+    rsi = np.asarray(rsi, dtype=np.float64)[2:]
+    macd_hist = np.asarray(macd_hist, dtype=np.float64)
+    hist, hist_prev = macd_hist[2:], macd_hist[1:-1]
+    sell_checks = (
+        volume_ratio > 1.2,
+        rsi > 60,
+        (hist < hist_prev) & (hist < 0),
+        current < np.asarray(ma5, dtype=np.float64)[2:],
+        (current < prev) & (prev < prev2),
+    )
+    buy_checks = (
+        volume_ratio > 1.2,
+        (30 < rsi) & (rsi < 70),
+        (hist > hist_prev) & (hist > 0),
+    )
+    bits = factors[2:]
+    for k, check in enumerate(sell_checks):
+        bits |= (sell & check).astype(np.uint8) << k
+    for k, check in enumerate(buy_checks):
+        bits |= (buy & check).astype(np.uint8) << k
+
+    score = np.unpackbits(factors[:, None], axis=1).sum(axis=1).astype(np.int8)
+    return {'signal': signal, 'score': score, 'factors': factors, 'max_score': max_score}
+
+
+def sar_signal_factors(signal, factors):
+    """把單根K線的信號代碼與位元遮罩轉回確認因素說明列表"""
+    labels = SAR_SELL_FACTORS if signal == SAR_SELL else SAR_BUY_FACTORS if signal == SAR_BUY else ()
+    return [label for k, label in enumerate(labels) if int(factors) >> k & 1]
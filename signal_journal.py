@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多頭訊號日誌
+每支股票保存已確認K線上的多頭訊號（日期、價格、條件、反轉評分等）與冷卻期狀態，
+每日執行只掃描上次執行後新增的K線並附加到日誌，不必重新掃描整個分析窗口。
+
+- 最後一根K線可能是盤中尚未收盤的K線：每次都重新判斷，但不寫入日誌
+- 日誌的最後一根已確認K線不在本次數據中（中斷過久）或收盤價不同（除權息調整）時，重新掃描整個窗口
+- 已寫入的訊號保留當天判斷的結果；分析窗口向後移動或 SAR 依整段波動性改變參數時，
+  舊K線的指標可能與重新掃描不同，日誌以當時實際看到的訊號為準
+- 查詢結果與重新掃描一樣只包含窗口第 SCAN_START 根以後的訊號
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.path_manager import SharedInstance, get_cache_dir, write_json_atomic
+
+JOURNAL_VERSION = 1
+
+# 每支股票保留的訊號數
+MAX_JOURNAL_SIGNALS = 100
+
+# 分析窗口前幾根K線的指標尚未完整，不產生訊號（同 detect_bullish_signals）
+SCAN_START = 20
+
+# 日誌保存的訊號欄位（signal_types、days_ago 於查詢時補上）
+SIGNAL_FIELDS = (
+    'price', 'rsi', 'macd', 'volume_ratio', 'k', 'd', 'sar', 'obv', 'adx', 'ma_bullish_strength',
+    'momentum_acceleration', 'uptrend_continuity', 'trend_reversal_confirmation', 'reversal_strength',
+    'reversal_reliability', 'short_term_momentum_turn', 'price_structure_reversal',
+)
+
+
+def get_default_journal_dir():
+    """獲取訊號日誌目錄"""
+    return get_cache_dir('signals')
+
+
+def _timestamp(value):
+    """K線時間的 UTC 奈秒整數（時區與時間單位不同的索引也能比較）"""
+    return pd.Timestamp(value).as_unit('ns').value
+
+
+def bar_positions(index, timestamps):
+    """timestamps（_timestamp 的值）在 index 中的位置，不存在時為 -1"""
+    stamps = index.as_unit('ns').asi8
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    positions = np.searchsorted(stamps, timestamps)
+    found = positions < len(stamps)
+    found[found] = stamps[positions[found]] == timestamps[found]
+    return np.where(found, positions, -1)
+
+
+def encode_signal(signal):
+    """訊號 dict 轉為 JSON 相容的日誌記錄"""
+    record = {'date': pd.Timestamp(signal['date']).isoformat(), 'timestamp': _timestamp(signal['date']),
+              'conditions': list(signal['conditions'])}
+    for name in SIGNAL_FIELDS:
+        record[name] = float(signal[name])
+    return record
+
+
+def decode_signal(record, index, position):
+    """日誌記錄轉回 detect_bullish_signals 格式的訊號（record 位於 index 的第 position 根K線）"""
+    signal = {'date': index[position], 'price': record['price'], 'conditions': list(record['conditions'])}
+    signal['signal_types'] = signal['conditions']
+    signal['days_ago'] = len(index) - 1 - position
+    for name in SIGNAL_FIELDS[1:]:
+        signal[name] = record[name]
+    return signal
+
+
+class SignalJournal:
+    """
+    每支股票一個 JSON 檔：{'version', 'symbol', 'last_bar', 'last_close', 'last_signal_date', 'signals', 'updated_at'}
+    last_bar 為已掃描的最後一根已確認K線（UTC 奈秒），last_signal_date 為冷卻期狀態
+    """
+
+    def __init__(self, journal_dir=None, max_signals=MAX_JOURNAL_SIGNALS):
+        self.journal_dir = Path(journal_dir) if journal_dir else get_default_journal_dir()
+        self.max_signals = max_signals
+        self._memory = {}
+        self._lock = threading.RLock()
+        self.stats = {'rebuilds': 0, 'incremental': 0, 'bars_scanned': 0}
+
+    # --- 檔案讀寫 ---
+
+    def _entry_path(self, symbol):
+        safe_symbol = symbol.replace('/', '_').replace('^', '_')
+        return self.journal_dir / f"{safe_symbol}.json"
+
+    def load_entry(self, symbol):
+        """讀取日誌，不存在或版本不符時返回 None"""
+        with self._lock:
+            if symbol in self._memory:
+                return self._memory[symbol]
+
+            path = self._entry_path(symbol)
+            if not path.exists():
+                return None
+
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"  ⚠️  {symbol}: 訊號日誌損壞，將重新掃描 - {e}")
+                return None
+            if not isinstance(entry, dict) or entry.get('version') != JOURNAL_VERSION:
+                return None
+
+            self._memory[symbol] = entry
+            return entry
+
+    def save_entry(self, symbol, entry):
+        """保存日誌（保留最近 max_signals 筆訊號）"""
+        entry['signals'] = entry['signals'][-self.max_signals:]
+        entry['updated_at'] = time.time()
+        with self._lock:
+            self._memory[symbol] = entry
+            write_json_atomic(self._entry_path(symbol), entry, f'{symbol} 訊號日誌')
+        return entry
+
+    def clear(self, symbol):
+        """刪除一支股票的日誌，下次執行時重新掃描"""
+        with self._lock:
+            self._memory.pop(symbol, None)
+            try:
+                self._entry_path(symbol).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"  ⚠️  {symbol}: 無法刪除訊號日誌 - {e}")
+
+    # --- 掃描 ---
+
+    def _resume_position(self, entry, df):
+        """日誌最後一根已確認K線在 df 中的位置；無法接續（不在數據中或收盤價改變）時返回 None"""
+        if entry is None or entry['last_bar'] is None:
+            return None
+        position = int(bar_positions(df.index, [entry['last_bar']])[0])
+        if position < 0 or float(df['Close'].iloc[position]) != entry['last_close']:
+            return None
+        return position
+
+    def signals(self, symbol, df, scan):
+        """
+        返回 df 分析窗口內的多頭訊號（格式與 detect_bullish_signals 相同）
+        scan(df, start, last_signal_date) 掃描第 start 根以後的K線；
+        日誌可以接續時只掃描新增的K線，否則重新掃描整個窗口並重建日誌
+        """
+        n = len(df)
+        if n == 0:
+            return []
+
+        with self._lock:
+            entry = self.load_entry(symbol)
+            position = self._resume_position(entry, df)
+            if position is None:
+                self.stats['rebuilds'] += 1
+                entry = {'version': JOURNAL_VERSION, 'symbol': symbol, 'last_bar': None, 'last_close': None,
+                         'last_signal_date': None, 'signals': []}
+                new_signals = scan(df, start=SCAN_START, last_signal_date=None)
+                self.stats['bars_scanned'] += max(n - SCAN_START, 0)
+            else:
+                self.stats['incremental'] += 1
+                last_signal_date = entry['last_signal_date']
+                start = max(SCAN_START, position + 1)
+                new_signals = scan(df, start=start,
+                                   last_signal_date=pd.Timestamp(last_signal_date) if last_signal_date else None)
+                self.stats['bars_scanned'] += max(n - start, 0)
+
+            # 最後一根K線之前的訊號已確認，寫入日誌；最後一根的訊號只在本次返回
+            confirmed_bar = df.index[-2] if n >= 2 else None
+            confirmed = [s for s in new_signals if confirmed_bar is not None and s['date'] <= confirmed_bar]
+            provisional = new_signals[len(confirmed):]
+            if confirmed_bar is not None and (position is None or position < n - 2):
+                entry['signals'].extend(encode_signal(s) for s in confirmed)
+                if confirmed:
+                    entry['last_signal_date'] = pd.Timestamp(confirmed[-1]['date']).isoformat()
+                entry['last_bar'] = _timestamp(confirmed_bar)
+                entry['last_close'] = float(df['Close'].iloc[-2])
+                self.save_entry(symbol, entry)
+
+            records = entry['signals']
+            positions = bar_positions(df.index, [record['timestamp'] for record in records]) if records else []
+            journaled = [decode_signal(record, df.index, int(position))
+                         for record, position in zip(records, positions) if position >= SCAN_START]
+            return journaled + provisional
+
+
+_shared_journal = SharedInstance(SignalJournal)
+
+
+def get_signal_journal():
+    """全局共享的訊號日誌"""
+    return _shared_journal.get()
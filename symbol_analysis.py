@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+單次股票分析
+一支股票在一個分析日期只建立一個 SymbolAnalysis：指標表計算一次，多頭訊號、抄底價位、
+強化確認、多時間框架與進場評估在第一次讀取時計算並記在指標表的分析上下文。
+analyze_stock 與回測都從同一個物件讀取；進場評估內部使用的訊號、抄底價位等也沿用同一份結果。
+calls() 返回各項目實際計算的次數，每項最多 1 次
+"""
+
+from analysis_context import context_for
+
+# 項目 → 分析上下文中的快取種類
+COMPONENT_KINDS = {
+    'signals': 'bullish_signals',
+    'long_signal': 'long_signal_levels',
+    'confirmation': 'confirmation',
+    'multi_timeframe': 'mtf',
+    'entry': 'entry_assessment',
+}
+
+
+class SymbolAnalysis:
+    """
+    analyzer 為 IntegratedStockAnalyzer；sar 為已計算的 SAR（回測的 PrefixSAR）；
+    journal=True 時多頭訊號由訊號日誌接續掃描（每日執行），否則掃描整個窗口（回測切片）
+    """
+
+    __slots__ = ('analyzer', 'symbol', 'frame', 'journal')
+
+    def __init__(self, analyzer, symbol, data, sar=None, journal=False):
+        self.analyzer = analyzer
+        self.symbol = symbol
+        self.journal = journal
+        self.frame = analyzer.calculate_indicator_frame(data, sar=sar, symbol=symbol)
+
+    @property
+    def valid(self):
+        return self.frame is not None and not self.frame.empty
+
+    @property
+    def context(self):
+        return context_for(self.frame)
+
+    @property
+    def as_of(self):
+        return self.frame.index[-1] if self.valid else None
+
+    @property
+    def signals(self):
+        """多頭訊號列表（格式見 detect_bullish_signals）"""
+        if self.journal:
+            return self.analyzer.journal_bullish_signals(self.frame, self.symbol)
+        return self.analyzer.detect_bullish_signals(self.frame)
+
+    @property
+    def latest_signal(self):
+        signals = self.signals
+        return signals[-1] if signals else None
+
+    @property
+    def long_signal(self):
+        """(抄底價位, 支撐信心度)"""
+        return self.analyzer.calculate_long_signal_price(self.frame)
+
+    @property
+    def confirmation(self):
+        """強化確認系統的綜合確認結果"""
+        return self.analyzer.confirmation_system.calculate_comprehensive_confirmation(
+            self.frame, context=self.context)
+
+    @property
+    def multi_timeframe(self):
+        return self.analyzer.calculate_multi_timeframe(self.frame, self.symbol)
+
+    @property
+    def entry(self):
+        """(進場建議, 信心分數, 信心等級, 信心因素)"""
+        self.signals  # 先決定訊號來源，進場評估沿用同一份訊號
+        return self.context.memo(('entry_assessment',),
+                                 lambda: self.analyzer.assess_entry_opportunity(self.frame, self.symbol))
+
+    def calls(self):
+        """各項目實際計算的次數（indicators 為指標表）"""
+        misses = self.context.misses
+        counts = {'indicators': 1 if self.frame is not None else 0}
+        counts.update({component: misses[kind] for component, kind in COMPONENT_KINDS.items()})
+        return counts
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+股票基本資料表
+本地保存股票名稱與市場，長時間有效並在背景更新，避免每次分析都呼叫 ticker.info
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from async_fetcher import get_async_fetcher
+from backend.path_manager import SharedInstance, get_cache_dir, write_json_atomic
+from market_data_provider import get_market_data_provider
+
+# 基本資料有效天數（公司名稱極少變動）
+DEFAULT_TTL_DAYS = float(os.environ.get('BULLPS_METADATA_TTL_DAYS', 30))
+
+# 查詢失敗時預設值的有效時數，到期前不再重試
+DEFAULT_FAILURE_TTL_HOURS = float(os.environ.get('BULLPS_METADATA_FAILURE_TTL_HOURS', 6))
+
+METADATA_FILENAME = 'symbol_metadata.json'
+
+
+def get_default_metadata_path():
+    """獲取基本資料表檔案路徑"""
+    return get_cache_dir('metadata') / METADATA_FILENAME
+
+
+def infer_market(symbol):
+    """由股票代號後綴判斷交易市場"""
+    if '.TW' in symbol:
+        return 'TWSE'
+    elif '.HK' in symbol:
+        return 'HKEX'
+    return 'US'
+
+
+def fallback_record(symbol):
+    """無法取得基本資料時使用的預設值"""
+    return {'symbol': symbol, 'name': symbol, 'market': 'Unknown'}
+
+
+class SymbolMetadataStore:
+    """
+    以股票代號為鍵的基本資料表
+    - 未過期：直接返回本地資料
+    - 已過期：先返回舊資料，並排入背景更新
+    - 不存在：同步下載（block=False 時返回預設值並排入背景更新）
+    - 下載失敗：保存預設值（failed=True），failure_ttl 內直接返回，不再重試
+    """
+
+    def __init__(self, path=None, ttl_days=DEFAULT_TTL_DAYS, fetcher=None, provider=None,
+                 failure_ttl_hours=DEFAULT_FAILURE_TTL_HOURS):
+        self.path = Path(path) if path else get_default_metadata_path()
+        self.ttl = ttl_days * 86400
+        self.failure_ttl = failure_ttl_hours * 3600
+        self.fetcher = fetcher or get_async_fetcher()
+        self.provider = provider or get_market_data_provider()
+        self._lock = threading.RLock()
+        self._records = self._load()
+        self._pending = set()
+        self._worker = None
+        self.stats = {'requests': 0, 'hits': 0, 'stale_hits': 0}
+
+    # --- 檔案讀寫 ---
+
+    def _load(self):
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ 讀取股票基本資料表失敗，將重新建立: {e}")
+        return {}
+
+    def _save(self):
+        with self._lock:
+            write_json_atomic(self.path, self._records, '股票基本資料表', indent=2)
+
+    # --- 網路請求 ---
+
+    def _info_request(self, symbol):
+        info = self.provider.info(symbol)
+        name = info.get('longName', info.get('shortName', symbol))
+        return {
+            'symbol': symbol,
+            'name': name or symbol,
+            'market': infer_market(symbol),
+            'updated_at': time.time()
+        }
+
+    def _fetch(self, symbol):
+        """從 Yahoo 取得基本資料，失敗時返回 None"""
+        return self._fetch_many([symbol]).get(symbol)
+
+    def _fetch_many(self, symbols):
+        """並行取得多支股票的基本資料，只返回成功的記錄"""
+        self.stats['requests'] += len(symbols)
+        calls = {symbol: (self._info_request, (symbol,), {}) for symbol in symbols}
+        results = self.fetcher.run_many(calls)
+        return {symbol: result.data for symbol, result in results.items() if result.ok}
+
+    def _failed_record(self, symbol):
+        record = fallback_record(symbol)
+        record.update({'failed': True, 'updated_at': time.time()})
+        return record
+
+    def refresh(self, symbol):
+        """立即更新單一股票的基本資料，成功返回新記錄"""
+        record = self._fetch(symbol)
+        with self._lock:
+            if record is not None:
+                self._records[symbol] = record
+            elif self._records.get(symbol, {}).get('failed'):
+                # 仍然失敗：延長預設值的有效時間
+                self._records[symbol] = self._failed_record(symbol)
+            else:
+                return None
+        self._save()
+        return record
+
+    # --- 背景更新 ---
+
+    def _schedule_refresh(self, symbols):
+        with self._lock:
+            self._pending.update(symbols)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._refresh_pending, daemon=True)
+                self._worker.start()
+
+    def _refresh_pending(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._worker = None
+                    return
+                symbol = self._pending.pop()
+            self.refresh(symbol)
+
+    # --- 公開介面 ---
+
+    def _is_fresh(self, record):
+        ttl = self.failure_ttl if record.get('failed') else self.ttl
+        return time.time() - record.get('updated_at', 0) < ttl
+
+    def _public(self, record):
+        return {'symbol': record['symbol'], 'name': record['name'], 'market': record['market']}
+
+    def get_many(self, symbols, block=True):
+        """
+        批量查詢基本資料，返回 {symbol: {'symbol', 'name', 'market'}}
+        block=False 時缺少的股票不會同步下載
+        """
+        results = {}
+        missing = []
+        stale = []
+
+        with self._lock:
+            for symbol in symbols:
+                record = self._records.get(symbol)
+                if record is None:
+                    missing.append(symbol)
+                    continue
+                if self._is_fresh(record):
+                    self.stats['hits'] += 1
+                else:
+                    self.stats['stale_hits'] += 1
+                    stale.append(symbol)
+                results[symbol] = self._public(record)
+
+        if missing and block:
+            fetched = self._fetch_many(missing)
+            # 失敗的股票保存預設值，下次執行不再同步重試
+            records = {symbol: fetched.get(symbol) or self._failed_record(symbol) for symbol in missing}
+            with self._lock:
+                self._records.update(records)
+            self._save()
+            for symbol in missing:
+                results[symbol] = self._public(records[symbol])
+        else:
+            for symbol in missing:
+                results[symbol] = fallback_record(symbol)
+            stale.extend(missing)
+
+        if stale:
+            self._schedule_refresh(stale)
+
+        return results
+
+    def get(self, symbol, block=True):
+        """查詢單一股票的基本資料"""
+        return self.get_many([symbol], block=block)[symbol]
+
+
+_shared_store = SharedInstance(SymbolMetadataStore)
+
+
+def get_symbol_metadata_store():
+    """全局共享的股票基本資料表"""
+    return _shared_store.get()
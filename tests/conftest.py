@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+測試共用的離線環境
+以 LocalFileProvider 讀取合成K線，快取、失敗快取、基本資料表與訊號日誌都寫入暫存目錄，
+不發出任何網路請求
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import async_fetcher
+import market_data_cache
+import market_data_provider
+import market_sentiment
+import negative_cache
+import signal_journal
+import symbol_metadata
+
+
+class RecordingProvider(market_data_provider.LocalFileProvider):
+    """記錄每次讀取K線的本地數據來源"""
+
+    def __init__(self, data_dir):
+        super().__init__(data_dir)
+        self.calls = []
+
+    def history(self, symbol, period=None, interval='1d', start=None, end=None, timeout=60):
+        self.calls.append(('history', symbol, interval, start, end))
+        return super().history(symbol, period, interval, start, end, timeout)
+
+
+SHARED = (
+    (market_data_provider, '_shared_provider'),
+    (async_fetcher, '_shared_fetcher'),
+    (negative_cache, '_shared_cache'),
+    (market_data_cache, '_shared_cache'),
+    (symbol_metadata, '_shared_store'),
+    (signal_journal, '_shared_journal'),
+    (market_sentiment, '_shared_engine'),
+)
+
+
+@pytest.fixture
+def offline_market(tmp_path):
+    """
+    返回 build(histories)：寫入 {代號: 日線} 並把共享的數據來源、快取與日誌指向暫存目錄，
+    返回 RecordingProvider；測試結束後還原共享實例
+    """
+    def build(histories):
+        provider = RecordingProvider(tmp_path / 'market_data')
+        for symbol, bars in histories.items():
+            provider.write_history(symbol, bars)
+
+        fetcher = async_fetcher.AsyncFetcher(rate_limiter=async_fetcher.UnlimitedRateLimiter(), verbose=False)
+        negatives = negative_cache.NegativeCache(path=tmp_path / 'negative_cache.json')
+        cache = market_data_cache.MarketDataCache(cache_dir=tmp_path / 'cache', fetcher=fetcher,
+                                                  provider=provider, negative_cache=negatives)
+        market_data_provider._shared_provider.set(provider)
+        async_fetcher._shared_fetcher.set(fetcher)
+        negative_cache._shared_cache.set(negatives)
+        market_data_cache._shared_cache.set(cache)
+        symbol_metadata._shared_store.set(symbol_metadata.SymbolMetadataStore(
+            path=tmp_path / 'metadata.json', fetcher=fetcher, provider=provider))
+        signal_journal._shared_journal.set(signal_journal.SignalJournal(journal_dir=tmp_path / 'signals'))
+        market_sentiment._shared_engine.set(market_sentiment.MarketSentimentEngine(data_cache=cache))
+        return provider
+
+    yield build
+
+    for module, name in SHARED:
+        getattr(module, name).set(None)
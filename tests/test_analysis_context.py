@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""一次 analyze_stock 中，共用分析上下文的每個基本序列只計算一次"""
+
+from collections import Counter
+
+import pandas as pd
+
+import analysis_context
+from benchmarks.synthetic import generate_ohlcv
+from indicator_frame import IndicatorFrame
+
+
+def ending_today(bars):
+    """把合成K線的日期改為到今天為止的交易日，讓分析器的期間切片涵蓋全部K線"""
+    bars = bars.copy()
+    bars.index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=len(bars))
+    return bars
+
+
+def test_analyze_stock_computes_each_primitive_once(offline_market, monkeypatch, tmp_path):
+    histories = {'AAA': ending_today(generate_ohlcv(300, seed=3))}
+    for seed, symbol in enumerate(('SPY', 'QQQ', '^VIX'), start=10):
+        histories[symbol] = ending_today(generate_ohlcv(300, seed=seed, regimes=('trend', 'range')))
+    offline_market(histories)
+
+    from integrated_stock_analyzer import IntegratedStockAnalyzer
+    analyzer = IntegratedStockAnalyzer(watchlist_file=str(tmp_path / 'watchlist.json'))
+
+    # 依分析的K線表（資料物件）記錄向上下文請求的鍵，以及實際執行的滾動與區域低點計算
+    requested = Counter()
+    computed = Counter()
+    frames = {}
+    original_memo = analysis_context.AnalysisContext.memo
+
+    def counting_memo(self, key, func):
+        frames[id(self.data)] = self.data  # 保留參照，避免 id 被重複使用
+        requested[id(self.data), key] += 1
+
+        def compute():
+            computed[id(self.data), key] += 1
+            return func()
+        return original_memo(self, key, compute)
+    monkeypatch.setattr(analysis_context.AnalysisContext, 'memo', counting_memo)
+
+    primitive_calls = Counter()
+    for name in ('rolling', 'local_minima'):
+        original = getattr(analysis_context, name)
+
+        def counted(*args, _name=name, _original=original, **kwargs):
+            primitive_calls[_name] += 1
+            return _original(*args, **kwargs)
+        monkeypatch.setattr(analysis_context, name, counted)
+
+    result = analyzer.analyze_stock('AAA')
+    assert result is not None
+
+    # 同一份K線上的每個序列只計算一次；實際呼叫的基本計算次數等於不同序列的數量
+    duplicated = {key: count for key, count in computed.items() if count != 1}
+    assert not duplicated
+    assert primitive_calls['rolling'] == sum(1 for _, key in computed if key[0] == 'rolling')
+    assert primitive_calls['local_minima'] == sum(1 for _, key in computed if key[0] == 'local_lows')
+
+    # 主要的 IndicatorFrame：指標、進場評估、多頭訊號與抄底價位共用的序列被請求多次但只計算一次
+    main = max(frames, key=lambda data_id: sum(n for (i, _), n in requested.items() if i == data_id))
+    assert isinstance(frames[main], IndicatorFrame)
+    assert requested[main, ('rolling', 'Close', 20, 'mean', None)] > 1
+    assert requested[main, ('pct_change', 'Close', 5)] > 1
+    assert sum(n for (i, _), n in requested.items() if i == main) > \
+        sum(n for (i, _), n in computed.items() if i == main)
+
+    # 再次讀取已完成的分析不會再計算
+    before = sum(computed.values())
+    analysis_context.context_for(frames[main]).rolling('Close', 20)
+    assert sum(computed.values()) == before
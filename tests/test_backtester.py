@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""回測不得讀取模擬日之後的K線"""
+
+import market_data_cache
+from benchmarks.synthetic import generate_ohlcv
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+
+
+def test_backtest_reads_no_bar_after_current_day(offline_market, monkeypatch, tmp_path):
+    histories = {symbol: generate_ohlcv(320, seed=seed) for seed, symbol in enumerate(SYMBOLS)}
+    for seed, symbol in enumerate(('SPY', 'QQQ', '^VIX'), start=10):
+        histories[symbol] = generate_ohlcv(320, seed=seed, regimes=('trend', 'range'))
+    provider = offline_market(histories)
+
+    import backtester
+    monkeypatch.setattr(backtester, 'START_DATE', '2020-07-01')
+    monkeypatch.setattr(backtester, 'END_DATE', '2021-03-01')
+    monkeypatch.setattr(backtester, 'OUTPUT_CSV', str(tmp_path / 'trade_log.csv'))
+
+    all_data = backtester.preload_data(SYMBOLS, backtester.START_DATE, backtester.END_DATE)
+    tester = backtester.Backtester(SYMBOLS, all_data)
+    tester.trading_days = tester.trading_days[:80]
+
+    # 模擬期間不應再讀取數據來源或K線快取
+    cache = market_data_cache.get_market_data_cache()
+    reads = []
+    for name in ('get_history', 'get_histories'):
+        original = getattr(cache, name)
+
+        def record_read(*args, _name=name, _original=original, **kwargs):
+            reads.append((_name, args))
+            return _original(*args, **kwargs)
+        monkeypatch.setattr(cache, name, record_read)
+    provider.calls.clear()
+
+    current = {}
+    for name in ('check_and_execute_exits', 'check_and_execute_entries'):
+        original = getattr(tester, name)
+
+        def wrapped(current_day, next_day, _original=original):
+            current['day'] = current_day
+            return _original(current_day, next_day)
+        monkeypatch.setattr(tester, name, wrapped)
+
+    # 多時間框架分析實際收到的日線
+    mtf = tester.analyzer.mtf_analyzer
+    seen = []
+    original_mtf = mtf.get_multi_timeframe_data
+
+    def record_mtf(symbol, period='2y', daily_data=None):
+        seen.append((current['day'], symbol, daily_data))
+        return original_mtf(symbol, period, daily_data=daily_data)
+    monkeypatch.setattr(mtf, 'get_multi_timeframe_data', record_mtf)
+
+    analyzed = []
+    original_analysis_for = tester.analysis_for
+
+    def record_analysis(symbol, data_slice):
+        analyzed.append((current['day'], data_slice.index[-1]))
+        return original_analysis_for(symbol, data_slice)
+    monkeypatch.setattr(tester, 'analysis_for', record_analysis)
+
+    tester.run()
+
+    assert analyzed
+    assert all(last_bar <= day for day, last_bar in analyzed)
+    assert seen, '回測期間應執行多時間框架分析'
+    for day, symbol, daily in seen:
+        assert daily is not None and not daily.empty, symbol
+        assert daily.index[-1] <= day
+    assert reads == []
+    assert provider.calls == []
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""增量指標狀態逐根更新的結果與批次計算相同"""
+
+import contextlib
+import io
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.engine import offline_analyzer
+from benchmarks.synthetic import generate_ohlcv
+from indicator_registry import INDICATOR_COLUMNS, compute
+from indicator_state import IndicatorState
+
+# 滾動標準差（及由其導出的欄位）只要求在浮點誤差範圍內相同
+STD_COLUMNS = {'BB_Upper', 'BB_Lower', 'Volatility', 'Volatility_Ratio', 'Dynamic_Stop_Loss'}
+
+
+def assert_row_matches(row, expected, where):
+    for column in INDICATOR_COLUMNS:
+        actual, wanted = float(row[column]), float(expected[column])
+        if column in STD_COLUMNS:
+            assert np.isclose(actual, wanted, rtol=1e-9, atol=1e-12, equal_nan=True), (where, column)
+        else:
+            assert actual == wanted or (actual != actual and wanted != wanted), (where, column, actual, wanted)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_updates_match_batch_compute(seed):
+    bars = generate_ohlcv(160, seed=seed, segment=20)
+    state = IndicatorState('AAA')
+    for n in range(1, len(bars) + 1):
+        row = state.update(bars.iloc[n - 1])
+        assert_row_matches(row, compute(bars.iloc[:n]).iloc[-1], bars.index[n - 1])
+
+
+def test_serialized_state_continues_identically(tmp_path):
+    bars = generate_ohlcv(200, seed=2)
+    continuous = IndicatorState.from_history(bars.iloc[:120], symbol='AAA')
+    continuous.save(tmp_path / 'AAA.json')
+    restored = IndicatorState.load(tmp_path / 'AAA.json')
+
+    for i in range(120, len(bars)):
+        expected = continuous.update(bars.iloc[i])
+        assert restored.update(bars.iloc[i]) == pytest.approx(expected, nan_ok=True)
+    assert json.dumps(restored.to_dict()) == json.dumps(continuous.to_dict())
+    assert_row_matches(restored.latest, compute(bars).iloc[-1], 'restored')
+
+    with pytest.raises(ValueError):
+        restored.update(bars.iloc[-1])  # K線時間必須遞增
+
+
+def test_backtester_exit_indicators_match_analysis_frame():
+    import backtester
+
+    bars = generate_ohlcv(220, seed=4)
+    tester = backtester.Backtester.__new__(backtester.Backtester)
+    tester.analyzer = offline_analyzer(bars, 'AAA')
+    tester.all_data = {'AAA': bars}
+    tester.sar_history = {}
+    tester.analyses = {}
+    tester.indicator_states = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for current_day in bars.index[60::3]:
+            data_slice = bars.loc[:current_day]
+            latest = tester.latest_indicators('AAA', data_slice)
+            frame = tester.analysis_for('AAA', data_slice).frame
+            assert latest['Close'] == frame.last('Close')
+            assert latest['SAR'] == frame.last('SAR'), current_day
+    assert tester.indicator_states['AAA'].count == len(data_slice)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""訊號日誌逐日接續的結果與重新掃描整個窗口相同"""
+
+import contextlib
+import io
+import math
+
+import pytest
+
+from benchmarks.engine import offline_analyzer
+from benchmarks.synthetic import generate_ohlcv
+from signal_journal import SCAN_START, SignalJournal
+
+SYMBOL = 'AAA'
+FIRST_DAY = 120
+
+
+def normalized(signals):
+    """訊號轉為可直接比較的結構（NaN 以 None 表示）"""
+    return [{key: None if isinstance(value, float) and math.isnan(value) else value
+             for key, value in signal.items()} for signal in signals]
+
+
+@pytest.fixture
+def market():
+    """
+    返回 (analyzer, final)：final 為整段合成K線一次計算的指標表。
+    每個模擬日使用 final 的前 k 根K線，舊K線的指標不隨窗口改變（穩定窗口）
+    """
+    daily = generate_ohlcv(260, seed=0, segment=30)
+    analyzer = offline_analyzer(daily, SYMBOL)
+    with contextlib.redirect_stdout(io.StringIO()):
+        final = analyzer.calculate_technical_indicators(daily)
+    return analyzer, final
+
+
+def full_scan(analyzer, df):
+    return analyzer._scan_bullish_signals(df, start=SCAN_START, last_signal_date=None)
+
+
+def test_incremental_days_match_full_scan(market, tmp_path):
+    analyzer, final = market
+    journal = SignalJournal(journal_dir=tmp_path)
+
+    for k in range(FIRST_DAY, len(final) + 1):
+        if k % 20 == 0:
+            journal = SignalJournal(journal_dir=tmp_path)  # 從磁碟載入日誌
+        window = final.iloc[:k]
+        result = journal.signals(SYMBOL, window, analyzer._scan_bullish_signals)
+        assert normalized(result) == normalized(full_scan(analyzer, window)), window.index[-1]
+
+    assert full_scan(analyzer, final), '合成K線應產生多頭訊號'
+    assert journal.load_entry(SYMBOL)['last_bar'] == final.index[-2].as_unit('ns').value
+
+
+def test_provisional_last_bar_is_not_persisted(market, tmp_path):
+    analyzer, final = market
+    signal_bars = [final.index.get_loc(s['date']) for s in full_scan(analyzer, final)]
+    last = next(i for i in signal_bars if i >= FIRST_DAY)
+    journal = SignalJournal(journal_dir=tmp_path)
+    journal.signals(SYMBOL, final.iloc[:FIRST_DAY], analyzer._scan_bullish_signals)
+
+    # 最後一根K線（盤中）的訊號只在本次返回
+    window = final.iloc[:last + 1]
+    result = journal.signals(SYMBOL, window, analyzer._scan_bullish_signals)
+    assert result[-1]['date'] == final.index[last]
+
+    entry = SignalJournal(journal_dir=tmp_path).load_entry(SYMBOL)
+    assert entry['last_bar'] == final.index[last - 1].as_unit('ns').value
+    assert all(record['timestamp'] != final.index[last].as_unit('ns').value for record in entry['signals'])
+
+    # 收盤後的下一個交易日，該K線成為已確認K線並寫入日誌
+    journal.signals(SYMBOL, final.iloc[:last + 2], analyzer._scan_bullish_signals)
+    entry = SignalJournal(journal_dir=tmp_path).load_entry(SYMBOL)
+    assert entry['signals'][-1]['timestamp'] == final.index[last].as_unit('ns').value
+
+
+def test_changed_last_close_rebuilds(market, tmp_path):
+    analyzer, final = market
+    journal = SignalJournal(journal_dir=tmp_path)
+    journal.signals(SYMBOL, final.iloc[:FIRST_DAY], analyzer._scan_bullish_signals)
+    assert journal.stats['rebuilds'] == 1
+
+    # 除權息調整：整段價格改變，日誌的最後收盤價與數據不同
+    daily = generate_ohlcv(260, seed=0, segment=30)
+    daily[['Open', 'High', 'Low', 'Close']] *= 0.5
+    with contextlib.redirect_stdout(io.StringIO()):
+        adjusted = analyzer.calculate_technical_indicators(daily).iloc[:FIRST_DAY + 5]
+
+    result = journal.signals(SYMBOL, adjusted, analyzer._scan_bullish_signals)
+    assert journal.stats['rebuilds'] == 2
+    assert journal.stats['incremental'] == 0
+    assert normalized(result) == normalized(full_scan(analyzer, adjusted))
+
+
+def test_cooldown_carries_across_days(market, tmp_path):
+    analyzer, final = market
+    signal_bars = [final.index.get_loc(s['date']) for s in full_scan(analyzer, final)]
+
+    # 只因冷卻期而不成為訊號的K線：單獨掃描時成立、不在整段掃描的結果中，
+    # 且前一個訊號在前一日之前已確認，接續掃描時冷卻期狀態只能來自日誌
+    def previous_signal(i):
+        return max(bar for bar in signal_bars if bar < i)
+
+    suppressed = next(
+        i for i in range(FIRST_DAY + 2, len(final))
+        if i not in signal_bars and previous_signal(i) <= i - 2
+        and analyzer._scan_bullish_signals(final.iloc[:i + 1], start=i, last_signal_date=None))
+    previous = final.index[previous_signal(suppressed)]
+
+    calls = []
+
+    def scan(df, start, last_signal_date):
+        calls.append((start, last_signal_date))
+        return analyzer._scan_bullish_signals(df, start=start, last_signal_date=last_signal_date)
+
+    for k in range(FIRST_DAY, suppressed + 2):
+        journal = SignalJournal(journal_dir=tmp_path)  # 每日重新載入，冷卻期狀態只來自日誌檔案
+        result = journal.signals(SYMBOL, final.iloc[:k], scan)
+
+    # 最後一次只掃描前一日（盤中）與當日的K線，冷卻期狀態為日誌中的前一個訊號
+    assert calls[-1] == (suppressed - 1, previous)
+    assert result[-1]['date'] == previous
+    assert normalized(result) == normalized(full_scan(analyzer, final.iloc[:suppressed + 1]))
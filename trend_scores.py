@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+趨勢與反轉評分的逐列計算
+原本的 calculate_ma_bullish_strength 等方法只用最後一根K線算出一個值，再填滿整個欄位，
+detect_bullish_signals 因此用「今天」的評分判斷歷史K線。
+這裡在 NumPy 陣列上一次算出每一列的值：第 i 列等於原方法對 df.iloc[:i+1] 的結果，
+最後一列與原本完全相同，歷史列則是當時實際的評分。
+volatility_risk / entry_timing 同樣逐列輸出進場評估的風險與時機評分，回測可直接依日期查詢
+"""
+
+import numpy as np
+import pandas as pd
+
+from analysis_context import context_for
+from rolling_primitives import rolling_std
+
+
+def _values(df, column):
+    return df[column].to_numpy(dtype=np.float64)
+
+
+def _shift(values, periods):
+    """同 Series.shift(periods)：前 periods 個位置補 NaN"""
+    shifted = np.full(len(values), np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+def _change(df, periods, column='Close'):
+    """同 df[column].pct_change(periods)，由分析上下文共用"""
+    return context_for(df).pct_change(periods, column).to_numpy(dtype=np.float64)
+
+
+def _row_count(df):
+    """每一列對應的前綴長度（原方法中的 len(df)）"""
+    return np.arange(1, len(df) + 1)
+
+
+def _series(values, df):
+    return pd.Series(values, index=df.index)
+
+
+def ma_bullish_strength(df):
+    """均線多頭排列強度（0-100）"""
+    ma5, ma10, ma20 = _values(df, 'MA5'), _values(df, 'MA10'), _values(df, 'MA20')
+    ma30, ma60 = _values(df, 'MA30'), _values(df, 'MA60')
+    has_slope = _row_count(df) >= 5
+
+    bullish_count = ((ma5 > ma10).astype(np.int64) + (ma10 > ma20) + (ma20 > ma30) + (ma30 > ma60))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ma5_slope = np.where(has_slope, (ma5 - _shift(ma5, 4)) / _shift(ma5, 4), 0)
+        ma20_slope = np.where(has_slope, (ma20 - _shift(ma20, 4)) / _shift(ma20, 4), 0)
+    bullish_count = bullish_count + (ma5_slope > 0) + (ma20_slope > 0)
+    return _series(bullish_count / 6 * 100, df)
+
+
+def price_channel_slope(df, period=20):
+    """價格通道中線的 5 日斜率（%）"""
+    context = context_for(df)
+    high_channel = context.rolling('High', period, 'max').to_numpy(dtype=np.float64)
+    low_channel = context.rolling('Low', period, 'min').to_numpy(dtype=np.float64)
+    mid_channel = (high_channel + low_channel) / 2
+    prev_mid = _shift(mid_channel, 4)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (mid_channel - prev_mid) / prev_mid * 100
+    return _series(np.where(_row_count(df) >= period + 5, slope, 0.0), df)
+
+
+def volume_trend_alignment(df):
+    """成交量趨勢配合度"""
+    price_trend = _change(df, 5)
+    volume_trend = _change(df, 5, 'Volume')
+    volume_ma = _values(df, 'Volume_MA')
+
+    score = (np.where((price_trend > 0) & (volume_trend > 0), 50, 0)
+             + np.where((price_trend < 0) & (volume_trend < 0), 30, 0)
+             + np.where(volume_ma > _shift(volume_ma, 4), 20, 0))
+    return _series(np.where(_row_count(df) > 5, score, 0), df)
+
+
+def momentum_acceleration(df):
+    """5 日動量減 10 日動量"""
+    acceleration = _change(df, 5) - _change(df, 10)
+    return _series(np.where(_row_count(df) >= 10, acceleration, 0.0), df)
+
+
+def relative_strength(df):
+    """相對 20 根K線前（不足時為第一根）的漲幅（%）"""
+    close = _values(df, 'Close')
+    if len(close) == 0:
+        return _series(close, df)
+    base = np.where(_row_count(df) >= 20, _shift(close, 19), close[0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _series((close / base - 1) * 100, df)
+
+
+def _consecutive_up_days(close):
+    """到每一列為止連續上漲的天數"""
+    positions = np.arange(len(close))
+    up = np.zeros(len(close), dtype=bool)
+    up[1:] = close[1:] > close[:-1]
+    last_break = np.maximum.accumulate(np.where(up, 0, positions)) if len(close) else positions
+    return positions - last_break
+
+
+def uptrend_continuity(df):
+    """上漲動能延續性：連續上漲天數（最多10天）與 RSI / MACD / K 是否高於4根前"""
+    close = _values(df, 'Close')
+    up_days = np.minimum(_consecutive_up_days(close), 10)
+    indicator_score = np.zeros(len(close), dtype=np.int64)
+    for column in ('RSI', 'MACD', 'K'):
+        values = _values(df, column)
+        indicator_score += np.where(values > _shift(values, 4), 20, 0)
+    indicator_score = np.where(_row_count(df) >= 5, indicator_score, 0)
+    return _series(up_days * 10 + indicator_score, df)
+
+
+def dynamic_stop_loss(df):
+    """當前價格減 2 倍的簡化 ATR（波動率的 2 倍）"""
+    atr = _values(df, 'Volatility') * 2
+    return _series(_values(df, 'Close') - (atr * 2), df)
+
+
+def support_reliability(df):
+    """價格在 MA20 / MA30 / 布林下軌 / SAR ±5% 內的支撐數量 × 25"""
+    close = _values(df, 'Close')
+    count = np.zeros(len(close), dtype=np.int64)
+    for column in ('MA20', 'MA30', 'BB_Lower', 'SAR'):
+        support = _values(df, column)
+        count += (close > support * 0.95) & (close < support * 1.05)
+    return _series(count * 25, df)
+
+
+def _bb_position(df, close):
+    bb_upper = _values(df, 'BB_Upper')
+    bb_lower = _values(df, 'BB_Lower')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (close - bb_lower) / (bb_upper - bb_lower)
+
+
+def trend_reversal_confirmation(df):
+    """趨勢反轉確認指標（0-100）"""
+    close = _values(df, 'Close')
+    ma20, ma5 = _values(df, 'MA20'), _values(df, 'MA5')
+    rsi, macd, macd_hist = _values(df, 'RSI'), _values(df, 'MACD'), _values(df, 'MACD_Histogram')
+    k, d = _values(df, 'K'), _values(df, 'D')
+    volume_ratio = _values(df, 'Volume_Ratio')
+    bb_position = _bb_position(df, close)
+
+    score = np.select([(close > ma20) & (close > ma5), close > ma20], [20, 10], 0)
+    score += np.select([(rsi > 30) & (rsi < 60), rsi < 30], [15, 10], 0)
+    score += np.select([(macd > 0) & (macd_hist > 0), macd > 0], [15, 10], 0)
+    score += np.where((k > d) & (k < 40), 10, 0)
+    score += np.select([volume_ratio > 1.2, volume_ratio > 1.0], [10, 5], 0)
+    score += np.where(_values(df, 'Price_Momentum') > 0, 10, 0)
+    score += np.select([bb_position < 0.5, bb_position < 0.7], [10, 5], 0)
+    return _series(np.minimum(100, score), df)
+
+
+def reversal_strength(df):
+    """反轉強度指標（0-100）"""
+    momentum_5d = _values(df, 'Price_Momentum')
+    momentum_10d = _change(df, 10)
+    volume_ratio = _values(df, 'Volume_Ratio')
+    ma_strength = _values(df, 'MA_Bullish_Strength')
+    channel_slope = _values(df, 'Price_Channel_Slope')
+
+    score = np.select([momentum_5d > 0.02, momentum_5d > 0], [20, 10], 0)
+    score += np.select([momentum_10d > 0.05, momentum_10d > 0], [15, 10], 0)
+    positive_slopes = ((_values(df, 'RSI_Slope') > 0).astype(np.int64)
+                       + (_values(df, 'MACD_Slope') > 0) + (_values(df, 'K_Slope') > 0))
+    score += np.select([positive_slopes == 3, positive_slopes == 2, positive_slopes == 1], [20, 15, 10], 0)
+    score += np.select([volume_ratio > 1.5, volume_ratio > 1.2, volume_ratio > 1.0], [15, 10, 5], 0)
+    score += np.select([ma_strength > 80, ma_strength > 60], [15, 10], 0)
+    score += np.select([channel_slope > 1, channel_slope > 0], [10, 5], 0)
+    return _series(np.minimum(100, score), df)
+
+
+def reversal_reliability(df):
+    """反轉可信度指標（0-100）"""
+    close = _values(df, 'Close')
+    rsi, macd, macd_hist = _values(df, 'RSI'), _values(df, 'MACD'), _values(df, 'MACD_Histogram')
+    k, d = _values(df, 'K'), _values(df, 'D')
+    volume_ratio = _values(df, 'Volume_Ratio')
+    bb_position = _bb_position(df, close)
+    adx = _values(df, 'ADX')
+    support = _values(df, 'Support_Reliability')
+
+    # 多重技術指標一致性
+    bullish_indicators = np.where((rsi > 30) & (rsi < 70), 1.0, 0.0)
+    bullish_indicators += np.select([(macd > 0) & (macd_hist > 0), macd > 0], [1.0, 0.5], 0.0)
+    bullish_indicators += np.where((k > d) & (k < 40), 1.0, 0.0)
+    bullish_indicators += np.where(close > _values(df, 'SAR'), 1.0, 0.0)
+    bullish_indicators += np.where(_values(df, 'OBV') > _values(df, 'OBV_MA'), 1.0, 0.0)
+
+    score = np.select([bullish_indicators >= 4, bullish_indicators >= 3, bullish_indicators >= 2], [30, 20, 15], 0)
+    score += np.select([(volume_ratio >= 0.8) & (volume_ratio <= 2.0), volume_ratio > 2.0], [20, 10], 0)
+    score += np.select([(bb_position >= 0.2) & (bb_position <= 0.7), bb_position < 0.2, bb_position > 0.8],
+                       [20, 15, 5], 0)
+    score += np.select([(adx >= 20) & (adx <= 40), adx > 40, adx < 20], [15, 10, 5], 0)
+    score += np.select([support > 60, support > 40], [15, 10], 0)
+    return _series(np.minimum(100, score), df)
+
+
+def short_term_momentum_turn(df):
+    """短期動能轉折點"""
+    rsi = _values(df, 'RSI')
+    macd_hist = _values(df, 'MACD_Histogram')
+    momentum_3d = _change(df, 3)
+    momentum_7d = _change(df, 7)
+
+    score = np.where((momentum_3d > 0) & (momentum_3d > momentum_7d), 30, 0)
+    score += np.where((_shift(rsi, 3) < 40) & (rsi > 45), 25, 0)
+    score += np.where((_shift(macd_hist, 3) < 0) & (macd_hist > 0), 25, 0)
+
+    # 低點抬高：最近2根的最低價高於再之前3根的最低價（略過 NaN）
+    context = context_for(df)
+    low_1 = context.rolling('Low', 3, 'min', min_periods=1).shift(2).to_numpy(dtype=np.float64)
+    low_2 = context.rolling('Low', 2, 'min', min_periods=1).to_numpy(dtype=np.float64)
+    score += np.where(low_2 > low_1, 20, 0)
+    return _series(np.where(_row_count(df) >= 7, score, 0), df)
+
+
+def _last_two_local_lows(is_low):
+    """
+    每一列最近10根K線內（不含頭尾）最後兩個區域低點的位置，不存在時為 -1
+    is_low：區域低點遮罩（低於前後各一根K線）
+    """
+    n = len(is_low)
+    positions = np.arange(n)
+    last_low = np.maximum.accumulate(np.where(is_low, positions, -1)) if n else positions
+
+    # 第 i 列窗口的內部位置為 i-8 .. i-1
+    last = np.full(n, -1)
+    last[1:] = last_low[:-1]
+    previous = np.where(last > 0, last_low[np.maximum(last - 1, 0)], -1)
+    window_start = positions - 8
+    last = np.where(last >= window_start, last, -1)
+    previous = np.where((last >= 0) & (previous >= window_start), previous, -1)
+    return last, previous
+
+
+def price_structure_reversal(df):
+    """價格結構反轉：雙底、接近突破頸線、在支撐位反彈"""
+    close = _values(df, 'Close')
+    low = _values(df, 'Low')
+
+    # 雙底或W底：最近兩個區域低點中，後者較高
+    context = context_for(df)
+    last, previous = _last_two_local_lows(context.local_lows(strict=True))
+    has_pair = (last >= 0) & (previous >= 0)
+    higher_low = has_pair & (low[np.maximum(last, 0)] > low[np.maximum(previous, 0)])
+    score = np.where(higher_low, 40, 0)
+
+    # 突破頸線：收盤價接近最近5根K線的最高價
+    neckline = context.rolling('High', 5, 'max', min_periods=1).to_numpy(dtype=np.float64)
+    score += np.where(close > neckline * 0.98, 30, 0)
+
+    # 價格在支撐位 ±2% 內
+    near_support = np.zeros(len(close), dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for column in ('MA20', 'BB_Lower', 'SAR'):
+            ratio = close / _values(df, column)
+            near_support |= (ratio > 0.98) & (ratio < 1.02)
+    score += np.where(near_support, 15, 0)
+    return _series(np.where(_row_count(df) >= 10, score, 0), df)
+
+
+# --- 進場評估：波動性風險與進場時機 ---
+# 各評分以（旗標欄位, 分數, 說明）表示，依原方法的判斷順序排列
+
+RISK_FACTORS = (
+    ('high_vol', 30, "高歷史波動率"),
+    ('medium_vol', 15, "中等波動率"),
+    ('low_vol', -10, "低波動率"),
+    ('vol_surge', 20, "近期波動率激增"),
+    ('vol_decline', -5, "近期波動率下降"),
+    ('frequent_gaps', 15, "頻繁跳空"),
+    ('intraday_swings', 10, "日內波動大"),
+)
+
+TIMING_FACTORS = (
+    ('near_recent_low', 20, "接近近期低點"),
+    ('rising_bottoms', 25, "上升底部結構"),
+    ('momentum_turn', 15, "短期動量轉正"),
+    ('momentum_acceleration', 10, "動量加速向上"),
+    ('volume_rally', 15, "放量上漲"),
+    ('volume_selloff', -10, "放量下跌"),
+    ('rsi_rebound', 20, "RSI超賣反彈"),
+    ('macd_turn', 15, "MACD柱狀圖轉正"),
+    ('support_test', 10, "測試關鍵支撐位"),
+    ('hammer', 15, "錘子線形態"),
+    ('doji', 10, "十字星形態"),
+)
+
+
+def _factor_score(flags, factors):
+    score = np.zeros(len(next(iter(flags.values()))), dtype=np.int64)
+    for column, points, _ in factors:
+        score += np.where(flags[column], points, 0)
+    return score
+
+
+def _at_last_valid(valid, compact):
+    """compact 只含有效位置的值，返回每一列到目前為止最後一個有效位置的值"""
+    counts = np.cumsum(valid)
+    result = np.full(len(valid), np.nan)
+    seen = counts > 0
+    result[seen] = compact[counts[seen] - 1]
+    return result
+
+
+def last_row(frame):
+    """逐列結果的最後一列（{欄位: 值}）"""
+    return {column: frame[column].iloc[-1] for column in frame.columns}
+
+
+def factor_labels(row, factors):
+    """某一列成立的評分因素說明"""
+    return [label for column, _, label in factors if row[column]]
+
+
+def volatility_risk(df):
+    """
+    波動性風險評分（逐列，同 calculate_volatility_risk_score 對 df.iloc[:i+1] 的結果）
+    歷史 / 近10日波動率以略過 NaN 的報酬做擴張 / 滾動標準差，跳空與日內波動為累積平均
+    """
+    close = _values(df, 'Close')
+    n = len(close)
+
+    # 報酬只算一次，歷史與近期波動率共用（同 pct_change().dropna()）
+    returns = _change(df, 1)
+    valid = ~np.isnan(returns)
+    compact = pd.Series(returns[valid])
+    historical_vol = _at_last_valid(valid, compact.expanding().std().to_numpy()) * np.sqrt(252)
+    recent_vol = _at_last_valid(valid, rolling_std(compact.to_numpy(), 10, min_periods=1)) * np.sqrt(252)
+
+    # 跳空：開盤價相對前一日收盤價（沒有跳空資料時為 0）
+    prev_close = _shift(close, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gaps = np.abs(_values(df, 'Open') - prev_close) / prev_close
+        gap_sum = np.cumsum(np.where(np.arange(n) > 0, gaps, 0.0))
+        avg_gap = np.where(np.arange(n) > 0, gap_sum / np.maximum(np.arange(n), 1), 0.0)
+
+        # 日內波動：(最高 - 最低) / 收盤 的平均（略過 NaN）
+        intraday = (_values(df, 'High') - _values(df, 'Low')) / close
+        intraday_count = np.cumsum(~np.isnan(intraday))
+        intraday_vol = np.nancumsum(intraday) / np.where(intraday_count > 0, intraday_count, np.nan)
+
+    high_vol = historical_vol > 0.4
+    medium_vol = ~high_vol & (historical_vol > 0.25)
+    vol_surge = recent_vol > historical_vol * 1.5
+    flags = {
+        'high_vol': high_vol,
+        'medium_vol': medium_vol,
+        'low_vol': ~high_vol & ~medium_vol & (historical_vol < 0.15),
+        'vol_surge': vol_surge,
+        'vol_decline': ~vol_surge & (recent_vol < historical_vol * 0.7),
+        'frequent_gaps': avg_gap > 0.03,
+        'intraday_swings': intraday_vol > 0.05,
+    }
+    risk_score = _factor_score(flags, RISK_FACTORS)
+    risk_level = np.select(
+        [risk_score >= 50, risk_score >= 30, risk_score >= 15, risk_score >= 0],
+        ['very_high', 'high', 'medium', 'low'], 'very_low')
+
+    return pd.DataFrame({
+        'risk_score': risk_score,
+        'risk_level': risk_level,
+        'historical_vol': historical_vol,
+        'recent_vol': recent_vol,
+        'avg_gap': avg_gap,
+        'intraday_vol': intraday_vol,
+        **flags,
+    }, index=df.index)
+
+
+def entry_timing(df):
+    """進場時機評分（逐列，同 calculate_entry_timing_score 對 df.iloc[:i+1] 的結果）"""
+    close = _values(df, 'Close')
+    low = _values(df, 'Low')
+    rows = _row_count(df)
+    n = len(close)
+
+    # 1. 短期價格結構：接近近5根K線低點，及其中（不含頭尾）的區域低點逐步墊高
+    context = context_for(df)
+    recent_low = context.rolling('Low', 5, 'min', min_periods=1).to_numpy(dtype=np.float64)
+    is_low = context.local_lows()
+    # 第 i 列的候選位置為 i-1、i-2、i-3（且不是第一根K線）
+    candidates = []
+    for offset in (1, 2, 3):
+        flag = np.zeros(n, dtype=bool)
+        flag[offset + 1:] = is_low[1:n - offset]
+        candidates.append((flag, _shift(low, offset)))
+    (near_flag, near_low), (mid_flag, mid_low), (far_flag, far_low) = candidates
+    first_low = np.where(far_flag, far_low, np.where(mid_flag, mid_low, near_low))
+    last_low = np.where(near_flag, near_low, np.where(mid_flag, mid_low, far_low))
+    low_count = near_flag.astype(np.int64) + mid_flag + far_flag
+
+    # 2. 短期動量
+    momentum_1d = _change(df, 1)
+    momentum_3d = _change(df, 3)
+    momentum_5d = _change(df, 5)
+
+    # 3. 成交量
+    volume_ratio = _values(df, 'Volume_Ratio')
+    volume_rally = (volume_ratio > 1.2) & (momentum_1d > 0)
+
+    # 4. 技術指標：只有一根K線時前值等於當前值
+    rsi = _values(df, 'RSI')
+    macd_hist = _values(df, 'MACD_Histogram')
+    rsi_prev = np.where(rows > 1, _shift(rsi, 1), rsi)
+    macd_hist_prev = np.where(rows > 1, _shift(macd_hist, 1), macd_hist)
+
+    # 5. 支撐位測試（MA20、布林下軌、SAR 任一）
+    support_test = np.zeros(n, dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for column in ('MA20', 'BB_Lower', 'SAR'):
+            support = _values(df, column)
+            ratio = close / support
+            support_test |= ~np.isnan(support) & (ratio >= 0.98) & (ratio <= 1.03)
+
+        # 6. 反轉K線：錘子線或十字星
+        open_ = _values(df, 'Open')
+        total_range = _values(df, 'High') - low
+        body_ratio = np.abs(close - open_) / total_range
+        shadow_ratio = (np.minimum(open_, close) - low) / total_range
+    candle = (rows >= 3) & (total_range > 0)
+    hammer = candle & (body_ratio < 0.3) & (shadow_ratio > 0.6)
+
+    flags = {
+        'near_recent_low': close <= recent_low * 1.02,
+        'rising_bottoms': (low_count >= 2) & (last_low > first_low),
+        'momentum_turn': (momentum_1d > 0) & (momentum_3d <= 0),
+        'momentum_acceleration': (momentum_1d > momentum_3d) & (momentum_3d > momentum_5d),
+        'volume_rally': volume_rally,
+        'volume_selloff': ~volume_rally & (volume_ratio > 1.5) & (momentum_1d < 0),
+        'rsi_rebound': (rsi_prev < 35) & (rsi > 35),
+        'macd_turn': (macd_hist_prev <= 0) & (macd_hist > 0),
+        'support_test': support_test,
+        'hammer': hammer,
+        'doji': candle & ~hammer & (body_ratio < 0.1),
+    }
+
+    return pd.DataFrame({
+        'timing_score': _factor_score(flags, TIMING_FACTORS),
+        'momentum_1d': momentum_1d,
+        'momentum_3d': momentum_3d,
+        'volume_confirmation': volume_rally,
+        **flags,
+    }, index=df.index)
+
+
+def _running_min_where(mask, values):
+    """
+    第 i 列為前 i+1 列中 mask 成立位置的 values 依序取 Python min() 的結果
+    （第一個值為 NaN 時結果為 NaN，之後的 NaN 略過）；has_any 標示是否已出現 mask
+    """
+    selected = np.where(mask, values, np.nan)
+    running = np.fmin.accumulate(selected) if len(selected) else selected
+    has_any = np.cumsum(mask) > 0
+    if has_any.any():
+        first = int(np.argmax(mask))
+        if np.isnan(values[first]):
+            running[first:] = np.nan
+    return running, has_any
+
+
+def long_signal_levels(df):
+    """
+    抄底價位與支撐信心度（逐列，同 calculate_long_signal_price 對 df.iloc[:i+1] 的結果）
+    六個支撐：最低價、布林下軌、MA30、多頭訊號日收盤價、最大成交量K棒最低價、RSI<30 時最低價，
+    取低於當前價格的最高者；信心度依有幾個支撐接近該價位（3% 以內）
+    """
+    close = _values(df, 'Close')
+    low = _values(df, 'Low')
+    n = len(close)
+
+    # 1. 最低價（略過 NaN）
+    min_low = np.fmin.accumulate(low) if n else low
+
+    # 2. 布林下軌（指標表已有時直接沿用）與 3. MA30
+    if 'BB_Lower' in df:
+        bb_lower = _values(df, 'BB_Lower')
+    else:
+        context = context_for(df)
+        bb_lower = (context.rolling('Close', 20) - 2 * context.rolling('Close', 20, 'std')).to_numpy(dtype=np.float64)
+    ma30 = _values(df, 'MA30')
+
+    # 4. 多頭訊號日（黃金交叉、RSI反轉、MACD柱狀圖轉正）收盤價的最小值，沒有訊號時為最低價
+    ma5 = _values(df, 'MA5')
+    ma20 = _values(df, 'MA20')
+    rsi = _values(df, 'RSI')
+    macd_hist = _values(df, 'MACD_Histogram')
+    signal_day = (((ma5 > ma20) & (_shift(ma5, 1) <= _shift(ma20, 1)))
+                  | ((rsi > 30) & (_shift(rsi, 1) <= 30))
+                  | ((macd_hist > 0) & (_shift(macd_hist, 1) <= 0)))
+    signal_low, has_signal = _running_min_where(signal_day, close)
+    signal_price = np.where(has_signal, signal_low, min_low)
+
+    # 5. 到目前為止最大成交量（第一次出現）那根K線的最低價
+    volume = _values(df, 'Volume')
+    previous_max = _shift(np.fmax.accumulate(volume) if n else volume, 1)
+    record = ~np.isnan(volume) & (np.isnan(previous_max) | (volume > previous_max))
+    position = np.maximum.accumulate(np.where(record, np.arange(n), -1)) if n else np.zeros(0, dtype=np.int64)
+    max_volume_low = np.where(position >= 0, low[np.maximum(position, 0)], min_low)
+
+    # 6. RSI<30 時的最低價（略過 NaN）
+    oversold = rsi < 30
+    oversold_low = np.fmin.accumulate(np.where(oversold, low, np.nan)) if n else low
+    rsi_oversold_low = np.where(np.cumsum(oversold) > 0, oversold_low, min_low)
+
+    # 綜合多重支撐，取低於當前價格的最高值；都不低於當前價格時使用最低價的90%
+    candidates = np.vstack([min_low, bb_lower, ma30, signal_price, max_volume_low, rsi_oversold_low])
+    below = ~np.isnan(candidates) & (candidates < close)
+    long_signal_price = np.where(below.any(axis=0), np.where(below, candidates, -np.inf).max(axis=0), min_low * 0.9)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        near = ~np.isnan(candidates) & (np.abs(long_signal_price - candidates) / long_signal_price < 0.03)
+    confidence = np.minimum(100, 40 + near.sum(axis=0) * 15)
+
+    return pd.DataFrame({
+        'long_signal_price': long_signal_price,
+        'confidence': confidence,
+        'min_low': min_low,
+        'bb_lower': bb_lower,
+        'ma30': ma30,
+        'signal_price': signal_price,
+        'max_volume_low': max_volume_low,
+        'rsi_oversold_low': rsi_oversold_low,
+    }, index=df.index)